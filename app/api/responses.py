@@ -0,0 +1,102 @@
+import os
+import json
+import gzip
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # Falls back to FastAPI's encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Only gzip is offered
+    brotli = None
+
+# Serialize with orjson (when installed) instead of FastAPI's validating encoder
+FAST_JSON = os.getenv("API_FAST_JSON", "true").lower() == "true"
+
+# Responses smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv("API_COMPRESS_MIN_BYTES", "1024"))
+
+# Compression settings, tuned for speed over ratio (responses are built per request)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+def _orjson_default(value: Any) -> Any:
+    """Types orjson does not know natively"""
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dump_json(content: Any) -> bytes:
+    """
+    Serialize a response payload (models, dicts, lists, NumPy values) to JSON bytes.
+
+    Models are dumped as they are, without validating them again against the
+    response model.
+    """
+    if FAST_JSON and orjson is not None:
+        return orjson.dumps(
+            content,
+            default=_orjson_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(jsonable_encoder(content), separators=(",", ":")).encode("utf-8")
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Content codings of an Accept-Encoding header with their q-values"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    return accepted
+
+def negotiate_encoding(request: Request) -> Optional[str]:
+    """Best supported content coding the client accepts: br, then gzip (None: identity)"""
+    accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+    wildcard = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+def json_response(
+    request: Request,
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    JSON response through the fast path, compressed with br or gzip if the client accepts it.
+
+    Endpoints returning this keep their response_model for the API docs; FastAPI
+    sends a returned Response as it is.
+    """
+    body = dump_json(content)
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept-Encoding"
+
+    encoding = negotiate_encoding(request) if len(body) >= COMPRESS_MIN_BYTES else None
+    if encoding == "br":
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+    elif encoding == "gzip":
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from typing import List, Optional
 from datetime import datetime, timedelta
 import os
 
 from app.services.pdf_service import generate_daily_report, generate_weekly_report
+from app.services.result_export import EXPORT_FORMATS, export_available, iter_export
 
 router = APIRouter()
 
@@ -65,4 +66,40 @@ async def export_weekly_report(
             media_type="application/pdf"
         )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate weekly report: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to generate weekly report: {str(e)}")
+
+
+@router.get("/results")
+def export_results(
+    project_id: str,
+    start_date: str = Query(..., description="Start date in YYYY-MM-DD format"),
+    end_date: str = Query(..., description="End date in YYYY-MM-DD format"),
+    format: str = Query("ndjson", description="ndjson (one line per time step) or arrow (IPC stream, one row per segment and time step)")
+):
+    """
+    Stream the simulation results of a date range.
+    
+    Generated lazily from the result store one day at a time, so memory use does not
+    depend on the length of the range. Segment geometry is not included; see
+    GET /api/simulation/{project_id}/network.
+    """
+    try:
+        parsed_start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+        parsed_end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    
+    if parsed_end_date < parsed_start_date:
+        raise HTTPException(status_code=400, detail="End date must be after start date")
+    
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format. Use one of {', '.join(EXPORT_FORMATS)}")
+    if not export_available(format):
+        raise HTTPException(status_code=501, detail="Arrow export requires pyarrow on the server")
+    
+    extension = "arrows" if format == "arrow" else "ndjson"
+    return StreamingResponse(
+        iter_export(project_id, parsed_start_date, parsed_end_date, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="simulation_{project_id}_{start_date}_to_{end_date}.{extension}"'}
+    )
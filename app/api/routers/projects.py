@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, Query
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, Query, Request
 from fastapi.responses import JSONResponse
 from typing import Optional, List, Dict, Any
 import json
@@ -8,8 +8,9 @@ import pandas as pd
 import geopandas as gpd
 from shapely.geometry import Polygon, LineString
 
+from app.api.responses import json_response
 from app.models.project import Project, ProjectCreate, ProjectUpdate
-from app.services.excel_validator import validate_excel
+from app.services.schedule_store import store_upload
 from app.services.project_service import create_project, get_project, update_project, get_all_projects, delete_project
 
 router = APIRouter()
@@ -70,8 +71,8 @@ async def create_project_endpoint(
         # Determine file extension
         file_extension = file.filename.split(".")[-1].lower()
         
-        # Validate the file (Excel or CSV)
-        validation_result = validate_excel(file_content)
+        # Validate the file (Excel or CSV) and store its parsed tables
+        validation_result = store_upload(file_content)
         
         if not validation_result["valid"]:
             return JSONResponse(
@@ -126,6 +127,7 @@ async def create_project_endpoint(
             simulation_start_time="06:00",
             simulation_end_time="18:00",
             simulation_interval="1h",
+            schedule_hash=validation_result["schedule_hash"],
             created_at=datetime.now(),
             # Add traffic data to ProjectCreate model
             primary_counter=primary_counter_data,
@@ -147,17 +149,17 @@ async def create_project_endpoint(
         raise HTTPException(status_code=500, detail=f"Failed to create project: {str(e)}")
 
 @router.get("/", response_model=List[Project])
-async def get_projects():
+async def get_projects(request: Request):
     """Get all projects"""
-    return get_all_projects()
+    return json_response(request, get_all_projects())
 
 @router.get("/{project_id}", response_model=Project)
-async def get_project_by_id(project_id: str):
+async def get_project_by_id(project_id: str, request: Request):
     """Get a project by ID"""
     project = get_project(project_id)
     if not project:
         raise HTTPException(status_code=404, detail=f"Project {project_id} not found")
-    return project
+    return json_response(request, project)
 
 @router.put("/{project_id}", response_model=Project)
 async def update_project_endpoint(
@@ -188,7 +190,7 @@ async def update_project_endpoint(
         # Process new file if uploaded
         if file:
             file_content = await file.read()
-            validation_result = validate_excel(file_content)
+            validation_result = store_upload(file_content)
             
             if not validation_result["valid"]:
                 return JSONResponse(
@@ -206,6 +208,7 @@ async def update_project_endpoint(
             
             update_data["file_name"] = file.filename
             update_data["file_path"] = file_path
+            update_data["schedule_hash"] = validation_result["schedule_hash"]
         
         # Process GeoJSON data
         if polygon:
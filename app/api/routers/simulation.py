@@ -1,27 +1,100 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response
 from typing import List, Dict, Any, Optional
 from datetime import datetime, time, timedelta
 
-from app.models.simulation import SimulationRequest, SimulationResult
-from app.services.simulation_service import run_simulation, get_simulation_results
+from app.api.responses import json_response
+from app.models.simulation import SimulationRequest, SimulationResult, SimulationJob, SimulationNetwork, SimulationValues
+from app.services.simulation_service import (
+    run_simulation, get_simulation_results, get_traffic_rollups,
+    get_simulation_values, get_simulation_network, get_latest_network_version
+)
+from app.services.job_service import submit_job, get_job, get_jobs, cancel_job
 
 router = APIRouter()
 
 @router.post("/run", response_model=SimulationResult)
-async def run_simulation_endpoint(request: SimulationRequest):
-    """Run a traffic simulation for a construction site project"""
+def run_simulation_endpoint(request: SimulationRequest):
+    """
+    Run a traffic simulation for a construction site project and wait for it.
+    
+    Declared as a plain function so FastAPI runs it in its thread pool instead of
+    blocking the event loop. Prefer POST /jobs for anything longer than a day.
+    """
     try:
         return run_simulation(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Simulation failed: {str(e)}")
 
+@router.post("/jobs", response_model=SimulationJob, status_code=202)
+async def submit_simulation_job_endpoint(request: SimulationRequest):
+    """Queue a simulation run and return the job immediately (identical active requests are deduplicated)"""
+    try:
+        return submit_job(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to queue simulation: {str(e)}")
+
+@router.get("/jobs", response_model=List[SimulationJob])
+async def get_simulation_jobs_endpoint(
+    project_id: Optional[str] = Query(None, description="Only jobs of this project")
+):
+    """List simulation jobs, newest first"""
+    return get_jobs(project_id)
+
+@router.get("/jobs/{job_id}", response_model=SimulationJob)
+async def get_simulation_job_endpoint(job_id: str):
+    """Get status and progress (days completed) of a simulation job"""
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/jobs/{job_id}/results", response_model=Optional[SimulationResult])
+async def get_simulation_job_results_endpoint(
+    job_id: str,
+    request: Request,
+    date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format (default: latest completed day)"),
+    hour: Optional[int] = Query(None, description="Hour of the day (0-23)"),
+    minute: Optional[int] = Query(None, description="Minute of the step within the hour (sub-hourly runs; default: first step of the hour)")
+):
+    """Get (partial) results of a job for one of its completed days"""
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if date:
+        try:
+            parsed_date = datetime.strptime(date, "%Y-%m-%d").date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    elif job.completed_dates:
+        parsed_date = max(job.completed_dates)
+    else:
+        return None
+    
+    if parsed_date not in job.completed_dates:
+        raise HTTPException(status_code=404, detail="Day not simulated by this job yet")
+    
+    return json_response(request, get_simulation_results(job.project_id, parsed_date, hour, minute))
+
+@router.delete("/jobs/{job_id}", response_model=SimulationJob)
+async def cancel_simulation_job_endpoint(job_id: str):
+    """Cancel a queued or running simulation job (finished days are kept)"""
+    job = cancel_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @router.get("/{project_id}/results", response_model=SimulationResult)
 async def get_simulation_results_endpoint(
     project_id: str,
+    request: Request,
     date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format"),
-    hour: Optional[int] = Query(None, description="Hour of the day (0-23)")
+    hour: Optional[int] = Query(None, description="Hour of the day (0-23)"),
+    minute: Optional[int] = Query(None, description="Minute of the step within the hour (sub-hourly runs; default: first step of the hour)")
 ):
-    """Get simulation results for a project, optionally filtered by date and hour"""
+    """Get simulation results for a project, optionally filtered by date and time step"""
     try:
         # Parse date if provided
         parsed_date = None
@@ -34,17 +107,90 @@ async def get_simulation_results_endpoint(
         # Validate hour if provided
         if hour is not None and (hour < 0 or hour > 23):
             raise HTTPException(status_code=400, detail="Hour must be between 0 and 23")
+        if minute is not None and (minute < 0 or minute > 59):
+            raise HTTPException(status_code=400, detail="Minute must be between 0 and 59")
             
-        return get_simulation_results(project_id, parsed_date, hour)
+        return json_response(request, get_simulation_results(project_id, parsed_date, hour, minute))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve simulation results: {str(e)}")
 
-@router.get("/{project_id}/daily-traffic", response_model=Dict[str, Any])
+@router.get("/{project_id}/values", response_model=Optional[SimulationValues])
+async def get_simulation_values_endpoint(
+    project_id: str,
+    request: Request,
+    date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format"),
+    hour: Optional[int] = Query(None, description="Hour of the day (0-23)"),
+    minute: Optional[int] = Query(None, description="Minute of the step within the hour (sub-hourly runs; default: first step of the hour)")
+):
+    """
+    Get compact simulation results: per-segment value arrays without geometry.
+    
+    The arrays are aligned with the segment order of GET /{project_id}/network for
+    the returned network_version, which map clients fetch once and cache.
+    """
+    parsed_date = None
+    if date:
+        try:
+            parsed_date = datetime.strptime(date, "%Y-%m-%d").date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    
+    if hour is not None and (hour < 0 or hour > 23):
+        raise HTTPException(status_code=400, detail="Hour must be between 0 and 23")
+    if minute is not None and (minute < 0 or minute > 59):
+        raise HTTPException(status_code=400, detail="Minute must be between 0 and 59")
+    
+    return json_response(request, get_simulation_values(project_id, parsed_date, hour, minute))
+
+@router.get("/{project_id}/network", response_model=SimulationNetwork)
+async def get_simulation_network_endpoint(
+    project_id: str,
+    request: Request,
+    version: Optional[str] = Query(None, description="Network version (default: network of the latest simulated day)")
+):
+    """
+    Get the segment geometry, node IDs, length and speed limit of a simulation network.
+    
+    The ETag is the network version; clients revalidate with If-None-Match and get
+    304 Not Modified while it is unchanged. A requested version never changes.
+    """
+    pinned = version is not None
+    if not pinned:
+        version = get_latest_network_version(project_id)
+        if version is None:
+            raise HTTPException(status_code=404, detail="No simulation results found")
+    
+    etag = f'"{version}"'
+    cache_control = "public, max-age=31536000, immutable" if pinned else "no-cache"
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    
+    network = get_simulation_network(project_id, version)
+    if network is None:
+        raise HTTPException(status_code=404, detail="Network version not found")
+    
+    return json_response(request, network, headers={"ETag": etag, "Cache-Control": cache_control})
+
+@router.get(
+    "/{project_id}/daily-traffic",
+    response_model=Dict[str, Any],
+    description=(
+        "Hourly traffic totals of a day under hourly_buckets (hour -> rollup bucket, as in "
+        "/traffic-rollups?level=hour). Replaces the former hourly_traffic key, which held a full "
+        "SimulationResult per hour; use /{project_id}/results?date=...&hour=... for those."
+    )
+)
 async def get_daily_traffic_endpoint(
     project_id: str,
+    request: Request,
     date: str = Query(..., description="Date in YYYY-MM-DD format")
 ):
-    """Get hourly traffic data for a specific day"""
+    """
+    Get hourly traffic totals for a specific day.
+
+    Served from the hour rollups under hourly_buckets. The former hourly_traffic
+    key (a SimulationResult per hour) is no longer returned.
+    """
     try:
         # Parse date
         try:
@@ -52,24 +198,23 @@ async def get_daily_traffic_endpoint(
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
             
-        # Get hourly results for the entire day
+        # Hour buckets from the traffic rollups, without loading any segment data
         results = {}
-        for hour in range(24):
-            hour_results = get_simulation_results(project_id, parsed_date, hour)
-            if hour_results:
-                results[hour] = hour_results
+        for bucket in get_traffic_rollups(project_id, "hour", parsed_date, parsed_date):
+            results[datetime.fromisoformat(bucket["start"]).hour] = bucket
                 
-        return {
+        return json_response(request, {
             "project_id": project_id,
             "date": date,
-            "hourly_traffic": results
-        }
+            "hourly_buckets": results
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve daily traffic data: {str(e)}")
 
 @router.get("/{project_id}/weekly-traffic", response_model=Dict[str, Any])
 async def get_weekly_traffic_endpoint(
     project_id: str,
+    request: Request,
     start_date: str = Query(..., description="Start date in YYYY-MM-DD format")
 ):
     """Get daily traffic data for a week starting from the given date"""
@@ -94,24 +239,61 @@ async def get_weekly_traffic_endpoint(
                 "hourly_data": {}
             }
             
-            for hour in range(6, 19):  # 6 AM to 6 PM
-                hour_results = get_simulation_results(project_id, current_date, hour)
-                if hour_results:
-                    traffic_volume = sum(hour_results.get("traffic_volumes", {}).values())
-                    daily_stats["hourly_data"][hour] = traffic_volume
-                    daily_stats["total_vehicles"] += traffic_volume
-                    
-                    if traffic_volume > daily_stats["peak_traffic"]:
-                        daily_stats["peak_traffic"] = traffic_volume
-                        daily_stats["peak_hour"] = hour
-            
             results[date_str] = daily_stats
+        
+        # Hourly totals from the traffic rollups, without loading any segment data
+        for bucket in get_traffic_rollups(project_id, "hour", parsed_start_date, parsed_start_date + timedelta(days=6)):
+            bucket_time = datetime.fromisoformat(bucket["start"])
+            if not 6 <= bucket_time.hour <= 18:  # 6 AM to 6 PM
+                continue
+            daily_stats = results[bucket_time.strftime("%Y-%m-%d")]
+            traffic_volume = bucket["total_traffic"]
+            daily_stats["hourly_data"][bucket_time.hour] = traffic_volume
+            daily_stats["total_vehicles"] += traffic_volume
+            
+            if traffic_volume > daily_stats["peak_traffic"]:
+                daily_stats["peak_traffic"] = traffic_volume
+                daily_stats["peak_hour"] = bucket_time.hour
                 
-        return {
+        return json_response(request, {
             "project_id": project_id,
             "start_date": start_date,
             "end_date": (parsed_start_date + timedelta(days=6)).strftime("%Y-%m-%d"),
             "daily_traffic": results
-        }
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve weekly traffic data: {str(e)}")
+
+
+@router.get("/{project_id}/traffic-rollups", response_model=Dict[str, Any])
+async def get_traffic_rollups_endpoint(
+    project_id: str,
+    request: Request,
+    start_date: str = Query(..., description="Start date in YYYY-MM-DD format"),
+    end_date: str = Query(..., description="End date in YYYY-MM-DD format"),
+    level: str = Query("day", description="Aggregation level: hour, day, week or month")
+):
+    """Get total traffic, peak hour, average congestion and deliveries per hour, day, ISO week or month"""
+    try:
+        parsed_start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+        parsed_end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    
+    if parsed_end_date < parsed_start_date:
+        raise HTTPException(status_code=400, detail="End date must be after start date")
+    
+    try:
+        buckets = get_traffic_rollups(project_id, level, parsed_start_date, parsed_end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to retrieve weekly traffic data: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve traffic rollups: {str(e)}")
+    
+    return json_response(request, {
+        "project_id": project_id,
+        "level": level,
+        "start_date": start_date,
+        "end_date": end_date,
+        "buckets": buckets
+    })
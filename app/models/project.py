@@ -16,6 +16,9 @@ class ProjectBase(BaseModel):
     simulation_end_time: Optional[str] = "18:00"
     simulation_interval: Optional[str] = "1h"
     
+    # Content hash of the uploaded file in the schedule store (see schedule_store)
+    schedule_hash: Optional[str] = None
+    
     primary_counter: Optional[Dict[str, Any]] = None
     selected_counters: Optional[List[Dict[str, Any]]] = []
     delivery_days: Optional[List[str]] = []
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime, date
 import uuid
@@ -9,6 +9,13 @@ class SimulationRequest(BaseModel):
     start_date: date
     end_date: date
     time_interval: str = "1h"  # e.g., "1h", "30m"
+    n_samples: int = 1  # Monte Carlo realizations per day; >1 stores mean and percentile bands
+    
+    @validator('n_samples')
+    def validate_n_samples(cls, value):
+        if value < 1 or value > 1000:
+            raise ValueError("n_samples must be between 1 and 1000")
+        return value
     
 class TrafficSegment(BaseModel):
     """Model for a road segment with traffic data"""
@@ -20,6 +27,7 @@ class TrafficSegment(BaseModel):
     traffic_volume: int
     congestion_level: float  # 0.0 - 1.0
     coordinates: List[List[float]]  # [[lon1, lat1], [lon2, lat2], ...]
+    ensemble: Optional[Dict[str, float]] = None  # Ensemble runs: mean, P50/P90/P95 and exceedance probability
     
 class SimulationTimeStep(BaseModel):
     """Model for simulation data at a specific time step"""
@@ -37,6 +45,30 @@ class SimulationResult(BaseModel):
     congestion_points: List[Dict[str, Any]]  # List of highly congested areas
     stats: Dict[str, Any]  # Summary statistics
 
+class SimulationNetwork(BaseModel):
+    """Static segment payload of a simulation network, shared by all its time steps"""
+    version: str  # Content hash of the segment list; results reference it as network_version
+    segment_ids: List[str]
+    start_nodes: List[str]
+    end_nodes: List[str]
+    length: List[float]
+    speed_limit: List[float]
+    coordinates: List[List[List[float]]]  # Per segment: [[lon1, lat1], [lon2, lat2], ...]
+
+class SimulationValues(BaseModel):
+    """Compact results of one time step, aligned with the segment order of its network"""
+    id: str
+    project_id: str
+    network_version: str
+    time: datetime
+    execution_time: datetime
+    traffic_volume: List[int]
+    congestion_level: List[float]
+    congested: List[int]  # Indices of the highly congested segments
+    ensemble: Optional[Dict[str, List[float]]] = None  # Ensemble runs: stat -> per-segment values
+    waiting_areas_status: Dict[str, Any]
+    stats: Dict[str, Any]
+
 class SimulationSummary(BaseModel):
     """Summary model for simulation results"""
     id: str
@@ -46,4 +78,19 @@ class SimulationSummary(BaseModel):
     peak_hour: int
     peak_traffic_volume: int
     average_congestion: float
-    congestion_hotspots: List[str] 
\ No newline at end of file
+    congestion_hotspots: List[str]
+
+class SimulationJob(BaseModel):
+    """Model for a queued or running simulation job"""
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    project_id: str
+    request: SimulationRequest
+    status: str = "queued"  # queued, running, completed, failed, cancelled
+    priority: int = 1  # 0 = interactive (single day), 1 = batch
+    days_total: int = 0
+    days_completed: int = 0
+    completed_dates: List[date] = []  # Days whose results are already available
+    created_at: datetime = Field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
@@ -0,0 +1,325 @@
+import os
+import json
+import heapq
+import hashlib
+import threading
+import numpy as np
+import shapely
+from dataclasses import dataclass
+from shapely.geometry import shape
+from typing import Any, Dict, List, Optional
+
+from app.services import network_store
+from app.services.network_store import RoadNetwork, DEFAULT_SPEED_KPH
+
+# Where delivery trucks enter and leave the map: "bounds" (road nodes at the edge of
+# the map bounds) and/or "waiting_areas" (the road node closest to each waiting area)
+DELIVERY_ENTRY_POINTS = [
+    point.strip()
+    for point in os.getenv("DELIVERY_ENTRY_POINTS", "bounds,waiting_areas").split(",")
+    if point.strip()
+]
+
+# Nodes closer to the map edge than this share of the bounds extent count as boundary nodes
+BOUNDS_MARGIN = 0.03
+
+# Road classes trucks enter the map on; other boundary nodes are only used if none qualifies
+ENTRY_HIGHWAYS = {
+    "motorway", "trunk", "primary", "secondary", "tertiary",
+    "motorway_link", "trunk_link", "primary_link", "secondary_link", "tertiary_link"
+}
+
+ROUTES_FILE_PREFIX = "delivery_routes_"
+
+# In-process cache of computed routes
+# Dictionary: routes key -> DeliveryRoutes (None if the site is unreachable)
+_ROUTES = {}
+_LOCK = threading.Lock()
+
+@dataclass
+class DeliveryRoutes:
+    """Shortest truck paths between the entry points and the site, as edge positions of a network."""
+    network_version: str
+    site_node: int
+    inbound_entries: np.ndarray   # int64 node IDs with a path to the site
+    outbound_entries: np.ndarray  # int64 node IDs reachable from the site
+    path_offsets: np.ndarray      # int64, path i spans path_edges[path_offsets[i]:path_offsets[i + 1]]
+    path_edges: np.ndarray        # int64 edge positions; inbound paths first, then outbound
+
+    def __len__(self) -> int:
+        return len(self.path_offsets) - 1
+
+    def edge_share(self, n_edges: int) -> np.ndarray:
+        """
+        Trips per edge caused by one delivery.
+
+        Each delivery is one inbound and one outbound trip, spread evenly over the
+        reachable entry points. This is the route incidence matrix (edges × paths)
+        times the path weights, computed as a weighted bincount.
+        """
+        weights = np.concatenate([
+            np.full(len(self.inbound_entries), 1.0 / max(1, len(self.inbound_entries))),
+            np.full(len(self.outbound_entries), 1.0 / max(1, len(self.outbound_entries)))
+        ])
+        path_weights = np.repeat(weights, np.diff(self.path_offsets))
+        return np.bincount(self.path_edges, weights=path_weights, minlength=n_edges).astype(np.float64)
+
+def routing_parameters() -> Dict[str, Any]:
+    """Routing settings the routes depend on (part of the routes key and the day fingerprint)"""
+    return {
+        "entry_points": DELIVERY_ENTRY_POINTS,
+        "bounds_margin": BOUNDS_MARGIN,
+        "entry_highways": sorted(ENTRY_HIGHWAYS)
+    }
+
+def routes_key(network: RoadNetwork, polygon: Optional[Dict[str, Any]], waiting_areas: Optional[List[Dict[str, Any]]]) -> str:
+    """Hash of everything the routes of a project depend on"""
+    payload = json.dumps(
+        {
+            "network_version": network.version,
+            "polygon": polygon,
+            "waiting_areas": waiting_areas or [],
+            "routing": routing_parameters()
+        },
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+def _travel_times(network: RoadNetwork) -> np.ndarray:
+    """Travel time per edge in seconds"""
+    speed = np.asarray(network.speed_kph, dtype=np.float64)
+    speed = np.where(speed > 0, speed, DEFAULT_SPEED_KPH)
+    return np.asarray(network.length_m, dtype=np.float64) / (speed / 3.6)
+
+def _shortest_path_tree(
+    n_nodes: int,
+    tails: np.ndarray,
+    heads: np.ndarray,
+    cost: np.ndarray,
+    source: int
+) -> np.ndarray:
+    """
+    Dijkstra from one node over edges tails[i] -> heads[i].
+
+    Returns:
+        Per node the edge position it is reached over (-1 for the source and unreachable nodes)
+    """
+    order = np.argsort(tails, kind="stable")
+    indptr = np.searchsorted(tails[order], np.arange(n_nodes + 1))
+    order = order.tolist()
+    indptr = indptr.tolist()
+    heads = heads.tolist()
+    cost = cost.tolist()
+
+    dist = [float("inf")] * n_nodes
+    pred = [-1] * n_nodes
+    dist[source] = 0.0
+    heap = [(0.0, source)]
+    while heap:
+        d, node = heapq.heappop(heap)
+        if d > dist[node]:
+            continue
+        for k in range(indptr[node], indptr[node + 1]):
+            edge = order[k]
+            head = heads[edge]
+            candidate = d + cost[edge]
+            if candidate < dist[head]:
+                dist[head] = candidate
+                pred[head] = edge
+                heapq.heappush(heap, (candidate, head))
+
+    return np.array(pred, dtype=np.int64)
+
+def _node_coordinates(network: RoadNetwork, u_idx: np.ndarray, v_idx: np.ndarray, n_nodes: int) -> np.ndarray:
+    """lon/lat per dense node index, from the first and last vertex of the edges"""
+    coords = np.asarray(network.coords)
+    offsets = np.asarray(network.offsets)
+    xy = np.zeros((n_nodes, 2), dtype=np.float64)
+    xy[u_idx] = coords[offsets[:-1]]
+    xy[v_idx] = coords[offsets[1:] - 1]
+    return xy
+
+def _boundary_nodes(network: RoadNetwork, xy: np.ndarray, u_idx: np.ndarray, v_idx: np.ndarray) -> np.ndarray:
+    """Dense indices of the nodes at the edge of the map bounds, preferring ENTRY_HIGHWAYS"""
+    west, south, east, north = network.bounds
+    margin_x = (east - west) * BOUNDS_MARGIN
+    margin_y = (north - south) * BOUNDS_MARGIN
+    near_edge = (
+        (xy[:, 0] <= west + margin_x) | (xy[:, 0] >= east - margin_x)
+        | (xy[:, 1] <= south + margin_y) | (xy[:, 1] >= north - margin_y)
+    )
+
+    major = np.zeros(len(xy), dtype=bool)
+    is_major = np.isin(np.asarray(network.highway), list(ENTRY_HIGHWAYS))
+    major[u_idx[is_major]] = True
+    major[v_idx[is_major]] = True
+
+    nodes = np.flatnonzero(near_edge & major)
+    return nodes if len(nodes) else np.flatnonzero(near_edge)
+
+def _geometry(geojson: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """GeoJSON geometry of a geometry or Feature"""
+    if geojson and geojson.get("type") == "Feature":
+        return geojson.get("geometry")
+    return geojson
+
+def _nearest_node(xy: np.ndarray, geometry) -> int:
+    """Dense index of the node closest to a geometry"""
+    return int(np.argmin(shapely.distance(shapely.points(xy), geometry)))
+
+def _walk(pred: np.ndarray, node: int, target: int, next_node: np.ndarray) -> Optional[List[int]]:
+    """Edge positions from node along a shortest path tree to its root (None if unreachable)"""
+    edges = []
+    while node != target:
+        edge = int(pred[node])
+        if edge < 0:
+            return None
+        edges.append(edge)
+        node = int(next_node[edge])
+    return edges
+
+def compute_delivery_routes(
+    network: RoadNetwork,
+    polygon: Optional[Dict[str, Any]],
+    waiting_areas: Optional[List[Dict[str, Any]]]
+) -> Optional[DeliveryRoutes]:
+    """
+    Route trucks over the road graph between the entry points and the site.
+
+    Edges are weighted by travel time. One Dijkstra on the reversed graph gives the
+    inbound paths of all entry points, one on the graph the outbound paths.
+
+    Args:
+        network: Road network of the project
+        polygon: GeoJSON polygon of the construction site
+        waiting_areas: GeoJSON geometries of the waiting areas
+
+    Returns:
+        The routes, or None without a site, entry points or any path
+    """
+    polygon = _geometry(polygon)
+    if len(network) == 0 or not polygon or not polygon.get("coordinates"):
+        return None
+
+    nodes, inverse = np.unique(np.concatenate([network.u, network.v]), return_inverse=True)
+    u_idx, v_idx = inverse[:len(network)], inverse[len(network):]
+    xy = _node_coordinates(network, u_idx, v_idx, len(nodes))
+    site = _nearest_node(xy, shape(polygon))
+
+    entries = []
+    if "bounds" in DELIVERY_ENTRY_POINTS:
+        entries.extend(_boundary_nodes(network, xy, u_idx, v_idx).tolist())
+    if "waiting_areas" in DELIVERY_ENTRY_POINTS:
+        for area in waiting_areas or []:
+            try:
+                entries.append(_nearest_node(xy, shape(_geometry(area)).centroid))
+            except Exception as e:
+                print(f"Error locating waiting area: {str(e)}")
+    entries = [node for node in dict.fromkeys(entries) if node != site]
+    if not entries:
+        return None
+
+    cost = _travel_times(network)
+    to_site = _shortest_path_tree(len(nodes), v_idx, u_idx, cost, site)
+    from_site = _shortest_path_tree(len(nodes), u_idx, v_idx, cost, site)
+
+    paths = []
+    inbound, outbound = [], []
+    for node in entries:
+        path = _walk(to_site, node, site, v_idx)
+        if path is not None:
+            paths.append(path)
+            inbound.append(node)
+    for node in entries:
+        path = _walk(from_site, node, site, u_idx)
+        if path is not None:
+            paths.append(path[::-1])
+            outbound.append(node)
+    if not paths:
+        return None
+
+    return DeliveryRoutes(
+        network_version=network.version,
+        site_node=int(nodes[site]),
+        inbound_entries=nodes[inbound].astype(np.int64),
+        outbound_entries=nodes[outbound].astype(np.int64),
+        path_offsets=np.concatenate([[0], np.cumsum([len(p) for p in paths])]).astype(np.int64),
+        path_edges=np.array([edge for path in paths for edge in path], dtype=np.int64)
+    )
+
+def _routes_path(network: RoadNetwork, key: str) -> str:
+    """Routes file in the network's store directory"""
+    return os.path.join(network_store.STORE_DIR, network.key, f"{ROUTES_FILE_PREFIX}{key}.npz")
+
+def _save_routes(path: str, routes: DeliveryRoutes) -> None:
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            network_version=np.array(routes.network_version),
+            site_node=np.array(routes.site_node),
+            inbound_entries=routes.inbound_entries,
+            outbound_entries=routes.outbound_entries,
+            path_offsets=routes.path_offsets,
+            path_edges=routes.path_edges
+        )
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Error saving delivery routes: {str(e)}")
+
+def _load_routes(path: str) -> Optional[DeliveryRoutes]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            return DeliveryRoutes(
+                network_version=str(data["network_version"]),
+                site_node=int(data["site_node"]),
+                inbound_entries=data["inbound_entries"],
+                outbound_entries=data["outbound_entries"],
+                path_offsets=data["path_offsets"],
+                path_edges=data["path_edges"]
+            )
+    except Exception as e:
+        print(f"Error loading delivery routes: {str(e)}")
+        return None
+
+def get_delivery_routes(
+    network: RoadNetwork,
+    polygon: Optional[Dict[str, Any]],
+    waiting_areas: Optional[List[Dict[str, Any]]]
+) -> Optional[DeliveryRoutes]:
+    """
+    Routes of a project, computed once per network and project geometry.
+
+    Kept in memory and next to the network in the store, so they survive restarts
+    and are shared by the API and the dashboard.
+    """
+    key = routes_key(network, polygon, waiting_areas)
+    with _LOCK:
+        if key in _ROUTES:
+            return _ROUTES[key]
+
+    path = _routes_path(network, key)
+    routes = _load_routes(path)
+    if routes is None:
+        routes = compute_delivery_routes(network, polygon, waiting_areas)
+        if routes is not None:
+            _save_routes(path, routes)
+
+    with _LOCK:
+        _ROUTES[key] = routes
+    return routes
+
+def get_delivery_share(
+    network: RoadNetwork,
+    polygon: Optional[Dict[str, Any]],
+    waiting_areas: Optional[List[Dict[str, Any]]]
+) -> Optional[np.ndarray]:
+    """Trips per edge and delivery in network edge order (None if the site cannot be routed to)"""
+    routes = get_delivery_routes(network, polygon, waiting_areas)
+    if routes is None:
+        return None
+    return routes.edge_share(len(network))
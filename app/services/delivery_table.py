@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, replace
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.waiting_queue import DayTrucks, unloading_minutes
+
+# Vehicle type of deliveries without a VehicleType
+UNKNOWN_VEHICLE_TYPE = "unknown"
+
+# Delivery time windows like "08:00-10:00" (spaces around the dash allowed)
+TIME_WINDOW_PATTERN = r"(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})"
+
+@dataclass
+class DeliveryTable:
+    """
+    Deliveries of a project parsed once into aligned arrays, grouped by date.
+
+    Rows are sorted by date; the deliveries of dates[i] are the rows
+    offsets[i]:offsets[i + 1]. Deliveries without a valid date or time window are
+    left out.
+    """
+    dates: np.ndarray          # datetime64[D], sorted unique delivery dates
+    offsets: np.ndarray        # int64 (D + 1)
+    start_minute: np.ndarray   # int32, window start (minutes after midnight)
+    end_minute: np.ndarray     # int32, window end (minutes after midnight)
+    vehicle_type: np.ndarray   # int32 codes into vehicle_types
+    vehicle_types: List[str]
+    unloading: np.ndarray      # float64, mean unloading minutes (see waiting_queue)
+
+    def __len__(self) -> int:
+        return len(self.start_minute)
+
+    def day_index(self, day: date) -> Optional[int]:
+        """Position of a date in dates (None if there are no deliveries on it)"""
+        position = int(np.searchsorted(self.dates, np.datetime64(day, "D")))
+        if position < len(self.dates) and self.dates[position] == np.datetime64(day, "D"):
+            return position
+        return None
+
+    def day_rows(self, day: date) -> slice:
+        """Rows of the deliveries on a date (empty if there are none)"""
+        position = self.day_index(day)
+        if position is None:
+            return slice(0, 0)
+        return slice(int(self.offsets[position]), int(self.offsets[position + 1]))
+
+    def day_trucks(self, day: date) -> DayTrucks:
+        """Deliveries of a date as input of the waiting area queue"""
+        rows = self.day_rows(day)
+        return DayTrucks(
+            window_start=self.start_minute[rows].astype(np.float64),
+            window_end=self.end_minute[rows].astype(np.float64),
+            unloading=self.unloading[rows]
+        )
+
+    def day_key(self, day: date) -> Dict[str, Any]:
+        """Everything the model uses of a date's deliveries (part of the day fingerprint)"""
+        rows = self.day_rows(day)
+        return {
+            "start": self.start_minute[rows].tolist(),
+            "end": self.end_minute[rows].tolist(),
+            "vehicle_type": [self.vehicle_types[code] for code in self.vehicle_type[rows]],
+            "unloading": self.unloading[rows].tolist()
+        }
+
+def build_delivery_table(deliveries: pd.DataFrame, vehicles: Optional[pd.DataFrame] = None) -> DeliveryTable:
+    """
+    Parse the Deliveries sheet: Date, TimeWindow ("HH:MM-HH:MM") and optional VehicleType.
+
+    Args:
+        deliveries: Deliveries sheet
+        vehicles: Vehicles sheet, for the unloading time per vehicle type
+
+    Returns:
+        DeliveryTable sorted by date
+    """
+    days = pd.to_datetime(deliveries["Date"], errors="coerce").to_numpy(dtype="datetime64[D]")
+    parts = deliveries["TimeWindow"].astype(str).str.extract(TIME_WINDOW_PATTERN).astype(float).to_numpy()
+    valid = ~np.isnat(days) & ~np.isnan(parts).any(axis=1)
+
+    if "VehicleType" in deliveries.columns:
+        types = deliveries["VehicleType"].fillna(UNKNOWN_VEHICLE_TYPE).astype(str).str.strip()
+    else:
+        types = pd.Series(UNKNOWN_VEHICLE_TYPE, index=deliveries.index)
+    codes, vehicle_types = pd.factorize(types[valid], sort=True)
+
+    order = np.argsort(days[valid], kind="stable")
+    sorted_days = days[valid][order]
+    dates, first_rows = np.unique(sorted_days, return_index=True)
+    parts = parts[valid][order]
+
+    return DeliveryTable(
+        dates=dates,
+        offsets=np.append(first_rows, len(sorted_days)).astype(np.int64),
+        start_minute=(parts[:, 0] * 60 + parts[:, 1]).astype(np.int32),
+        end_minute=(parts[:, 2] * 60 + parts[:, 3]).astype(np.int32),
+        vehicle_type=codes[order].astype(np.int32),
+        vehicle_types=list(vehicle_types),
+        unloading=unloading_minutes(deliveries[valid], vehicles)[order]
+    )
+
+def step_counts(table: DeliveryTable, first_minute: int, interval_minutes: int, n_steps: int) -> np.ndarray:
+    """
+    Deliveries active in each step of each date, per vehicle type, in one pass.
+
+    A delivery counts in every step from the one containing its window start to the
+    one containing its window end, so on an hourly grid a window "08:00-10:00" counts
+    in hours 8, 9 and 10. Each delivery adds +1 at its first step and -1 after its
+    last step; one bincount over all dates and a cumulative sum give the counts.
+
+    Args:
+        table: Parsed deliveries
+        first_minute: Start of the first step (minutes after midnight)
+        interval_minutes: Length of a step
+        n_steps: Number of steps per day (T)
+
+    Returns:
+        int64 array shaped (D, T, V), aligned with table.dates and table.vehicle_types
+    """
+    n_dates, n_types = len(table.dates), len(table.vehicle_types)
+    first = np.floor_divide(table.start_minute - first_minute, interval_minutes)
+    last = np.floor_divide(table.end_minute - first_minute, interval_minutes)
+    active = (last >= 0) & (first < n_steps) & (first <= last)
+
+    day = np.repeat(np.arange(n_dates), np.diff(table.offsets))[active]
+    vehicle = table.vehicle_type[active]
+    first = np.clip(first[active], 0, n_steps)
+    stop = np.clip(last[active] + 1, 0, n_steps)
+
+    # Flat index into a (D, T + 1, V) difference array
+    size = n_dates * (n_steps + 1) * n_types
+    starts = np.bincount((day * (n_steps + 1) + first) * n_types + vehicle, minlength=size)
+    stops = np.bincount((day * (n_steps + 1) + stop) * n_types + vehicle, minlength=size)
+    change = (starts - stops).reshape(n_dates, n_steps + 1, n_types)
+    return np.cumsum(change, axis=1)[:, :n_steps]
+
+def bucket_counts(table: DeliveryTable, first_minute: int, end_minute: int) -> Tuple[np.ndarray, int, np.ndarray]:
+    """
+    Distinct deliveries of each date within the simulated span, per date and per clock hour.
+
+    Unlike step_counts summed over steps, every delivery counts once for its date and
+    once in each clock hour its window overlaps, so the counts can be added up over
+    dates but not over hours. Windows are clipped to the span [first_minute,
+    end_minute) and keep the inclusive end of step_counts; a delivery counts for its
+    date if it is active in any simulated step.
+
+    Args:
+        table: Parsed deliveries
+        first_minute: Start of the first simulated step (minutes after midnight)
+        end_minute: End of the last simulated step
+
+    Returns:
+        Tuple (int64 (D,) deliveries per date, first clock hour of the span, int64
+        (D, H) deliveries per date and clock hour), aligned with table.dates
+    """
+    first_hour = first_minute // 60
+    n_hours = -(-end_minute // 60) - first_hour
+    clipped = replace(
+        table,
+        start_minute=np.maximum(table.start_minute, first_minute),
+        end_minute=np.minimum(table.end_minute, end_minute - 1)
+    )
+    hours = step_counts(clipped, first_hour * 60, 60, n_hours).sum(axis=2)
+    days = step_counts(table, first_minute, end_minute - first_minute, 1)[:, 0].sum(axis=1)
+    return days, first_hour, hours
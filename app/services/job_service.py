@@ -0,0 +1,193 @@
+import os
+import queue
+import itertools
+import threading
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from app.models.simulation import SimulationRequest, SimulationJob
+from app.services.simulation_service import run_simulation, SimulationCancelled
+
+# Number of worker threads executing simulation jobs
+JOB_WORKERS = int(os.getenv("SIMULATION_JOB_WORKERS", "2"))
+
+# Priority lanes: interactive single-day runs are picked up before batch ranges
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+ACTIVE_STATUSES = {"queued", "running"}
+
+# Finished, failed and cancelled jobs are kept for this many seconds, and at most
+# this many of them (oldest dropped first)
+JOB_RETENTION_SECONDS = int(os.getenv("SIMULATION_JOB_RETENTION_SECONDS", "86400"))
+MAX_FINISHED_JOBS = int(os.getenv("SIMULATION_MAX_FINISHED_JOBS", "500"))
+
+# In-memory job registry, in creation order
+# Dictionary: job_id -> SimulationJob
+JOBS = {}
+
+# Queued and running jobs by request, for deduplication
+# Dictionary: _request_key -> job_id
+_ACTIVE_JOBS = {}
+
+# Cancellation flags of queued and running jobs
+# Dictionary: job_id -> threading.Event
+_CANCEL_EVENTS = {}
+
+# Queue entries: (priority, sequence number, job_id); the sequence keeps FIFO order within a lane
+_QUEUE = queue.PriorityQueue()
+_SEQUENCE = itertools.count()
+_LOCK = threading.Lock()
+_WORKERS = []
+
+def _request_key(request: SimulationRequest) -> tuple:
+    """Key under which identical requests are deduplicated"""
+    return (request.project_id, request.start_date, request.end_date, request.time_interval, request.n_samples)
+
+def _finish(job: SimulationJob) -> None:
+    """Drop a job that reached a final status from the active jobs (caller holds _LOCK)"""
+    key = _request_key(job.request)
+    if _ACTIVE_JOBS.get(key) == job.id:
+        del _ACTIVE_JOBS[key]
+
+def _prune_jobs() -> None:
+    """Evict finished jobs past their retention or beyond MAX_FINISHED_JOBS (caller holds _LOCK)"""
+    now = datetime.now()
+    kept = []
+    for job in [job for job in JOBS.values() if job.status not in ACTIVE_STATUSES]:
+        if job.finished_at is not None and (now - job.finished_at).total_seconds() > JOB_RETENTION_SECONDS:
+            del JOBS[job.id]
+        else:
+            kept.append(job)
+    for job in kept[:max(0, len(kept) - MAX_FINISHED_JOBS)]:
+        del JOBS[job.id]
+
+def _ensure_workers() -> None:
+    """Start the worker threads on first use"""
+    if _WORKERS:
+        return
+    for i in range(max(1, JOB_WORKERS)):
+        worker = threading.Thread(target=_worker_loop, name=f"simulation-worker-{i}", daemon=True)
+        worker.start()
+        _WORKERS.append(worker)
+
+def submit_job(request: SimulationRequest) -> SimulationJob:
+    """
+    Queue a simulation run and return immediately.
+
+    If an identical request for the project is already queued or running, the
+    existing job is returned instead of starting a second one. Finished jobs are
+    kept for JOB_RETENTION_SECONDS (at most MAX_FINISHED_JOBS of them).
+
+    Args:
+        request: SimulationRequest with simulation parameters
+
+    Returns:
+        The new or the already active SimulationJob
+
+    Raises:
+        ValueError: If the date range is invalid
+    """
+    if request.end_date < request.start_date:
+        raise ValueError("End date must be after start date")
+
+    with _LOCK:
+        key = _request_key(request)
+        active = JOBS.get(_ACTIVE_JOBS.get(key))
+        if active is not None and active.status in ACTIVE_STATUSES:
+            return active
+        _prune_jobs()
+
+        days_total = (request.end_date - request.start_date).days + 1
+        job = SimulationJob(
+            project_id=request.project_id,
+            request=request,
+            priority=PRIORITY_INTERACTIVE if days_total == 1 else PRIORITY_BATCH,
+            days_total=days_total
+        )
+        JOBS[job.id] = job
+        _ACTIVE_JOBS[key] = job.id
+        _CANCEL_EVENTS[job.id] = threading.Event()
+        _QUEUE.put((job.priority, next(_SEQUENCE), job.id))
+        _ensure_workers()
+
+    return job
+
+def get_job(job_id: str) -> Optional[SimulationJob]:
+    """Get a job by ID"""
+    return JOBS.get(job_id)
+
+def get_jobs(project_id: Optional[str] = None) -> List[SimulationJob]:
+    """Get all retained jobs, newest first, optionally filtered by project"""
+    with _LOCK:
+        _prune_jobs()
+        jobs = [job for job in JOBS.values() if project_id is None or job.project_id == project_id]
+    return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+def cancel_job(job_id: str) -> Optional[SimulationJob]:
+    """
+    Cancel a queued or running job.
+
+    A running job stops before its next day; results of finished days are kept.
+
+    Returns:
+        The job, or None if not found
+    """
+    with _LOCK:
+        job = JOBS.get(job_id)
+        if job is None:
+            return None
+
+        if job.status == "queued":
+            # Never started, the worker skips it when dequeued
+            job.status = "cancelled"
+            job.finished_at = datetime.now()
+            _finish(job)
+
+        event = _CANCEL_EVENTS.get(job_id)
+        if event is not None:
+            event.set()
+
+    return job
+
+def _worker_loop() -> None:
+    """Take jobs from the priority queue and run them, forever"""
+    while True:
+        _, _, job_id = _QUEUE.get()
+        try:
+            _run_job(job_id)
+        except Exception as e:
+            print(f"Error in simulation worker: {str(e)}")
+        finally:
+            _QUEUE.task_done()
+
+def _run_job(job_id: str) -> None:
+    """Run one job, updating its progress after each simulated day"""
+    with _LOCK:
+        job = JOBS.get(job_id)
+        if job is None or job.status != "queued":
+            _CANCEL_EVENTS.pop(job_id, None)
+            return
+        job.status = "running"
+        job.started_at = datetime.now()
+        cancel_event = _CANCEL_EVENTS[job_id]
+
+    def day_complete(current_date: date, n_steps: int) -> None:
+        job.days_completed += 1
+        if n_steps:
+            job.completed_dates.append(current_date)
+
+    try:
+        run_simulation(job.request, on_day_complete=day_complete, cancel_event=cancel_event)
+        job.status = "completed"
+    except SimulationCancelled:
+        job.status = "cancelled"
+    except Exception as e:
+        print(f"Error running simulation job {job_id}: {str(e)}")
+        job.status = "failed"
+        job.error = str(e)
+    finally:
+        job.finished_at = datetime.now()
+        with _LOCK:
+            _CANCEL_EVENTS.pop(job_id, None)
+            _finish(job)
@@ -0,0 +1,192 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from shapely.geometry import shape
+from typing import Dict, List, Any, Optional
+
+from app.models.project import Project
+
+# Capacity (vehicles per hour) per OSM highway type, shared with the dashboard model
+CAPACITY_MAP = {
+    'motorway': 2000, 'trunk': 1800, 'primary': 1500,
+    'secondary': 1000, 'tertiary': 700,
+    'motorway_link': 1000, 'trunk_link': 900, 'primary_link': 750,
+    'secondary_link': 500, 'tertiary_link': 350,
+    'residential': 400, 'unclassified': 300, 'road': 300,
+    'living_street': 100, 'service': 150, 'track': 50, 'path': 30,
+    'cycleway': 50, 'footway': 20, 'pedestrian': 20, 'steps': 10
+}
+DEFAULT_CAPACITY = 200
+
+# Feature table file of a project; projects can share a directory (same name)
+FEATURES_FILE_NAME = "network_features_{project_id}.npz"
+
+# Columns persisted in the feature table, in file order
+TEXT_COLUMNS = ["segment_id", "start_node", "end_node", "capacity_class"]
+NUMERIC_COLUMNS = ["length_m", "speed_kph", "site_distance_m", "waiting_area_distance_m", "capacity"]
+FEATURE_COLUMNS = TEXT_COLUMNS + NUMERIC_COLUMNS
+
+def network_version(edges: gpd.GeoDataFrame) -> str:
+    """Content hash of an edge GeoDataFrame (edge keys and geometry coordinates)."""
+    digest = hashlib.sha1()
+    digest.update(np.asarray(edges.index.to_flat_index().astype(str)).astype("U").tobytes())
+    for geom in edges.geometry:
+        digest.update(np.asarray(geom.coords, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+def project_geometry_key(project: Project) -> str:
+    """Hash of the project geometry the feature table depends on."""
+    payload = json.dumps(
+        {
+            "polygon": project.polygon,
+            "waiting_areas": project.waiting_areas,
+            "map_bounds": project.map_bounds
+        },
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+def features_path(project: Project) -> str:
+    """Location of the feature table, next to the project's uploaded file."""
+    return os.path.join(os.path.dirname(project.file_path), FEATURES_FILE_NAME.format(project_id=project.id))
+
+def _highway_class(value: Any) -> str:
+    """Normalize an OSM highway tag (which may be a list) to a single class."""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return "unknown"
+    return str(value)
+
+def _to_geometry(geojson: Dict[str, Any]):
+    """Convert a GeoJSON geometry or Feature to a shapely geometry."""
+    if geojson.get("type") == "Feature":
+        geojson = geojson["geometry"]
+    return shape(geojson)
+
+def build_feature_table(
+    edges: gpd.GeoDataFrame,
+    polygon: Dict[str, Any],
+    waiting_areas: List[Dict[str, Any]]
+) -> pd.DataFrame:
+    """
+    Build the per-edge feature table in a projected (metric) CRS.
+
+    Args:
+        edges: Edge GeoDataFrame as returned by ox.graph_to_gdfs, indexed by (u, v, key)
+        polygon: GeoJSON polygon of the construction site
+        waiting_areas: GeoJSON geometries of the waiting areas
+
+    Returns:
+        DataFrame with one row per edge, in the order of the GeoDataFrame
+    """
+    metric_crs = edges.estimate_utm_crs()
+    edges_metric = edges.to_crs(metric_crs)
+
+    site = gpd.GeoSeries([_to_geometry(polygon)], crs="EPSG:4326").to_crs(metric_crs).iloc[0]
+    site_distance = edges_metric.geometry.distance(site).to_numpy(dtype=np.float64)
+
+    # Distance to the closest waiting area (inf if the project has none)
+    waiting_area_distance = np.full(len(edges), np.inf)
+    if waiting_areas:
+        areas = gpd.GeoSeries([_to_geometry(a) for a in waiting_areas], crs="EPSG:4326").to_crs(metric_crs)
+        for area in areas:
+            waiting_area_distance = np.minimum(
+                waiting_area_distance,
+                edges_metric.geometry.distance(area).to_numpy(dtype=np.float64)
+            )
+
+    if "highway" in edges.columns:
+        capacity_class = [_highway_class(h) for h in edges["highway"]]
+    else:
+        capacity_class = ["unknown"] * len(edges)
+
+    if "speed_kph" in edges.columns:
+        speed_kph = pd.to_numeric(edges["speed_kph"], errors="coerce").fillna(50).to_numpy(dtype=np.float64)
+    else:
+        speed_kph = np.full(len(edges), 50.0)
+
+    u_values = edges.index.get_level_values(0)
+    v_values = edges.index.get_level_values(1)
+
+    return pd.DataFrame({
+        "segment_id": [f"{u}_{v}" for u, v in zip(u_values, v_values)],
+        "start_node": [str(u) for u in u_values],
+        "end_node": [str(v) for v in v_values],
+        "capacity_class": capacity_class,
+        "length_m": edges_metric.geometry.length.to_numpy(dtype=np.float64),
+        "speed_kph": speed_kph,
+        "site_distance_m": site_distance,
+        "waiting_area_distance_m": waiting_area_distance,
+        "capacity": np.array([CAPACITY_MAP.get(c, DEFAULT_CAPACITY) for c in capacity_class], dtype=np.float64)
+    })
+
+def save_feature_table(project: Project, features: pd.DataFrame, net_version: str) -> None:
+    """Persist the feature table next to the project, stamped with its input hashes."""
+    try:
+        path = features_path(project)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        columns = {col: np.asarray(features[col].astype(str), dtype=str) for col in TEXT_COLUMNS}
+        columns.update({col: features[col].to_numpy(dtype=np.float64) for col in NUMERIC_COLUMNS})
+        np.savez(
+            path,
+            geometry_key=np.array(project_geometry_key(project)),
+            network_version=np.array(net_version),
+            **columns
+        )
+    except Exception as e:
+        print(f"Error saving network features: {str(e)}")
+
+def load_feature_table(project: Project, net_version: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """
+    Load the persisted feature table of a project.
+
+    Args:
+        project: The project
+        net_version: If given, the table is only returned if it was built for this network
+
+    Returns:
+        The feature table, or None if missing or stale
+    """
+    path = features_path(project)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if str(data["geometry_key"]) != project_geometry_key(project):
+                return None
+            if net_version is not None and str(data["network_version"]) != net_version:
+                return None
+            return pd.DataFrame({col: data[col] for col in FEATURE_COLUMNS})
+    except Exception as e:
+        print(f"Error loading network features: {str(e)}")
+        return None
+
+def get_feature_table(
+    project: Project,
+    edges: gpd.GeoDataFrame,
+    net_version: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Return the feature table for a project's network, building and persisting it if stale.
+
+    The table is rebuilt only when the polygon, waiting areas, map bounds or the
+    network itself change.
+
+    Args:
+        project: The project
+        edges: Edge GeoDataFrame of the project's network
+        net_version: Version of the network (computed from the edges if not given)
+    """
+    if net_version is None:
+        net_version = network_version(edges)
+    features = load_feature_table(project, net_version)
+    if features is None or len(features) != len(edges):
+        features = build_feature_table(edges, project.polygon, project.waiting_areas)
+        save_feature_table(project, features, net_version)
+    return features
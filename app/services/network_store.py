@@ -0,0 +1,515 @@
+import os
+import json
+import glob
+import hashlib
+import time
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+from filelock import FileLock
+
+from app.services.network_features import CAPACITY_MAP, DEFAULT_CAPACITY
+
+# Compiled networks: one directory of .npy arrays per normalized bounds
+STORE_DIR = "data/prepared/network_store"
+
+# Raw Overpass responses written by OSMnx's HTTP cache
+OVERPASS_CACHE_DIR = "cache"
+
+# Per-project GeoPackages written by earlier dashboard versions
+LEGACY_GPKG_DIR = "data/prepared/osm_cache"
+
+# When set, a store miss never falls back to downloading from OpenStreetMap
+OFFLINE = os.getenv("NETWORK_STORE_OFFLINE", "false").lower() == "true"
+
+# Decimal places used to normalize bounds (~1 m)
+BOUNDS_PRECISION = 5
+
+# Highway types excluded from the drivable network (mirrors OSMnx "drive_service")
+EXCLUDED_HIGHWAYS = {
+    'abandoned', 'bridleway', 'bus_guideway', 'construction', 'corridor', 'cycleway',
+    'elevator', 'escalator', 'footway', 'path', 'pedestrian', 'planned', 'platform',
+    'proposed', 'raceway', 'steps', 'track'
+}
+EXCLUDED_SERVICE = {'emergency_access', 'parking', 'parking_aisle', 'private'}
+
+DEFAULT_SPEED_KPH = 50.0
+
+# Seconds a failed lookup is remembered before the sources are searched again
+MISS_RETRY_SECONDS = float(os.getenv("NETWORK_STORE_MISS_RETRY_SECONDS", "300"))
+
+# In-process cache: store key -> RoadNetwork
+NETWORKS = {}
+
+# Remembered misses: store key -> (monotonic time of the lookup, whether it tried a download)
+MISSES = {}
+
+@dataclass
+class RoadNetwork:
+    """Drivable road network with edge attributes and geometries as flat arrays."""
+    key: str
+    version: str
+    bounds: Tuple[float, float, float, float]  # (west, south, east, north)
+    u: np.ndarray            # int64 start node id per edge
+    v: np.ndarray            # int64 end node id per edge
+    edge_key: np.ndarray     # int64 parallel-edge key per edge
+    osmid: np.ndarray        # str, OSM way id per edge
+    highway: np.ndarray      # str
+    name: np.ndarray         # str
+    length_m: np.ndarray     # float64
+    speed_kph: np.ndarray    # float64
+    coords: np.ndarray       # float64 (M, 2) lon/lat of all edge vertices
+    offsets: np.ndarray      # int64 (E + 1), edge i spans coords[offsets[i]:offsets[i + 1]]
+
+    def __len__(self) -> int:
+        return len(self.u)
+
+    def geometries(self) -> np.ndarray:
+        """Shapely LineStrings of all edges, built in one vectorized call."""
+        counts = np.diff(self.offsets)
+        indices = np.repeat(np.arange(len(self)), counts)
+        return shapely.linestrings(np.asarray(self.coords), indices=indices)
+
+    def to_edges_gdf(self) -> gpd.GeoDataFrame:
+        """Edge GeoDataFrame in the layout of ox.graph_to_gdfs, indexed by (u, v, key)."""
+        index = pd.MultiIndex.from_arrays(
+            [np.asarray(self.u), np.asarray(self.v), np.asarray(self.edge_key)],
+            names=["u", "v", "key"]
+        )
+        return gpd.GeoDataFrame(
+            {
+                "osmid": np.asarray(self.osmid),
+                "highway": np.asarray(self.highway),
+                "name": np.asarray(self.name),
+                "length": np.asarray(self.length_m),
+                "speed_kph": np.asarray(self.speed_kph)
+            },
+            geometry=self.geometries(),
+            index=index,
+            crs="EPSG:4326"
+        )
+
+    def to_segments(self) -> List[Dict[str, Any]]:
+        """Segment dictionaries as used by the dashboard (coordinates as [[lon, lat], ...])."""
+        coords = np.asarray(self.coords).tolist()
+        offsets = np.asarray(self.offsets).tolist()
+        return [
+            {
+                'segment_id': str(self.osmid[i]),
+                'coordinates': coords[offsets[i]:offsets[i + 1]],
+                'name': str(self.name[i]),
+                'highway_type': str(self.highway[i]),
+                'length': float(self.length_m[i]),
+                'capacity': int(CAPACITY_MAP.get(str(self.highway[i]), DEFAULT_CAPACITY))
+            }
+            for i in range(len(self))
+        ]
+
+_ARRAY_FIELDS = ["u", "v", "edge_key", "osmid", "highway", "name", "length_m", "speed_kph", "coords", "offsets"]
+
+def normalize_bounds(map_bounds: Dict[str, Any]) -> Tuple[float, float, float, float]:
+    """
+    Normalize a GeoJSON bounds polygon to a rounded (west, south, east, north) tuple.
+
+    Uses min/max over all ring coordinates, so the result does not depend on the
+    vertex order of the drawn rectangle.
+    """
+    ring = np.asarray(map_bounds["coordinates"][0], dtype=np.float64)
+    west, south = ring.min(axis=0)
+    east, north = ring.max(axis=0)
+    return tuple(round(float(x), BOUNDS_PRECISION) for x in (west, south, east, north))
+
+def bounds_key(bounds: Tuple[float, float, float, float]) -> str:
+    """Store key for normalized bounds."""
+    bounds_str = "_".join(f"{x:.{BOUNDS_PRECISION}f}" for x in bounds)
+    return "net_" + hashlib.sha1(bounds_str.encode()).hexdigest()[:16]
+
+def _network_dir(key: str) -> str:
+    return os.path.join(STORE_DIR, key)
+
+def _haversine_m(lon1, lat1, lon2, lat2) -> np.ndarray:
+    """Great-circle distance in metres, vectorized."""
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371009.0 * np.arcsin(np.sqrt(a))
+
+def _polyline_lengths(coords: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Length in metres of each edge polyline."""
+    if len(coords) < 2:
+        return np.zeros(len(offsets) - 1)
+    seg = _haversine_m(coords[:-1, 0], coords[:-1, 1], coords[1:, 0], coords[1:, 1])
+    # Zero out the pseudo-segments that bridge two consecutive edges
+    seg[offsets[1:-1] - 1] = 0.0
+    cum = np.concatenate([[0.0], np.cumsum(seg)])
+    return cum[offsets[1:] - 1] - cum[offsets[:-1]]
+
+def _network_version(u, v, edge_key, coords) -> str:
+    digest = hashlib.sha1()
+    for arr in (u, v, edge_key, coords):
+        digest.update(np.ascontiguousarray(arr).tobytes())
+    return digest.hexdigest()
+
+def _assemble(
+    key: str,
+    bounds: Tuple[float, float, float, float],
+    edges: List[Dict[str, Any]],
+    truncate: bool = True
+) -> RoadNetwork:
+    """
+    Build a RoadNetwork from a list of edge records (u, v, osmid, highway, name, speed_kph, coords).
+
+    With truncate, only edges with at least one vertex inside the bounds are kept
+    (like OSMnx's truncate_by_edge).
+    """
+    west, south, east, north = bounds
+
+    kept = []
+    for edge in edges:
+        pts = edge["coords"]
+        if len(pts) < 2:
+            continue
+        inside = (pts[:, 0] >= west) & (pts[:, 0] <= east) & (pts[:, 1] >= south) & (pts[:, 1] <= north)
+        if not truncate or inside.any():
+            kept.append(edge)
+
+    # Parallel-edge keys, as in an OSMnx MultiDiGraph
+    seen = {}
+    edge_key = []
+    for edge in kept:
+        pair = (edge["u"], edge["v"])
+        edge_key.append(seen.get(pair, 0))
+        seen[pair] = seen.get(pair, 0) + 1
+
+    counts = np.array([len(edge["coords"]) for edge in kept], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    coords = np.concatenate([edge["coords"] for edge in kept]) if kept else np.zeros((0, 2))
+    u = np.array([edge["u"] for edge in kept], dtype=np.int64)
+    v = np.array([edge["v"] for edge in kept], dtype=np.int64)
+    edge_key = np.array(edge_key, dtype=np.int64)
+
+    return RoadNetwork(
+        key=key,
+        version=_network_version(u, v, edge_key, coords),
+        bounds=bounds,
+        u=u,
+        v=v,
+        edge_key=edge_key,
+        osmid=np.array([str(edge["osmid"]) for edge in kept], dtype=str),
+        highway=np.array([edge["highway"] for edge in kept], dtype=str),
+        name=np.array([edge["name"] for edge in kept], dtype=str),
+        length_m=_polyline_lengths(coords, offsets),
+        speed_kph=np.array([edge["speed_kph"] for edge in kept], dtype=np.float64),
+        coords=coords.astype(np.float64),
+        offsets=offsets
+    )
+
+def _parse_speed(value: Any) -> float:
+    """Parse an OSM maxspeed tag to km/h, falling back to the default speed."""
+    try:
+        text = str(value).split(";")[0].strip()
+        if text.endswith("mph"):
+            return float(text[:-3]) * 1.609
+        return float(text)
+    except (TypeError, ValueError):
+        return DEFAULT_SPEED_KPH
+
+def _is_drivable(tags: Dict[str, Any]) -> bool:
+    highway = tags.get("highway")
+    if not highway or highway in EXCLUDED_HIGHWAYS or tags.get("area") == "yes":
+        return False
+    if tags.get("motor_vehicle") == "no" or tags.get("motorcar") == "no":
+        return False
+    if tags.get("service") in EXCLUDED_SERVICE or tags.get("access") == "private":
+        return False
+    return True
+
+def compile_overpass_elements(
+    elements: List[Dict[str, Any]],
+    bounds: Tuple[float, float, float, float]
+) -> RoadNetwork:
+    """
+    Compile raw Overpass elements into a RoadNetwork.
+
+    Ways are split into edges at intersections (nodes shared by several ways) and at
+    their end points, like OSMnx's simplified graph. Two-way streets produce one edge
+    per direction.
+    """
+    nodes = {}
+    ways = {}
+    for element in elements:
+        if element.get("type") == "node":
+            nodes[element["id"]] = (element["lon"], element["lat"])
+        elif element.get("type") == "way" and _is_drivable(element.get("tags", {})):
+            ways[element["id"]] = element
+
+    # A node splits ways if it is used more than once or terminates a way
+    usage = {}
+    for way in ways.values():
+        refs = [n for n in way["nodes"] if n in nodes]
+        for n in refs:
+            usage[n] = usage.get(n, 0) + 1
+        if refs:
+            usage[refs[0]] = usage.get(refs[0], 0) + 1
+            usage[refs[-1]] = usage.get(refs[-1], 0) + 1
+
+    edges = []
+    for way_id, way in ways.items():
+        tags = way.get("tags", {})
+        refs = [n for n in way["nodes"] if n in nodes]
+        if len(refs) < 2:
+            continue
+
+        oneway = str(tags.get("oneway", "no")).lower()
+        if oneway == "-1":
+            refs = refs[::-1]
+
+        record = {
+            "osmid": way_id,
+            "highway": str(tags.get("highway")),
+            "name": str(tags.get("name", "")),
+            "speed_kph": _parse_speed(tags.get("maxspeed"))
+        }
+
+        start = 0
+        for i in range(1, len(refs)):
+            if usage.get(refs[i], 0) >= 2 or i == len(refs) - 1:
+                piece = refs[start:i + 1]
+                pts = np.array([nodes[n] for n in piece], dtype=np.float64)
+                edges.append(dict(record, u=piece[0], v=piece[-1], coords=pts))
+                if oneway not in ("yes", "true", "1", "-1"):
+                    edges.append(dict(record, u=piece[-1], v=piece[0], coords=pts[::-1].copy()))
+                start = i
+
+    return _assemble(bounds_key(bounds), bounds, edges)
+
+def _overpass_extent(elements: List[Dict[str, Any]]) -> Optional[Tuple[float, float, float, float]]:
+    lons = [e["lon"] for e in elements if e.get("type") == "node"]
+    lats = [e["lat"] for e in elements if e.get("type") == "node"]
+    if not lons:
+        return None
+    return (min(lons), min(lats), max(lons), max(lats))
+
+def compile_from_overpass_cache(bounds: Tuple[float, float, float, float]) -> Optional[RoadNetwork]:
+    """
+    Compile a network from the cached Overpass responses covering the bounds.
+
+    All responses that intersect the bounds are merged (OSMnx splits large queries
+    into several requests); the merged extent must cover the bounds.
+    """
+    west, south, east, north = bounds
+    elements = {}
+    merged_extent = None
+
+    for path in sorted(glob.glob(os.path.join(OVERPASS_CACHE_DIR, "*.json"))):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                response = json.load(f)
+        except Exception:
+            continue
+        file_elements = response.get("elements", []) if isinstance(response, dict) else []
+        extent = _overpass_extent(file_elements)
+        if extent is None or extent[0] > east or extent[2] < west or extent[1] > north or extent[3] < south:
+            continue
+        for element in file_elements:
+            elements[(element.get("type"), element.get("id"))] = element
+        merged_extent = extent if merged_extent is None else (
+            min(merged_extent[0], extent[0]), min(merged_extent[1], extent[1]),
+            max(merged_extent[2], extent[2]), max(merged_extent[3], extent[3])
+        )
+
+    if merged_extent is None or not (
+        merged_extent[0] <= west and merged_extent[1] <= south and
+        merged_extent[2] >= east and merged_extent[3] >= north
+    ):
+        return None
+
+    network = compile_overpass_elements(list(elements.values()), bounds)
+    return network if len(network) else None
+
+def compile_gpkg(path: str, bounds: Tuple[float, float, float, float]) -> Optional[RoadNetwork]:
+    """Compile a legacy dashboard GeoPackage (one row per edge) into a RoadNetwork."""
+    gdf = gpd.read_file(path)
+    if gdf.empty:
+        return None
+    if gdf.crs is not None and gdf.crs.to_epsg() != 4326:
+        gdf = gdf.to_crs("EPSG:4326")
+
+    edges = []
+    for idx, row in gdf.iterrows():
+        geom = row.geometry
+        if geom is None:
+            continue
+        if geom.geom_type == "MultiLineString":
+            if len(geom.geoms) == 0:
+                continue
+            geom = geom.geoms[0]
+        pts = np.asarray(geom.coords, dtype=np.float64)[:, :2]
+        highway = row.get("highway", "unknown")
+        name = row.get("name")
+        edges.append({
+            "u": int(row["u"]) if "u" in gdf.columns and pd.notnull(row["u"]) else -(2 * idx + 1),
+            "v": int(row["v"]) if "v" in gdf.columns and pd.notnull(row["v"]) else -(2 * idx + 2),
+            "osmid": row.get("osmid", f"cached_seg_{idx}"),
+            "highway": str(highway) if pd.notnull(highway) else "unknown",
+            "name": str(name) if name is not None and pd.notnull(name) else "",
+            "speed_kph": DEFAULT_SPEED_KPH,
+            "coords": pts
+        })
+
+    # The GeoPackage already holds exactly the project's clipped network
+    network = _assemble(bounds_key(bounds), bounds, edges, truncate=False)
+    return network if len(network) else None
+
+def _legacy_gpkg_path(map_bounds: Dict[str, Any], project_id: str) -> str:
+    """Path under which the dashboard used to cache a project's segments."""
+    bounds_coords_str = json.dumps(map_bounds['coordinates'][0], sort_keys=True)
+    cache_filename_base = hashlib.md5(f"{project_id}_{bounds_coords_str}".encode()).hexdigest()
+    return os.path.join(LEGACY_GPKG_DIR, f"osm_segments_{cache_filename_base}.gpkg")
+
+def _fetch_network(bounds: Tuple[float, float, float, float]) -> Optional[RoadNetwork]:
+    """Download the network from OpenStreetMap (the Overpass response lands in the OSMnx cache)."""
+    import osmnx as ox
+
+    west, south, east, north = bounds
+    G = ox.graph_from_bbox(north, south, east, west, network_type="drive_service",
+                           truncate_by_edge=True, retain_all=False, simplify=True)
+    if G.number_of_edges() == 0:
+        return None
+
+    edges_gdf = ox.graph_to_gdfs(G, nodes=False, edges=True, fill_edge_geometry=True)
+    edges = []
+    for (u, v, k), row in edges_gdf.iterrows():
+        osmid = row.get("osmid")
+        highway = row.get("highway")
+        name = row.get("name")
+        edges.append({
+            "u": int(u),
+            "v": int(v),
+            "osmid": osmid[0] if isinstance(osmid, list) and osmid else osmid,
+            "highway": str(highway[0] if isinstance(highway, list) and highway else highway),
+            "name": str(name[0] if isinstance(name, list) and name else name) if name is not None and not (isinstance(name, float) and np.isnan(name)) else "",
+            "speed_kph": _parse_speed(row.get("maxspeed")),
+            "coords": np.asarray(row.geometry.coords, dtype=np.float64)[:, :2]
+        })
+    return _assemble(bounds_key(bounds), bounds, edges)
+
+def save_network(network: RoadNetwork, source: str) -> None:
+    """Write a compiled network to the store as one .npy file per array plus metadata."""
+    net_dir = _network_dir(network.key)
+    os.makedirs(net_dir, exist_ok=True)
+    for field in _ARRAY_FIELDS:
+        np.save(os.path.join(net_dir, f"{field}.npy"), np.asarray(getattr(network, field)))
+    meta = {
+        "key": network.key,
+        "version": network.version,
+        "bounds": list(network.bounds),
+        "source": source,
+        "edges": len(network),
+        "compiled_at": datetime.now().isoformat()
+    }
+    # Metadata last: a network directory without meta.json is incomplete
+    with open(os.path.join(net_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+def load_network(key: str) -> Optional[RoadNetwork]:
+    """Load a compiled network from the store (arrays are memory-mapped)."""
+    net_dir = _network_dir(key)
+    meta_path = os.path.join(net_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = {
+            field: np.load(os.path.join(net_dir, f"{field}.npy"), mmap_mode="r", allow_pickle=False)
+            for field in _ARRAY_FIELDS
+        }
+        return RoadNetwork(key=key, version=meta["version"], bounds=tuple(meta["bounds"]), **arrays)
+    except Exception as e:
+        print(f"Error loading network {key}: {str(e)}")
+        return None
+
+def get_network(
+    map_bounds: Dict[str, Any],
+    project_id: Optional[str] = None,
+    allow_fetch: Optional[bool] = None
+) -> Optional[RoadNetwork]:
+    """
+    Get the road network for a project's map bounds.
+
+    Lookup order: in-process cache, compiled store, the project's legacy dashboard
+    GeoPackage, cached Overpass responses and finally (unless offline) a download.
+    Anything compiled on the way is saved to the store, so later calls never parse
+    or download again. A miss is remembered for MISS_RETRY_SECONDS; until then only
+    the compiled store is checked (a lookup that may download still tries once if
+    the remembered miss did not).
+
+    Args:
+        map_bounds: GeoJSON polygon of the project's map bounds
+        project_id: Project ID, used to find the legacy GeoPackage cache
+        allow_fetch: Allow downloading on a miss (defaults to not NETWORK_STORE_OFFLINE)
+
+    Returns:
+        The RoadNetwork, or None if none is available
+    """
+    if not map_bounds or not map_bounds.get("coordinates"):
+        return None
+
+    bounds = normalize_bounds(map_bounds)
+    key = bounds_key(bounds)
+    if key in NETWORKS:
+        return NETWORKS[key]
+
+    if allow_fetch is None:
+        allow_fetch = not OFFLINE
+
+    miss = MISSES.get(key)
+    if miss is not None and time.monotonic() - miss[0] < MISS_RETRY_SECONDS and (miss[1] or not allow_fetch):
+        # Compiled by another process in the meantime?
+        network = load_network(key)
+        if network is not None:
+            MISSES.pop(key, None)
+            NETWORKS[key] = network
+        return network
+
+    os.makedirs(STORE_DIR, exist_ok=True)
+    with FileLock(_network_dir(key) + ".lock"):
+        network = load_network(key)
+
+        if network is None and project_id is not None:
+            legacy_path = _legacy_gpkg_path(map_bounds, project_id)
+            if os.path.exists(legacy_path):
+                try:
+                    network = compile_gpkg(legacy_path, bounds)
+                    if network is not None:
+                        save_network(network, source=legacy_path)
+                except Exception as e:
+                    print(f"Error compiling {legacy_path}: {str(e)}")
+                    network = None
+
+        if network is None:
+            network = compile_from_overpass_cache(bounds)
+            if network is not None:
+                save_network(network, source=OVERPASS_CACHE_DIR)
+
+        if network is None and allow_fetch:
+            try:
+                network = _fetch_network(bounds)
+                if network is not None:
+                    save_network(network, source="overpass")
+            except Exception as e:
+                print(f"Error fetching road network: {str(e)}")
+                network = None
+
+    if network is not None:
+        # Reload fresh compilations so every caller works on the memory-mapped store copy
+        network = load_network(key) or network
+        NETWORKS[key] = network
+        MISSES.pop(key, None)
+    else:
+        MISSES[key] = (time.monotonic(), allow_fetch)
+    return network
@@ -14,7 +14,8 @@ from reportlab.lib.units import inch, cm
 
 # Import our services
 from app.services.project_service import get_project
-from app.services.simulation_service import get_simulation_results
+from app.services.simulation_service import get_simulation_results, get_traffic_rollups
+from app.services.network_features import load_feature_table
 
 def generate_daily_report(project_id: str, report_date: date) -> Optional[str]:
     """
@@ -74,7 +75,7 @@ def generate_daily_report(project_id: str, report_date: date) -> Optional[str]:
         # Add traffic overview
         elements.append(Paragraph("Traffic Overview", heading2_style))
         
-        # Collect hourly data
+        # Collect hourly data from the traffic rollups
         hours = list(range(6, 19))  # 6 AM to 6 PM
         traffic_data = []
         peak_hour = 6
@@ -82,13 +83,17 @@ def generate_daily_report(project_id: str, report_date: date) -> Optional[str]:
         total_traffic = 0
         congestion_levels = []
         
+        hour_buckets = {
+            datetime.fromisoformat(bucket["start"]).hour: bucket
+            for bucket in get_traffic_rollups(project_id, "hour", report_date, report_date)
+        }
+        
         for hour in hours:
-            # Get simulation results for this hour
-            sim_result = get_simulation_results(project_id, report_date, hour)
+            bucket = hour_buckets.get(hour)
             
-            if sim_result:
+            if bucket:
                 # Extract traffic volume
-                traffic_volume = sim_result.stats.get("total_traffic", 0)
+                traffic_volume = bucket["total_traffic"]
                 traffic_data.append(traffic_volume)
                 total_traffic += traffic_volume
                 
@@ -98,8 +103,7 @@ def generate_daily_report(project_id: str, report_date: date) -> Optional[str]:
                     peak_hour = hour
                 
                 # Extract congestion level
-                congestion_level = sim_result.stats.get("average_congestion", 0)
-                congestion_levels.append(congestion_level)
+                congestion_levels.append(bucket["average_congestion"])
             else:
                 traffic_data.append(0)
                 congestion_levels.append(0)
@@ -143,6 +147,20 @@ def generate_daily_report(project_id: str, report_date: date) -> Optional[str]:
         if peak_sim:
             data.append(["Delivery Vehicles", f"{peak_sim.stats.get('deliveries_count', 0)} vehicles"])
             data.append(["Construction Phase", peak_sim.stats.get('construction_phase', 'Unknown')])
+            
+            # Uncertainty bands of ensemble runs
+            if peak_sim.stats.get('n_samples', 1) > 1:
+                data.append(["Ensemble Realizations", f"{peak_sim.stats['n_samples']}"])
+                data.append(["Average P90 Congestion (Peak Hour)", f"{peak_sim.stats.get('average_congestion_p90', 0):.2f} (0-1 scale)"])
+                data.append(["Expected Congested Segments (Peak Hour)", f"{peak_sim.stats.get('expected_congested_segments', 0):.1f}"])
+                data.append(["Max. Probability of Congestion > 0.8", f"{peak_sim.stats.get('max_exceedance_probability', 0) * 100:.0f}%"])
+        
+        # Road network context from the precomputed feature table
+        features = load_feature_table(project)
+        if features is not None:
+            near_site = features[features["site_distance_m"] <= 100]
+            data.append(["Road Segments within 100 m of Site", f"{len(near_site)} of {len(features)}"])
+            data.append(["Road Capacity within 100 m of Site", f"{near_site['capacity'].sum():.0f} vehicles/h"])
         
         # Create table
         table = Table(data, colWidths=[3*inch, 3*inch])
@@ -271,43 +289,26 @@ def generate_weekly_report(project_id: str, start_date: date, end_date: date) ->
         elements.append(Paragraph(f"Report Generated: {datetime.now().strftime('%d %B %Y, %H:%M')}", normal_style))
         elements.append(Spacer(1, 0.5*inch))
         
-        # Collect daily data
+        # Collect daily data from the traffic rollups
         days = []
         current_date = start_date
         daily_totals = []
         daily_peaks = []
         daily_congestion = []
         
+        day_buckets = {
+            bucket["start"]: bucket
+            for bucket in get_traffic_rollups(project_id, "day", start_date, end_date)
+        }
+        
         while current_date <= end_date:
             days.append(current_date.strftime("%a %d"))
-            
-            # Variables for this day
-            daily_total = 0
-            daily_peak = 0
-            daily_avg_congestion = 0
-            congestion_samples = 0
-            
-            # Collect hourly data for this day
-            for hour in range(6, 19):  # 6 AM to 6 PM
-                sim_result = get_simulation_results(project_id, current_date, hour)
-                
-                if sim_result:
-                    traffic_volume = sim_result.stats.get("total_traffic", 0)
-                    daily_total += traffic_volume
-                    daily_peak = max(daily_peak, traffic_volume)
-                    
-                    congestion = sim_result.stats.get("average_congestion", 0)
-                    daily_avg_congestion += congestion
-                    congestion_samples += 1
-            
-            # Calculate average congestion
-            if congestion_samples > 0:
-                daily_avg_congestion /= congestion_samples
+            bucket = day_buckets.get(current_date.isoformat())
             
             # Store daily stats
-            daily_totals.append(daily_total)
-            daily_peaks.append(daily_peak)
-            daily_congestion.append(daily_avg_congestion)
+            daily_totals.append(bucket["total_traffic"] if bucket else 0)
+            daily_peaks.append(bucket["peak_traffic"] if bucket else 0)
+            daily_congestion.append(bucket["average_congestion"] if bucket else 0)
             
             # Move to next day
             current_date += timedelta(days=1)
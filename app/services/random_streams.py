@@ -0,0 +1,71 @@
+import hashlib
+import numpy as np
+from datetime import date, time
+from typing import Optional, Union
+
+from app.services.traffic_engine import MODEL_VERSION
+
+def stream_key(
+    project_id: str,
+    day: date,
+    hour: Optional[Union[int, str]] = None,
+    stream: str = "traffic",
+    model_version: int = MODEL_VERSION
+) -> int:
+    """
+    128-bit seed for one random stream.
+
+    Derived from a cryptographic hash instead of Python's hash(), so the value is the
+    same in every process (API workers, pool workers, Streamlit sessions) regardless
+    of PYTHONHASHSEED.
+    """
+    hour_part = "" if hour is None else str(hour)
+    payload = f"{project_id}|{day.isoformat()}|{hour_part}|{stream}|{model_version}"
+    return int.from_bytes(hashlib.sha256(payload.encode("utf-8")).digest()[:16], "little")
+
+def hour_rng(
+    project_id: str,
+    day: date,
+    hour: int,
+    stream: str = "traffic",
+    model_version: int = MODEL_VERSION
+) -> np.random.Generator:
+    """
+    Independent random generator for one (project, date, hour, model version).
+
+    Streams with different keys are statistically independent, and the same key
+    always yields the same draws, so results can be reproduced bit for bit.
+
+    Args:
+        project_id: ID of the project
+        day: Simulated date
+        hour: Simulated hour
+        stream: Purpose of the draws (e.g. "traffic", "waiting_areas"), keeps models apart
+        model_version: Model version the draws belong to
+    """
+    return np.random.default_rng(np.random.SeedSequence(stream_key(project_id, day, hour, stream, model_version)))
+
+def step_rng(
+    project_id: str,
+    day: date,
+    step: time,
+    stream: str = "traffic",
+    model_version: int = MODEL_VERSION
+) -> np.random.Generator:
+    """
+    Independent random generator for one simulated time step (see hour_rng).
+
+    Steps on the full hour use the stream of their hour, so hourly runs draw the same
+    values as before sub-hourly steps existed.
+    """
+    key = step.hour if step.minute == 0 else f"{step.hour}:{step.minute:02d}"
+    return np.random.default_rng(np.random.SeedSequence(stream_key(project_id, day, key, stream, model_version)))
+
+def day_rng(
+    project_id: str,
+    day: date,
+    stream: str = "traffic",
+    model_version: int = MODEL_VERSION
+) -> np.random.Generator:
+    """Independent random generator for draws that cover a whole day (see hour_rng)."""
+    return np.random.default_rng(np.random.SeedSequence(stream_key(project_id, day, None, stream, model_version)))
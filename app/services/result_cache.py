@@ -0,0 +1,65 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+# Memory budget of the materialized result cache in MB
+CACHE_BUDGET_MB = float(os.getenv("SIMULATION_CACHE_MB", "256"))
+
+# Rough in-memory size of materialized results (Pydantic objects incl. coordinate lists),
+# measured with tracemalloc on OSM networks
+SEGMENT_BYTES = 1400
+COORDINATE_BYTES = 150
+
+# Least recently used first
+# Dictionary: key -> (value, estimated bytes)
+_ENTRIES = OrderedDict()
+_SIZE = 0
+_LOCK = threading.Lock()
+
+def estimate_result_bytes(n_segments: int, n_coordinates: int) -> int:
+    """Estimated memory of one materialized time step"""
+    return n_segments * SEGMENT_BYTES + n_coordinates * COORDINATE_BYTES
+
+def get(key: Hashable) -> Optional[Any]:
+    """Get a cached value and mark it as recently used"""
+    with _LOCK:
+        entry = _ENTRIES.get(key)
+        if entry is None:
+            return None
+        _ENTRIES.move_to_end(key)
+        return entry[0]
+
+def put(key: Hashable, value: Any, nbytes: int) -> None:
+    """Cache a value, evicting least recently used entries beyond the budget"""
+    global _SIZE
+    budget = CACHE_BUDGET_MB * 1024 * 1024
+    with _LOCK:
+        if key in _ENTRIES:
+            _SIZE -= _ENTRIES.pop(key)[1]
+        if nbytes > budget:
+            return
+        _ENTRIES[key] = (value, nbytes)
+        _SIZE += nbytes
+        while _SIZE > budget:
+            _, (_, evicted_bytes) = _ENTRIES.popitem(last=False)
+            _SIZE -= evicted_bytes
+
+def invalidate(predicate: Callable[[Hashable], bool]) -> None:
+    """Drop all entries whose key matches the predicate"""
+    global _SIZE
+    with _LOCK:
+        for key in [key for key in _ENTRIES if predicate(key)]:
+            _SIZE -= _ENTRIES.pop(key)[1]
+
+def clear() -> None:
+    """Drop all entries"""
+    global _SIZE
+    with _LOCK:
+        _ENTRIES.clear()
+        _SIZE = 0
+
+def stats() -> dict:
+    """Number of entries and estimated size of the cache"""
+    with _LOCK:
+        return {"entries": len(_ENTRIES), "bytes": _SIZE, "budget_bytes": int(CACHE_BUDGET_MB * 1024 * 1024)}
@@ -0,0 +1,135 @@
+import json
+import numpy as np
+from datetime import date
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow export is optional
+    pa = None
+
+from app.services import result_store
+from app.services.simulation_service import iter_day_records
+from app.services.traffic_engine import ENSEMBLE_STATS
+
+# Export formats and their media types
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream"
+}
+
+def export_available(export_format: str) -> bool:
+    """True if the format is known and its dependencies are installed"""
+    if export_format == "arrow":
+        return pa is not None
+    return export_format in EXPORT_FORMATS
+
+def iter_export(project_id: str, start_date: date, end_date: date, export_format: str) -> Iterator[bytes]:
+    """Stream the results of a date range in one of EXPORT_FORMATS"""
+    if export_format == "arrow":
+        return iter_arrow(project_id, start_date, end_date)
+    return iter_ndjson(project_id, start_date, end_date)
+
+def iter_ndjson(project_id: str, start_date: date, end_date: date) -> Iterator[bytes]:
+    """
+    Stream the results of a date range as NDJSON, one line per time step.
+
+    Each line has the fields of SimulationValues: per-segment value arrays aligned
+    with the network given by network_version (see GET /simulation/{project_id}/network).
+    """
+    for record in iter_day_records(project_id, start_date, end_date):
+        for t_idx in range(len(record.steps)):
+            line = json.dumps(result_store.step_values(project_id, record, t_idx), default=str)
+            yield line.encode("utf-8") + b"\n"
+
+class _ChunkSink:
+    """Write target of the Arrow stream writer, drained after every record batch"""
+
+    def __init__(self):
+        self.closed = False
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def _arrow_schema() -> "pa.Schema":
+    """One row per segment and time step; ensemble columns are null for single runs"""
+    return pa.schema(
+        [
+            ("time", pa.timestamp("s")),
+            ("network_version", pa.string()),
+            ("segment_id", pa.string()),
+            ("traffic_volume", pa.int32()),
+            ("congestion_level", pa.float32())
+        ]
+        + [(f"ensemble_{name}", pa.float32()) for name in ENSEMBLE_STATS]
+    )
+
+def _day_batch(record: result_store.DayRecord, segment_ids: np.ndarray, schema: "pa.Schema") -> "pa.RecordBatch":
+    """All time steps of a day as one record batch (rows ordered by time, then segment)"""
+    n_steps, n_segments = record.volumes.shape
+    times = np.array([step["time"] for step in record.steps], dtype="datetime64[s]")
+
+    columns = [
+        pa.array(np.repeat(times, n_segments), type=pa.timestamp("s")),
+        pa.array([record.network_version] * (n_steps * n_segments), type=pa.string()),
+        pa.array(np.tile(segment_ids, n_steps).tolist(), type=pa.string()),
+        pa.array(np.asarray(record.volumes, dtype=np.int32).ravel()),
+        pa.array(np.asarray(record.congestion, dtype=np.float32).ravel())
+    ]
+    for name in ENSEMBLE_STATS:
+        values = (record.ensemble or {}).get(name)
+        if values is None:
+            columns.append(pa.nulls(n_steps * n_segments, type=pa.float32()))
+        else:
+            columns.append(pa.array(np.asarray(values, dtype=np.float32).ravel()))
+
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+def iter_arrow(project_id: str, start_date: date, end_date: date) -> Iterator[bytes]:
+    """
+    Stream the results of a date range as an Arrow IPC stream, one record batch per day.
+
+    Rows are (time, network_version, segment_id, traffic_volume, congestion_level,
+    ensemble_<stat>...). Only one day is held in memory at a time.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed
+    """
+    if pa is None:
+        raise RuntimeError("Arrow export requires pyarrow")
+
+    schema = _arrow_schema()
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema)
+    yield sink.drain()
+
+    # Segment order of each network version in the range
+    segment_ids: Dict[str, Optional[np.ndarray]] = {}
+    try:
+        for record in iter_day_records(project_id, start_date, end_date):
+            if record.network_version not in segment_ids:
+                table = result_store.load_segment_table(project_id, record.network_version)
+                segment_ids[record.network_version] = None if table is None else np.asarray(table.segment_ids)
+            ids = segment_ids[record.network_version]
+            if ids is None:
+                print(f"Error exporting {record.day}: network {record.network_version} not found")
+                continue
+
+            writer.write_batch(_day_batch(record, ids, schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
@@ -0,0 +1,634 @@
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import threading
+import numpy as np
+from dataclasses import dataclass, field
+from datetime import datetime, date, time
+from typing import Dict, List, Any, Optional
+
+from app.models.simulation import SimulationResult, SimulationTimeStep, TrafficSegment
+from app.services.traffic_rollups import Rollups, update_rollups
+
+# Root of the result store: data/simulations/<project_id>/...
+SIMULATIONS_DIR = "data/simulations"
+
+# Per-project index of the stored days: date -> network version, fingerprint, step times
+INDEX_FILE = "index.json"
+
+# Per-project traffic rollups (hour, day, ISO week, month), updated whenever days are written
+ROLLUPS_FILE = "rollups.json"
+
+# Legacy date directories with unreadable hour files are moved here: <project>/legacy_failed/<date>
+LEGACY_FAILED_DIR = "legacy_failed"
+
+# Static per-segment payload stored once per network version
+_SEGMENT_TEXT_FIELDS = ["segment_ids", "start_nodes", "end_nodes"]
+_SEGMENT_NUMERIC_FIELDS = ["length", "speed_limit", "coords", "offsets"]
+
+@dataclass
+class SegmentTable:
+    """Static segment payload of a simulation network, aligned with the value matrices."""
+    version: str
+    segment_ids: np.ndarray   # str
+    start_nodes: np.ndarray   # str
+    end_nodes: np.ndarray     # str
+    length: np.ndarray        # float64
+    speed_limit: np.ndarray   # float64
+    coords: np.ndarray        # float64 (M, 2), all segment vertices
+    offsets: np.ndarray       # int64 (E + 1)
+    _columns: Optional[Dict[str, list]] = field(default=None, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.segment_ids)
+
+    def coordinates(self) -> List[List[List[float]]]:
+        """Coordinates of all segments as [[lon, lat], ...] lists."""
+        return self.columns()["coordinates"]
+
+    def columns(self) -> Dict[str, list]:
+        """All fields as Python lists (built once per table, shared by all materialized steps)."""
+        if self._columns is None:
+            coords = np.asarray(self.coords).tolist()
+            offsets = np.asarray(self.offsets).tolist()
+            self._columns = {
+                "segment_ids": np.asarray(self.segment_ids).tolist(),
+                "start_nodes": np.asarray(self.start_nodes).tolist(),
+                "end_nodes": np.asarray(self.end_nodes).tolist(),
+                "length": np.asarray(self.length).tolist(),
+                "speed_limit": np.asarray(self.speed_limit).tolist(),
+                "coordinates": [coords[offsets[i]:offsets[i + 1]] for i in range(len(self))]
+            }
+        return self._columns
+
+@dataclass
+class DayRecord:
+    """All time steps of one simulated day: (T, E) value matrices plus per-step metadata."""
+    day: date
+    network_version: str
+    volumes: np.ndarray       # int32 (T, E)
+    congestion: np.ndarray    # float32 (T, E)
+    steps: List[Dict[str, Any]]  # per time step: id, time, execution_time, stats, waiting_areas_status, congested
+    fingerprint: Optional[str] = None  # hash of the day's simulation inputs (None: unknown)
+    ensemble: Optional[Dict[str, np.ndarray]] = None  # ensemble runs: stat -> float32 (T, E)
+    interval_minutes: int = 60  # length of a time step
+    delivery_counts: Optional[Dict[str, Any]] = None  # distinct deliveries: {"day": n, "hours": {"HH": n}} (None: unknown)
+
+    @property
+    def times(self) -> List[time]:
+        """Start time of each step"""
+        return [datetime.fromisoformat(step["time"]).time() for step in self.steps]
+
+    def step_index(self, step_time: time) -> Optional[int]:
+        """Position of the step starting at step_time (None if there is none)"""
+        times = self.times
+        return times.index(step_time) if step_time in times else None
+
+def interval_minutes(times: List[time], default: int = 60) -> int:
+    """Step length of a day from its step start times (default for a single step)"""
+    minutes = sorted(t.hour * 60 + t.minute for t in times)
+    gaps = [b - a for a, b in zip(minutes, minutes[1:]) if b > a]
+    return min(gaps) if gaps else default
+
+def _project_dir(project_id: str) -> str:
+    return os.path.join(SIMULATIONS_DIR, project_id)
+
+def _network_dir(project_id: str, version: str) -> str:
+    return os.path.join(_project_dir(project_id), "networks", version)
+
+def _day_dir(project_id: str, day: date) -> str:
+    return os.path.join(_project_dir(project_id), "days", day.isoformat())
+
+def make_segment_table(
+    segment_ids: List[str],
+    start_nodes: List[str],
+    end_nodes: List[str],
+    length: List[float],
+    speed_limit: List[float],
+    coordinates: List[List[List[float]]]
+) -> SegmentTable:
+    """Build a SegmentTable (and its content version) from per-segment lists."""
+    counts = np.array([len(c) for c in coordinates], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    flat = [pt for c in coordinates for pt in c]
+    coords = np.array(flat, dtype=np.float64).reshape(-1, 2)
+    ids = np.array(segment_ids, dtype=str)
+
+    digest = hashlib.sha1()
+    digest.update(ids.tobytes())
+    digest.update(coords.tobytes())
+    digest.update(offsets.tobytes())
+
+    return SegmentTable(
+        version=digest.hexdigest()[:16],
+        segment_ids=ids,
+        start_nodes=np.array(start_nodes, dtype=str),
+        end_nodes=np.array(end_nodes, dtype=str),
+        length=np.array(length, dtype=np.float64),
+        speed_limit=np.array(speed_limit, dtype=np.float64),
+        coords=coords,
+        offsets=offsets
+    )
+
+def _write_json(path: str, data: Any) -> None:
+    """Write a JSON file atomically (temp file + rename), so readers never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, default=str)
+    os.replace(tmp_path, path)
+
+def save_segment_table(project_id: str, table: SegmentTable) -> None:
+    """Write the static segment payload once per network version."""
+    net_dir = _network_dir(project_id, table.version)
+    if os.path.exists(os.path.join(net_dir, "segment_ids.npy")):
+        return
+    # Written next to its final place and renamed, so a crash never leaves a partial payload
+    tmp_dir = f"{net_dir}.{uuid.uuid4().hex}.tmp"
+    os.makedirs(tmp_dir)
+    try:
+        for field in _SEGMENT_TEXT_FIELDS + _SEGMENT_NUMERIC_FIELDS:
+            np.save(os.path.join(tmp_dir, f"{field}.npy"), np.asarray(getattr(table, field)))
+        if os.path.isdir(net_dir):
+            # Left over from an interrupted write of the old layout
+            shutil.rmtree(net_dir, ignore_errors=True)
+        os.rename(tmp_dir, net_dir)
+    except OSError:
+        # Another writer published the same version first
+        if not os.path.exists(os.path.join(net_dir, "segment_ids.npy")):
+            raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def load_segment_table(project_id: str, version: str) -> Optional[SegmentTable]:
+    """Load a network's segment payload (memory-mapped)."""
+    net_dir = _network_dir(project_id, version)
+    if not os.path.exists(os.path.join(net_dir, "segment_ids.npy")):
+        return None
+    arrays = {
+        field: np.load(os.path.join(net_dir, f"{field}.npy"), mmap_mode="r", allow_pickle=False)
+        for field in _SEGMENT_TEXT_FIELDS + _SEGMENT_NUMERIC_FIELDS
+    }
+    return SegmentTable(version=version, **arrays)
+
+def _read_meta(day_dir: str) -> Optional[Dict[str, Any]]:
+    meta_path = os.path.join(day_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _array_file(name: str, generation: Optional[str]) -> str:
+    """File name of a day matrix; days written before generations existed have none."""
+    return f"{name}.{generation}.npy" if generation else f"{name}.npy"
+
+def save_day(project_id: str, record: DayRecord) -> None:
+    """
+    Write one day's value matrices and step metadata.
+
+    The matrices are written under a new generation suffix and meta.json, replaced
+    atomically, switches to them. A crash at any point leaves the previous version of
+    the day readable; readers holding the old matrices memory-mapped keep them.
+    """
+    day_dir = _day_dir(project_id, record.day)
+    os.makedirs(day_dir, exist_ok=True)
+    previous = _read_meta(day_dir)
+
+    generation = uuid.uuid4().hex[:12]
+    arrays = {
+        "volumes": np.asarray(record.volumes, dtype=np.int32),
+        "congestion": np.asarray(record.congestion, dtype=np.float32)
+    }
+    for name, values in (record.ensemble or {}).items():
+        arrays[f"ensemble_{name}"] = np.asarray(values, dtype=np.float32)
+    for name, values in arrays.items():
+        np.save(os.path.join(day_dir, _array_file(name, generation)), values)
+
+    meta = {
+        "network_version": record.network_version,
+        "fingerprint": record.fingerprint,
+        "generation": generation,
+        "ensemble": sorted(record.ensemble or {}),
+        "interval_minutes": record.interval_minutes,
+        "delivery_counts": record.delivery_counts,
+        "steps": record.steps
+    }
+    _write_json(os.path.join(day_dir, "meta.json"), meta)
+
+    # Remove the superseded generation (only that one: a concurrent writer's files stay)
+    if previous is not None:
+        old_generation = previous.get("generation")
+        old_names = ["volumes", "congestion"] + [f"ensemble_{name}" for name in previous.get("ensemble", [])]
+        if not old_generation:
+            old_names += [name[:-len(".npy")] for name in os.listdir(day_dir) if name.startswith("ensemble_") and name.count(".") == 1]
+        for name in old_names:
+            try:
+                os.remove(os.path.join(day_dir, _array_file(name, old_generation)))
+            except OSError:
+                pass
+
+def load_day(project_id: str, day: date) -> Optional[DayRecord]:
+    """Load one day's record (value matrices memory-mapped)."""
+    day_dir = _day_dir(project_id, day)
+    meta = _read_meta(day_dir)
+    if meta is None:
+        return None
+
+    generation = meta.get("generation")
+    if generation:
+        ensemble_names = meta.get("ensemble", [])
+    else:
+        ensemble_names = sorted(
+            name[len("ensemble_"):-len(".npy")]
+            for name in os.listdir(day_dir)
+            if name.startswith("ensemble_") and name.endswith(".npy")
+        )
+    ensemble = {
+        name: np.load(os.path.join(day_dir, _array_file(f"ensemble_{name}", generation)), mmap_mode="r")
+        for name in ensemble_names
+    }
+    return DayRecord(
+        day=day,
+        network_version=meta["network_version"],
+        volumes=np.load(os.path.join(day_dir, _array_file("volumes", generation)), mmap_mode="r"),
+        congestion=np.load(os.path.join(day_dir, _array_file("congestion", generation)), mmap_mode="r"),
+        steps=meta["steps"],
+        fingerprint=meta.get("fingerprint"),
+        ensemble=ensemble or None,
+        interval_minutes=meta.get("interval_minutes", 60),
+        delivery_counts=meta.get("delivery_counts")
+    )
+
+def _index_entry(record: DayRecord) -> Dict[str, Any]:
+    return {
+        "network_version": record.network_version,
+        "fingerprint": record.fingerprint,
+        "interval_minutes": record.interval_minutes,
+        "times": [t.strftime("%H:%M") for t in record.times]
+    }
+
+def index_times(entry: Dict[str, Any]) -> List[time]:
+    """Sorted step start times of an index entry (entries written before sub-hourly steps list hours)"""
+    if "times" in entry:
+        return sorted(datetime.strptime(t, "%H:%M").time() for t in entry["times"])
+    return sorted(time(hour=hour) for hour in entry.get("hours", []))
+
+def _write_index(project_id: str, index: Dict[date, Dict[str, Any]]) -> None:
+    path = os.path.join(_project_dir(project_id), INDEX_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _write_json(path, {day.isoformat(): entry for day, entry in sorted(index.items())})
+
+def _rebuild_index(project_id: str) -> Dict[date, Dict[str, Any]]:
+    """Rebuild the index from the meta.json files of the stored days."""
+    index = {}
+    days_dir = os.path.join(_project_dir(project_id), "days")
+    if not os.path.isdir(days_dir):
+        return index
+    for name in os.listdir(days_dir):
+        try:
+            day = datetime.strptime(name, "%Y-%m-%d").date()
+        except ValueError:
+            continue
+        record = load_day(project_id, day)
+        if record is not None:
+            index[day] = _index_entry(record)
+    return index
+
+def load_index(project_id: str) -> Dict[date, Dict[str, Any]]:
+    """
+    Index of the stored days of a project: date -> network_version, fingerprint,
+    interval_minutes, times (step start times as "HH:MM").
+
+    Answers which days and steps exist without opening any day. Rebuilt from the
+    day directories if missing.
+    """
+    path = os.path.join(_project_dir(project_id), INDEX_FILE)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return {
+                    datetime.strptime(day, "%Y-%m-%d").date(): entry
+                    for day, entry in json.load(f).items()
+                }
+        except (ValueError, OSError) as e:
+            print(f"Error reading result index, rebuilding: {str(e)}")
+
+    index = _rebuild_index(project_id)
+    if index:
+        _write_index(project_id, index)
+    return index
+
+def step_stats(record: DayRecord) -> List[tuple]:
+    """(time, stats, step length in hours) of every time step of a day, the input of the rollups"""
+    step_hours = record.interval_minutes / 60
+    return [(datetime.fromisoformat(step["time"]), step["stats"], step_hours) for step in record.steps]
+
+def load_rollups(project_id: str) -> Rollups:
+    """
+    Traffic rollups of a project: level -> bucket key -> bucket.
+
+    Rebuilt from the stored days' step stats if missing.
+    """
+    path = os.path.join(_project_dir(project_id), ROLLUPS_FILE)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (ValueError, OSError) as e:
+            print(f"Error reading traffic rollups, rebuilding: {str(e)}")
+
+    rollups = {}
+    days = {}
+    delivery_counts = {}
+    for day in load_index(project_id):
+        record = load_day(project_id, day)
+        if record is not None:
+            days[day] = step_stats(record)
+            delivery_counts[day] = record.delivery_counts
+    update_rollups(rollups, days, delivery_counts)
+    if days:
+        _write_json(path, rollups)
+    return rollups
+
+def _congested_indices(result: SimulationResult) -> List[int]:
+    """Segment indices of a result's congestion points (a subsequence of its segments)."""
+    points = result.congestion_points
+    indices = []
+    j = 0
+    for i, segment in enumerate(result.time_steps[0].traffic_segments):
+        if j < len(points) and points[j].get("segment_id") == segment.segment_id:
+            indices.append(i)
+            j += 1
+    return indices
+
+def results_to_day_records(
+    results: List[SimulationResult],
+    fingerprints: Optional[Dict[date, Optional[str]]] = None
+) -> List[tuple]:
+    """
+    Convert per-step SimulationResults into (SegmentTable, DayRecord) pairs, one per day.
+
+    fingerprints optionally maps days to the input fingerprint stored with them.
+
+    All results of a day are expected to share the same segment list. Congestion
+    points are kept as segment indices, since their geometry is in the segment table.
+    """
+    by_day = {}
+    for result in results:
+        step = result.time_steps[0]
+        by_day.setdefault(step.time.date(), []).append(result)
+
+    records = []
+    for day, day_results in sorted(by_day.items()):
+        day_results.sort(key=lambda r: r.time_steps[0].time)
+        segments = day_results[0].time_steps[0].traffic_segments
+        table = make_segment_table(
+            segment_ids=[s.segment_id for s in segments],
+            start_nodes=[s.start_node for s in segments],
+            end_nodes=[s.end_node for s in segments],
+            length=[s.length for s in segments],
+            speed_limit=[s.speed_limit for s in segments],
+            coordinates=[s.coordinates for s in segments]
+        )
+        volumes = np.array(
+            [[s.traffic_volume for s in r.time_steps[0].traffic_segments] for r in day_results],
+            dtype=np.int32
+        ).reshape(len(day_results), len(segments))
+        congestion = np.array(
+            [[s.congestion_level for s in r.time_steps[0].traffic_segments] for r in day_results],
+            dtype=np.float32
+        ).reshape(len(day_results), len(segments))
+        ensemble = None
+        if segments and segments[0].ensemble:
+            ensemble = {
+                name: np.array(
+                    [[s.ensemble[name] for s in r.time_steps[0].traffic_segments] for r in day_results],
+                    dtype=np.float32
+                )
+                for name in segments[0].ensemble
+            }
+        steps = [
+            {
+                "id": r.id,
+                "time": r.time_steps[0].time.isoformat(),
+                "execution_time": r.execution_time.isoformat(),
+                "stats": r.stats,
+                "waiting_areas_status": r.time_steps[0].waiting_areas_status,
+                "congested": _congested_indices(r)
+            }
+            for r in day_results
+        ]
+        records.append((table, DayRecord(
+            day=day,
+            network_version=table.version,
+            volumes=volumes,
+            congestion=congestion,
+            steps=steps,
+            fingerprint=(fingerprints or {}).get(day),
+            ensemble=ensemble,
+            interval_minutes=interval_minutes([r.time_steps[0].time.time() for r in day_results])
+        )))
+    return records
+
+def step_to_result(project_id: str, record: DayRecord, table: SegmentTable, t_idx: int) -> SimulationResult:
+    """
+    Materialize one time step of a day as a SimulationResult.
+
+    The values come from typed arrays written by the simulation itself, so the models
+    are built without validation (model_construct).
+    """
+    columns = table.columns()
+    segment_ids = columns["segment_ids"]
+    coordinates = columns["coordinates"]
+    step = record.steps[t_idx]
+
+    volumes = np.asarray(record.volumes[t_idx]).tolist()
+    congestion = np.asarray(record.congestion[t_idx], dtype=np.float64).tolist()
+    segment_ensembles = [None] * len(segment_ids)
+    if record.ensemble:
+        ensemble_columns = {
+            name: np.asarray(values[t_idx], dtype=np.float64).tolist()
+            for name, values in record.ensemble.items()
+        }
+        segment_ensembles = [
+            {name: values[i] for name, values in ensemble_columns.items()}
+            for i in range(len(segment_ids))
+        ]
+
+    traffic_segments = [
+        TrafficSegment.model_construct(
+            segment_id=segment_ids[i],
+            start_node=columns["start_nodes"][i],
+            end_node=columns["end_nodes"][i],
+            length=columns["length"][i],
+            speed_limit=columns["speed_limit"][i],
+            traffic_volume=volumes[i],
+            congestion_level=congestion[i],
+            coordinates=coordinates[i],
+            ensemble=segment_ensembles[i]
+        )
+        for i in range(len(segment_ids))
+    ]
+    return SimulationResult.model_construct(
+        id=step["id"],
+        project_id=project_id,
+        execution_time=datetime.fromisoformat(step["execution_time"]),
+        time_steps=[SimulationTimeStep.model_construct(
+            time=datetime.fromisoformat(step["time"]),
+            traffic_segments=traffic_segments,
+            waiting_areas_status=step["waiting_areas_status"]
+        )],
+        traffic_volumes=dict(zip(segment_ids, volumes)),
+        congestion_points=[
+            {
+                "segment_id": segment_ids[i],
+                "congestion_level": congestion[i],
+                "coordinates": coordinates[i]
+            }
+            for i in step.get("congested", [])
+        ],
+        stats=step["stats"]
+    )
+
+def network_payload(table: SegmentTable) -> Dict[str, Any]:
+    """Static segment payload of a network as plain lists (see SimulationNetwork)."""
+    columns = table.columns()
+    return {
+        "version": table.version,
+        "segment_ids": columns["segment_ids"],
+        "start_nodes": columns["start_nodes"],
+        "end_nodes": columns["end_nodes"],
+        "length": columns["length"],
+        "speed_limit": columns["speed_limit"],
+        "coordinates": columns["coordinates"]
+    }
+
+def step_values(project_id: str, record: DayRecord, t_idx: int) -> Dict[str, Any]:
+    """One stored time step as per-segment value arrays, without any geometry (see SimulationValues)."""
+    step = record.steps[t_idx]
+    return {
+        "id": step["id"],
+        "project_id": project_id,
+        "network_version": record.network_version,
+        "time": step["time"],
+        "execution_time": step["execution_time"],
+        "traffic_volume": np.asarray(record.volumes[t_idx]).tolist(),
+        "congestion_level": np.asarray(record.congestion[t_idx], dtype=np.float64).tolist(),
+        "congested": step.get("congested", []),
+        "ensemble": {
+            name: np.asarray(values[t_idx], dtype=np.float64).tolist()
+            for name, values in record.ensemble.items()
+        } if record.ensemble else None,
+        "waiting_areas_status": step["waiting_areas_status"],
+        "stats": step["stats"]
+    }
+
+def save_day_records(project_id: str, records: List[tuple]) -> Dict[date, Dict[str, Any]]:
+    """
+    Write (SegmentTable, DayRecord) pairs to the store.
+
+    The index and the traffic rollups are updated for the written days.
+
+    Returns:
+        The index entries of the written days
+    """
+    entries = {}
+    day_stats = {}
+    delivery_counts = {}
+    for table, record in records:
+        save_segment_table(project_id, table)
+        save_day(project_id, record)
+        entries[record.day] = _index_entry(record)
+        day_stats[record.day] = step_stats(record)
+        delivery_counts[record.day] = record.delivery_counts
+
+    if entries:
+        index = load_index(project_id)
+        index.update(entries)
+        _write_index(project_id, index)
+
+        rollups = load_rollups(project_id)
+        update_rollups(rollups, day_stats, delivery_counts)
+        _write_json(os.path.join(_project_dir(project_id), ROLLUPS_FILE), rollups)
+    return entries
+
+def save_results(
+    project_id: str,
+    results: List[SimulationResult],
+    fingerprints: Optional[Dict[date, Optional[str]]] = None
+) -> Dict[date, Dict[str, Any]]:
+    """
+    Write SimulationResults to the store, packed per day (with optional input fingerprints).
+
+    Returns:
+        The index entries of the written days
+    """
+    return save_day_records(project_id, results_to_day_records(results, fingerprints))
+
+def has_legacy_results(project_id: str) -> bool:
+    """True if the project still has per-hour JSON files (<date>/<hour>.json)."""
+    project_dir = _project_dir(project_id)
+    if not os.path.isdir(project_dir):
+        return False
+    for name in os.listdir(project_dir):
+        try:
+            datetime.strptime(name, "%Y-%m-%d")
+        except ValueError:
+            continue
+        if os.path.isdir(os.path.join(project_dir, name)):
+            return True
+    return False
+
+def migrate_legacy_results(project_id: str, remove_legacy: bool = True) -> int:
+    """
+    Convert a project's legacy per-hour JSON tree into the columnar store.
+
+    Days already in the columnar index are never overwritten; their legacy copy is
+    stale. Each legacy date directory is removed once its day has been written. A
+    directory with files that cannot be parsed is moved to LEGACY_FAILED_DIR after
+    its readable hours are written, so the migration does not run again.
+
+    Returns:
+        Number of migrated days
+    """
+    project_dir = _project_dir(project_id)
+    if not os.path.isdir(project_dir):
+        return 0
+
+    index = load_index(project_id)
+    migrated = 0
+    for name in sorted(os.listdir(project_dir)):
+        date_path = os.path.join(project_dir, name)
+        try:
+            day = datetime.strptime(name, "%Y-%m-%d").date()
+        except ValueError:
+            continue
+        if not os.path.isdir(date_path):
+            continue
+
+        results = []
+        failed = False
+        for hour_file in os.listdir(date_path):
+            if not hour_file.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(date_path, hour_file), "r") as f:
+                    results.append(SimulationResult(**json.load(f)))
+            except Exception as e:
+                print(f"Error migrating {os.path.join(date_path, hour_file)}: {str(e)}")
+                failed = True
+
+        if results and day not in index:
+            save_results(project_id, results)
+            migrated += 1
+
+        if failed:
+            failed_path = os.path.join(project_dir, LEGACY_FAILED_DIR, name)
+            os.makedirs(os.path.dirname(failed_path), exist_ok=True)
+            shutil.rmtree(failed_path, ignore_errors=True)
+            os.replace(date_path, failed_path)
+        elif remove_legacy:
+            shutil.rmtree(date_path, ignore_errors=True)
+
+    return migrated
@@ -0,0 +1,232 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+import pandas as pd
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+try:
+    import pyarrow
+except ImportError:  # Tables are pickled instead of written as Parquet
+    pyarrow = None
+
+from app.services.excel_validator import REQUIRED_COLUMNS, read_upload, validate_schedule
+
+# Parsed uploads, one directory per content hash
+SCHEDULE_STORE_DIR = os.getenv("SCHEDULE_STORE_DIR", "data/schedules")
+
+# Workbook sheets used by the simulation and the table each is stored as. The
+# validated first sheet (or a CSV upload) is stored as "activities".
+SHEET_TABLES = {
+    "Deliveries": "deliveries",
+    "Vehicles": "vehicles",
+    "Schedule": "phases"
+}
+
+# Columns parsed as dates, per table
+DATE_COLUMNS = {
+    "activities": ["Anfangstermin", "Endtermin"],
+    "deliveries": ["Date"],
+    "phases": ["StartDate", "EndDate"]
+}
+
+META_FILE_NAME = "meta.json"
+
+# Tables of the stored uploads, loaded once per process
+# Dictionary: schedule hash -> table name -> DataFrame (shared, do not modify)
+_TABLES = {}
+_LOCK = threading.Lock()
+
+def content_hash(file_content: bytes) -> str:
+    """Key of an upload in the store"""
+    return hashlib.sha1(file_content).hexdigest()
+
+def _table_suffix() -> str:
+    return "parquet" if pyarrow is not None else "pkl"
+
+def _normalize(name: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Typed columns: stripped names, dates as datetime64, mixed text columns as strings"""
+    df = df.copy()
+    df.columns = [str(col).strip() for col in df.columns]
+    if name == "activities":
+        df = df.rename(columns={col: REQUIRED_COLUMNS[col.lower()] for col in df.columns if col.lower() in REQUIRED_COLUMNS})
+    for col in DATE_COLUMNS.get(name, []):
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+def _write_table(directory: str, name: str, df: pd.DataFrame) -> None:
+    path = os.path.join(directory, f"{name}.{_table_suffix()}")
+    if pyarrow is not None:
+        df.to_parquet(path, index=False)
+    else:
+        df.to_pickle(path)
+
+def _read_table(directory: str, name: str, suffix: str) -> pd.DataFrame:
+    path = os.path.join(directory, f"{name}.{suffix}")
+    return pd.read_parquet(path) if suffix == "parquet" else pd.read_pickle(path)
+
+def _read_meta(schedule_hash: str) -> Optional[Dict[str, Any]]:
+    """Metadata of a stored upload (None if not stored)"""
+    try:
+        with open(os.path.join(SCHEDULE_STORE_DIR, schedule_hash, META_FILE_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _store(schedule_hash: str, tables: Dict[str, pd.DataFrame], file_format: str, validated: bool) -> None:
+    """Write the tables of an upload; a directory is only visible once complete"""
+    directory = os.path.join(SCHEDULE_STORE_DIR, schedule_hash)
+    if os.path.exists(os.path.join(directory, META_FILE_NAME)):
+        return
+
+    os.makedirs(SCHEDULE_STORE_DIR, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=SCHEDULE_STORE_DIR, prefix=".tmp_")
+    try:
+        for name, df in tables.items():
+            _write_table(staging, name, df)
+        with open(os.path.join(staging, META_FILE_NAME), "w", encoding="utf-8") as f:
+            json.dump({
+                "tables": sorted(tables),
+                "suffix": _table_suffix(),
+                "format": file_format,
+                "validated": validated,
+                "created_at": datetime.now().isoformat()
+            }, f, indent=2)
+        os.replace(staging, directory)
+    except OSError:
+        # Written concurrently by another request
+        if not os.path.exists(os.path.join(directory, META_FILE_NAME)):
+            raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+def parse_upload(file_content: bytes, validate: bool = True) -> Dict[str, Any]:
+    """
+    Parse an upload once into its canonical tables.
+
+    The activity schedule is the validated first sheet; the Deliveries, Vehicles
+    and Schedule sheets of a workbook are kept as typed tables as well.
+
+    Args:
+        file_content: Uploaded Excel or CSV file
+        validate: If False, an activity schedule failing validation is kept as
+            parsed instead of rejecting the file (files of projects created before
+            the store); dates that cannot be parsed become NaT
+
+    Returns:
+        {"valid": True, "tables": name -> DataFrame, "format": ...} or
+        {"valid": False, "errors": [...]}
+    """
+    try:
+        sheets, file_format = read_upload(file_content)
+    except Exception as e:
+        return {"valid": False, "errors": [str(e)]}
+
+    tables = {}
+    if sheets:
+        first_sheet = next(iter(sheets.values()))
+        validation = validate_schedule(first_sheet, file_format)
+        if validation["valid"]:
+            tables["activities"] = _normalize("activities", validation["data"])
+        elif validate:
+            return validation
+        elif set(REQUIRED_COLUMNS) <= {str(col).strip().lower() for col in first_sheet.columns}:
+            tables["activities"] = _normalize("activities", first_sheet)
+    elif validate:
+        return {"valid": False, "errors": ["File contains no sheets"]}
+
+    for sheet_name, table_name in SHEET_TABLES.items():
+        if sheet_name in sheets:
+            tables[table_name] = _normalize(table_name, sheets[sheet_name])
+
+    return {"valid": True, "tables": tables, "format": file_format}
+
+def store_upload(file_content: bytes) -> Dict[str, Any]:
+    """
+    Validate an upload and store its tables under its content hash.
+
+    Uploads already stored as validated are not parsed again; a file stored
+    unvalidated as a legacy project file is still checked.
+
+    Returns:
+        {"valid": True, "schedule_hash": ...} or {"valid": False, "errors": [...]}
+    """
+    schedule_hash = content_hash(file_content)
+    meta = _read_meta(schedule_hash)
+    if meta is not None and meta.get("validated"):
+        return {"valid": True, "schedule_hash": schedule_hash}
+
+    parsed = parse_upload(file_content)
+    if not parsed["valid"]:
+        return parsed
+    if meta is not None:
+        return {"valid": True, "schedule_hash": schedule_hash}
+
+    _store(schedule_hash, parsed["tables"], parsed["format"], validated=True)
+    with _LOCK:
+        _TABLES[schedule_hash] = parsed["tables"]
+    return {"valid": True, "schedule_hash": schedule_hash}
+
+def load_tables(schedule_hash: str) -> Optional[Dict[str, pd.DataFrame]]:
+    """Tables of a stored upload, cached in memory (None if not stored)"""
+    with _LOCK:
+        if schedule_hash in _TABLES:
+            return _TABLES[schedule_hash]
+
+    directory = os.path.join(SCHEDULE_STORE_DIR, schedule_hash)
+    try:
+        meta = _read_meta(schedule_hash)
+        if meta is None:
+            return None
+        tables = {name: _read_table(directory, name, meta["suffix"]) for name in meta["tables"]}
+    except Exception as e:
+        print(f"Error loading schedule tables: {str(e)}")
+        return None
+
+    with _LOCK:
+        _TABLES[schedule_hash] = tables
+    return tables
+
+def get_schedule_tables(schedule_hash: Optional[str], file_path: Optional[str]) -> Dict[str, pd.DataFrame]:
+    """
+    Canonical tables of a project's upload.
+
+    Projects created before the store have no schedule_hash; their file is hashed
+    and parsed once, then read from the store like any other upload.
+
+    Returns:
+        Table name -> DataFrame (empty if the upload cannot be found or parsed)
+    """
+    if schedule_hash:
+        tables = load_tables(schedule_hash)
+        if tables is not None:
+            return tables
+
+    if not file_path or not os.path.exists(file_path):
+        return {}
+
+    with open(file_path, "rb") as f:
+        file_content = f.read()
+    file_hash = content_hash(file_content)
+    tables = load_tables(file_hash)
+    if tables is not None:
+        return tables
+
+    parsed = parse_upload(file_content, validate=False)
+    if not parsed["valid"]:
+        print(f"Error parsing project file {file_path}: {parsed['errors']}")
+        return {}
+    try:
+        _store(file_hash, parsed["tables"], parsed["format"], validated=False)
+    except Exception as e:
+        print(f"Error storing schedule tables: {str(e)}")
+    with _LOCK:
+        _TABLES[file_hash] = parsed["tables"]
+    return parsed["tables"]
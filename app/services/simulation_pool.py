@@ -0,0 +1,209 @@
+import os
+import threading
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+from datetime import date, time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.services.traffic_engine import EdgeArrays, delivery_share, simulate_day, simulate_day_ensemble
+from app.services.waiting_queue import DayTrucks, simulate_queue
+from app.services.random_streams import day_rng, step_rng
+
+# Number of worker processes simulating days in parallel (0 = one per CPU core, 1 = no pool)
+SIMULATION_PROCESSES = int(os.getenv("SIMULATION_PROCESSES", "0")) or os.cpu_count() or 1
+
+# Edge arrays the workers need; the text fields stay in the main process
+SHARED_FIELDS = ["capacity", "delivery_share"]
+
+# Process pool shared by all simulation runs, created on first use
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+# Worker side: shared memory blocks of the network currently attached
+# Tuple (spec, blocks, EdgeArrays)
+_ATTACHED = None
+
+# Output of one simulated day: volumes (T, E) int32, congestion (T, E) float32,
+# waiting area occupancy (S, T, A) int, for ensembles the per-edge summaries
+# (ensemble stat -> (T, E) float32, else None) and the street queue statistics
+# (waiting_queue.QUEUE_STATS -> (T,) float64). Ensemble volumes/congestion are the means.
+DayArrays = Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[Dict[str, np.ndarray]], Dict[str, np.ndarray]]
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Return the shared process pool, starting it on first use"""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            # spawn: the API process runs threads, which must not be forked
+            _POOL = ProcessPoolExecutor(max_workers=SIMULATION_PROCESSES, mp_context=get_context("spawn"))
+        return _POOL
+
+def _share_edge_arrays(edge_arrays: EdgeArrays) -> Tuple[list, Dict[str, tuple]]:
+    """
+    Copy the numeric edge arrays into shared memory blocks.
+
+    Returns:
+        Tuple (blocks, spec) where spec maps field -> (block name, shape, dtype) and is
+        all a task has to carry to reach the arrays
+    """
+    blocks = []
+    spec = {}
+    # The routed share, or the distance-based one if the network could not be routed
+    values = {"capacity": edge_arrays.capacity, "delivery_share": delivery_share(edge_arrays)}
+    for field in SHARED_FIELDS:
+        array = np.ascontiguousarray(values[field])
+        block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+        blocks.append(block)
+        spec[field] = (block.name, array.shape, array.dtype.str)
+    return blocks, spec
+
+def _release(blocks: list) -> None:
+    """Close and remove shared memory blocks"""
+    for block in blocks:
+        try:
+            block.close()
+            block.unlink()
+        except FileNotFoundError:
+            pass
+
+def _attach_edge_arrays(spec: Dict[str, tuple]) -> EdgeArrays:
+    """Worker side: map the shared edge arrays, reusing the mapping while the network is unchanged"""
+    global _ATTACHED
+    if _ATTACHED is not None and _ATTACHED[0] == spec:
+        return _ATTACHED[2]
+
+    if _ATTACHED is not None:
+        for block in _ATTACHED[1]:
+            block.close()
+        _ATTACHED = None
+
+    blocks = []
+    arrays = {}
+    for field, (name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=name)
+        blocks.append(block)
+        arrays[field] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+    edge_arrays = EdgeArrays(
+        segment_ids=[],
+        start_nodes=[],
+        end_nodes=[],
+        coordinates=[],
+        length=np.empty(0),
+        speed_limit=np.empty(0),
+        capacity=arrays["capacity"],
+        site_distance=np.empty(0),
+        delivery_share=arrays["delivery_share"]
+    )
+    _ATTACHED = (spec, blocks, edge_arrays)
+    return edge_arrays
+
+def _simulate_day_arrays(
+    edge_arrays: EdgeArrays,
+    times: List[time],
+    project_id: str,
+    day: date,
+    deliveries_per_hour: np.ndarray,
+    trucks: DayTrucks,
+    capacities: np.ndarray,
+    interval_minutes: int,
+    n_samples: int = 1
+) -> DayArrays:
+    """Simulate one day (or an ensemble of n_samples realizations) and return its compact arrays"""
+    # Streams keyed on (project, date, step), so a day gives the same result in any process
+    hours = [step.hour for step in times]
+    traffic_rngs = [step_rng(project_id, day, step, "traffic") for step in times]
+    # Truck queues span steps, so they draw from one stream per day
+    occupied, queue_stats = simulate_queue(
+        trucks, capacities, times, interval_minutes, day_rng(project_id, day, "waiting_queue"), n_samples
+    )
+
+    if n_samples == 1:
+        volumes, congestion = simulate_day(edge_arrays, hours, deliveries_per_hour, traffic_rngs)
+        return volumes.astype(np.int32), congestion.astype(np.float32), occupied, None, queue_stats
+
+    summary = simulate_day_ensemble(edge_arrays, hours, deliveries_per_hour, traffic_rngs, n_samples)
+    volumes = np.rint(summary["volume_mean"]).astype(np.int32)
+    return volumes, summary["congestion_mean"], occupied, summary, queue_stats
+
+def _day_task(
+    spec: Dict[str, tuple],
+    times: List[time],
+    project_id: str,
+    day: date,
+    deliveries_per_hour: np.ndarray,
+    trucks: DayTrucks,
+    capacities: np.ndarray,
+    interval_minutes: int,
+    n_samples: int
+) -> DayArrays:
+    """Worker entry point for one day"""
+    edge_arrays = _attach_edge_arrays(spec)
+    return _simulate_day_arrays(
+        edge_arrays, times, project_id, day, deliveries_per_hour, trucks, capacities, interval_minutes, n_samples
+    )
+
+def iter_days(
+    edge_arrays: EdgeArrays,
+    times: List[time],
+    project_id: str,
+    day_inputs: List[Tuple[date, np.ndarray, DayTrucks]],
+    capacities: np.ndarray,
+    interval_minutes: int = 60,
+    n_samples: int = 1,
+    processes: Optional[int] = None
+) -> Iterator[DayArrays]:
+    """
+    Simulate a list of independent days, in parallel if worthwhile.
+
+    Days are distributed over the process pool; only the shared memory spec and the
+    per-day deliveries are sent to the workers. Results are yielded in the order
+    of day_inputs and do not depend on the worker count. Closing the iterator early
+    cancels the pending days.
+
+    Args:
+        edge_arrays: Static edge attributes of the network
+        times: Start times of the simulated steps of a day
+        project_id: ID of the project (part of the random stream keys)
+        day_inputs: (date, deliveries active in each step, trucks of the day) for each day
+        capacities: Truck places per waiting area
+        interval_minutes: Length of a step
+        n_samples: Monte Carlo realizations per day (1 = single run)
+        processes: Worker count override (defaults to SIMULATION_PROCESSES)
+
+    Yields:
+        DayArrays per day
+    """
+    processes = SIMULATION_PROCESSES if processes is None else processes
+    if processes <= 1 or len(day_inputs) <= 1:
+        for day, deliveries_per_hour, trucks in day_inputs:
+            yield _simulate_day_arrays(
+                edge_arrays, times, project_id, day, deliveries_per_hour, trucks, capacities, interval_minutes, n_samples
+            )
+        return
+
+    blocks, spec = _share_edge_arrays(edge_arrays)
+    futures = []
+    try:
+        pool = _get_pool()
+        futures = [
+            pool.submit(
+                _day_task, spec, times, project_id, day, deliveries_per_hour, trucks, capacities, interval_minutes, n_samples
+            )
+            for day, deliveries_per_hour, trucks in day_inputs
+        ]
+        for future in futures:
+            yield future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+        # Let running tasks finish with the blocks before removing them
+        for future in futures:
+            if not future.cancelled():
+                try:
+                    future.exception()
+                except Exception:
+                    pass
+        _release(blocks)
@@ -1,32 +1,85 @@
-import os
 import json
+import queue
+import atexit
+import hashlib
+import threading
 import pandas as pd
-import geopandas as gpd
 import numpy as np
-import osmnx as ox
-from shapely.geometry import Point, LineString, Polygon
 from datetime import datetime, date, time, timedelta
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Callable, Iterator
 
 from app.models.simulation import SimulationRequest, SimulationResult, TrafficSegment, SimulationTimeStep
+from app.models.project import Project
 from app.services.project_service import get_project
+from app.services.network_features import get_feature_table, project_geometry_key
+from app.services.network_store import get_network
+from app.services import result_store, result_cache
+from app.services.traffic_rollups import update_rollups, query_rollups
+from app.services.traffic_engine import edge_arrays_from_gdf, model_parameters, CONGESTION_THRESHOLD
+from app.services.simulation_pool import iter_days
+from app.services.random_streams import step_rng
+from app.services.delivery_routes import get_delivery_share, routing_parameters
+from app.services.waiting_queue import QUEUE_STATS, queue_parameters, waiting_area_capacities
+from app.services.delivery_table import DeliveryTable, build_delivery_table, step_counts, bucket_counts
+from app.services.schedule_store import SHEET_TABLES, get_schedule_tables
+from app.services.spatial_index import ACCESS_ROUTE_TOLERANCE, get_segment_index, segments_within, route_geometries
 
-# In-memory storage for simulation results
-# Structure: project_id -> date -> hour -> SimulationResult
-SIMULATION_RESULTS = {}
+# Simulated days not yet written to the result store (partial results of running jobs),
+# kept as typed arrays; SimulationResult objects are only built when requested
+# Structure: project_id -> date -> (SegmentTable, DayRecord)
+# The record's fingerprint is None for synthetic fallback days
+PENDING_DAYS = {}
 
-def run_simulation(request: SimulationRequest) -> SimulationResult:
+# Index of the stored days, loaded once per project (see result_store.load_index)
+# Structure: project_id -> date -> {network_version, fingerprint, interval_minutes, times}
+RESULT_INDEX = {}
+
+# Traffic rollups of the stored days, loaded once per project (see result_store.load_rollups)
+# Structure: project_id -> level -> bucket key -> bucket
+RESULT_ROLLUPS = {}
+
+# Segment tables of the stored networks
+# Structure: (project_id, network_version) -> SegmentTable
+_SEGMENT_TABLES = {}
+
+# Serializes writes to the result store (simulation jobs run in worker threads)
+_SAVE_LOCK = threading.Lock()
+
+# Background writer: projects with pending days waiting to be saved
+_SAVE_QUEUE = queue.Queue()
+_SAVES_SCHEDULED = set()
+_SAVE_WORKER = None
+_SAVE_WORKER_LOCK = threading.Lock()
+
+# Called after each finished day with (date, number of time steps available for it)
+DayCallback = Callable[[date, int], None]
+
+# Shortest supported time step; finer grids only multiply the stored matrices
+MIN_INTERVAL_MINUTES = 5
+
+class SimulationCancelled(Exception):
+    """Raised when a running simulation is cancelled between two days."""
+    pass
+
+def run_simulation(
+    request: SimulationRequest,
+    on_day_complete: Optional[DayCallback] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> Optional[SimulationResult]:
     """
     Run a traffic simulation for a construction site project.
     
     Args:
         request: SimulationRequest with simulation parameters
+        on_day_complete: Optional callback invoked after each simulated day
+        cancel_event: Optional event; once set, the simulation stops before the next day
         
     Returns:
-        SimulationResult with the results of the simulation
+        SimulationResult of the first time step with results in the range (None if there is none)
         
     Raises:
         ValueError: If the project is not found or there's an issue with the input
+        SimulationCancelled: If cancel_event was set (results of finished days are kept)
     """
     # Get the project
     project = get_project(request.project_id)
@@ -37,105 +90,364 @@ def run_simulation(request: SimulationRequest) -> SimulationResult:
     if request.end_date < request.start_date:
         raise ValueError("End date must be after start date")
     
-    # Load the Excel data
-    excel_data = pd.read_excel(project.file_path)
+    # Parsed tables of the uploaded file (see schedule_store)
+    tables = get_schedule_tables(project.schedule_hash, project.file_path)
+    missing = [sheet for sheet, name in SHEET_TABLES.items() if name not in tables]
+    if missing:
+        raise ValueError(f"Project file has no {', '.join(missing)} sheet")
     
     # Parse time interval
     interval_hours = _parse_time_interval(request.time_interval)
     
     # Create simulation results
-    simulation_results = _simulate_traffic(
-        project_id=request.project_id,
-        polygon=project.polygon,
-        waiting_areas=project.waiting_areas,
-        access_routes=project.access_routes,
-        map_bounds=project.map_bounds,
-        deliveries=pd.read_excel(project.file_path, sheet_name="Deliveries"),
-        vehicles=pd.read_excel(project.file_path, sheet_name="Vehicles"),
-        schedule=pd.read_excel(project.file_path, sheet_name="Schedule"),
-        start_date=request.start_date,
-        end_date=request.end_date,
-        interval_hours=interval_hours
-    )
+    try:
+        _simulate_traffic(
+            project=project,
+            deliveries=tables["deliveries"],
+            vehicles=tables["vehicles"],
+            schedule=tables["phases"],
+            start_date=request.start_date,
+            end_date=request.end_date,
+            interval_hours=interval_hours,
+            n_samples=request.n_samples,
+            on_day_complete=on_day_complete,
+            cancel_event=cancel_event
+        )
+    finally:
+        # Save the new days in the background, including the finished days of a cancelled run.
+        # Until written they are served from PENDING_DAYS.
+        _schedule_save(request.project_id)
+    
+    # For simplicity, return the first result of the range
+    # In a real application, you might return a summary or a specific time step
+    current_date = request.start_date
+    while current_date <= request.end_date:
+        if _day_times(request.project_id, current_date):
+            return get_simulation_results(request.project_id, current_date)
+        current_date += timedelta(days=1)
+    return None
+
+def _record_day(project_id: str, table: result_store.SegmentTable, record: result_store.DayRecord) -> None:
+    """
+    Keep a finished day in PENDING_DAYS until saved.
+    
+    Days become visible right away, so running jobs expose partial results.
+    """
+    PENDING_DAYS.setdefault(project_id, {})[record.day] = (table, record)
+    # Steps materialized from an earlier run of the day are stale
+    result_cache.invalidate(lambda key: key[0] == project_id and key[1] == record.day)
+
+def _get_index(project_id: str) -> Dict[date, Dict[str, Any]]:
+    """Index of the stored days of a project, loaded on first use"""
+    if project_id not in RESULT_INDEX:
+        try:
+            # Convert results written in the old per-hour JSON layout first
+            if result_store.has_legacy_results(project_id):
+                result_store.migrate_legacy_results(project_id)
+            RESULT_INDEX[project_id] = result_store.load_index(project_id)
+        except Exception as e:
+            print(f"Error loading simulation results index: {str(e)}")
+            return {}
+    return RESULT_INDEX[project_id]
+
+def _stored_fingerprint(project_id: str, simulation_date: date) -> Optional[str]:
+    """Input fingerprint of a pending or stored day (None if unknown)"""
+    pending = PENDING_DAYS.get(project_id, {}).get(simulation_date)
+    if pending is not None:
+        return pending[1].fingerprint
+    entry = _get_index(project_id).get(simulation_date)
+    return entry.get("fingerprint") if entry else None
+
+def _day_times(project_id: str, simulation_date: date) -> List[time]:
+    """Sorted start times of the steps available for a day (pending or stored)"""
+    pending = PENDING_DAYS.get(project_id, {}).get(simulation_date)
+    if pending is not None:
+        return sorted(pending[1].times)
+    entry = _get_index(project_id).get(simulation_date)
+    return result_store.index_times(entry) if entry else []
+
+def _materialize_result(project_id: str, simulation_date: date, step_time: time) -> Optional[SimulationResult]:
+    """
+    Build the SimulationResult of a single pending or stored time step, through the LRU cache.
+    
+    Only the requested step is materialized; stored matrices are memory-mapped.
+    """
+    key = (project_id, simulation_date, step_time)
+    result = result_cache.get(key)
+    if result is not None:
+        return result
     
-    # Store the results in memory
-    for result in simulation_results:
-        result_date = result.time_steps[0].time.date()
-        result_hour = result.time_steps[0].time.hour
+    try:
+        pending = PENDING_DAYS.get(project_id, {}).get(simulation_date)
+        if pending is not None:
+            table, record = pending
+        else:
+            record = result_store.load_day(project_id, simulation_date)
+            if record is None:
+                return None
+            table = _segment_table(project_id, record.network_version)
+            if table is None:
+                return None
+        
+        t_idx = record.step_index(step_time)
+        if t_idx is None:
+            return None
         
-        if request.project_id not in SIMULATION_RESULTS:
-            SIMULATION_RESULTS[request.project_id] = {}
+        result = result_store.step_to_result(project_id, record, table, t_idx)
+        result_cache.put(key, result, result_cache.estimate_result_bytes(len(table), len(table.coords)))
+        return result
+    
+    except Exception as e:
+        print(f"Error loading simulation results: {str(e)}")
+        return None
+
+def _day_fingerprint(
+    simulation_date: date,
+    date_deliveries: Dict[str, Any],
+    phase: Any,
+    net_version: str,
+    geometry_key: str,
+    capacities: np.ndarray,
+    access_segments: np.ndarray,
+    times: List[time],
+    n_samples: int
+) -> str:
+    """
+    Hash of everything a simulated day depends on.
+    
+    A day is only simulated again if its deliveries (and their unloading times), its
+    construction phase, the road network, the project geometry or the model
+    parameters changed.
+    """
+    payload = json.dumps(
+        {
+            "date": simulation_date.isoformat(),
+            "deliveries": date_deliveries,
+            "phase": phase,
+            "network_version": net_version,
+            "geometry_key": geometry_key,
+            "waiting_areas": np.asarray(capacities).tolist(),
+            "access_segments": np.asarray(access_segments).tolist(),
+            "steps": [step.strftime("%H:%M") for step in times],
+            "n_samples": n_samples,
+            "model": model_parameters(),
+            "routing": routing_parameters(),
+            "queue": queue_parameters()
+        },
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+def _resolve_step(
+    project_id: str,
+    simulation_date: Optional[date] = None,
+    hour: Optional[int] = None,
+    minute: Optional[int] = None
+) -> Optional[Tuple[date, time]]:
+    """
+    Date and start time of the time step a results query refers to.
+    
+    Without a date the most recent day is used (its last step unless an hour is
+    given); without an hour the first step of the day. An hour without a minute
+    refers to the first step starting in that hour.
+    """
+    # Days come from the pending runs and the stored index; nothing is loaded yet
+    available_dates = set(PENDING_DAYS.get(project_id, {})) | set(_get_index(project_id))
+    
+    # If no date specified, return the most recent result
+    if simulation_date is None:
+        if not available_dates:
+            return None
         
-        if result_date not in SIMULATION_RESULTS[request.project_id]:
-            SIMULATION_RESULTS[request.project_id][result_date] = {}
+        # Get the most recent date
+        simulation_date = max(available_dates)
         
-        SIMULATION_RESULTS[request.project_id][result_date][result_hour] = result
+        if hour is None:
+            # Get the most recent step
+            times = _day_times(project_id, simulation_date)
+            return (simulation_date, times[-1]) if times else None
     
-    # Save the results to disk
-    _save_simulation_results_to_disk(request.project_id)
+    # If date is specified but doesn't exist
+    if simulation_date not in available_dates:
+        return None
     
-    # For simplicity, return the first result
-    # In a real application, you might return a summary or a specific time step
-    return simulation_results[0] if simulation_results else None
+    times = _day_times(project_id, simulation_date)
+    
+    # If hour is not specified, return the first step
+    if hour is None:
+        return (simulation_date, times[0]) if times else None
+    
+    # First step in the hour, or the step at hour:minute
+    matches = [t for t in times if t.hour == hour and (minute is None or t.minute == minute)]
+    if not matches:
+        return None
+    
+    return simulation_date, matches[0]
 
 def get_simulation_results(
     project_id: str,
     simulation_date: Optional[date] = None,
-    hour: Optional[int] = None
+    hour: Optional[int] = None,
+    minute: Optional[int] = None
 ) -> Optional[SimulationResult]:
     """
-    Get simulation results for a project, optionally filtered by date and hour.
+    Get simulation results for a project, optionally filtered by date and time.
     
     Args:
         project_id: ID of the project
         simulation_date: Date to filter results
         hour: Hour to filter results
+        minute: Minute of the step within the hour (sub-hourly runs; default: first step of the hour)
         
     Returns:
         SimulationResult if found, None otherwise
     """
-    if project_id not in SIMULATION_RESULTS:
-        # Try loading from disk first
-        _load_simulation_results_from_disk(project_id)
-        
-        if project_id not in SIMULATION_RESULTS:
-            return None
+    step = _resolve_step(project_id, simulation_date, hour, minute)
+    if step is None:
+        return None
+    simulation_date, step_time = step
     
-    # If no date specified, return the most recent result
-    if simulation_date is None:
-        if not SIMULATION_RESULTS[project_id]:
+    return _materialize_result(project_id, simulation_date, step_time)
+
+def _day_record(project_id: str, simulation_date: date) -> Optional[result_store.DayRecord]:
+    """Columnar record of a pending or stored day (stored matrices memory-mapped)"""
+    pending = PENDING_DAYS.get(project_id, {}).get(simulation_date)
+    if pending is None:
+        return result_store.load_day(project_id, simulation_date)
+    return pending[1]
+
+def get_simulation_values(
+    project_id: str,
+    simulation_date: Optional[date] = None,
+    hour: Optional[int] = None,
+    minute: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Get the compact results of one time step: per-segment value arrays without geometry.
+    
+    The arrays follow the segment order of the network given by network_version (see
+    get_simulation_network). Date and time are resolved as in get_simulation_results.
+    
+    Returns:
+        Dictionary matching SimulationValues, None if not found
+    """
+    step = _resolve_step(project_id, simulation_date, hour, minute)
+    if step is None:
+        return None
+    simulation_date, step_time = step
+    
+    try:
+        record = _day_record(project_id, simulation_date)
+        t_idx = record.step_index(step_time) if record is not None else None
+        if t_idx is None:
             return None
-        
-        # Get the most recent date
-        most_recent_date = max(SIMULATION_RESULTS[project_id].keys())
-        
-        if hour is None:
-            # Get the most recent hour
-            most_recent_hour = max(SIMULATION_RESULTS[project_id][most_recent_date].keys())
-            return SIMULATION_RESULTS[project_id][most_recent_date][most_recent_hour]
-        else:
-            # Get the specified hour
-            if hour in SIMULATION_RESULTS[project_id][most_recent_date]:
-                return SIMULATION_RESULTS[project_id][most_recent_date][hour]
-            else:
-                return None
+        return result_store.step_values(project_id, record, t_idx)
+    except Exception as e:
+        print(f"Error loading simulation values: {str(e)}")
+        return None
+
+def iter_day_records(project_id: str, start_date: date, end_date: date) -> Iterator[result_store.DayRecord]:
+    """
+    Columnar records of the simulated days in a date range, in date order.
     
-    # If date is specified but doesn't exist
-    if simulation_date not in SIMULATION_RESULTS[project_id]:
+    Days are loaded one at a time (stored matrices memory-mapped), so memory use does
+    not depend on the length of the range. Days without results are skipped.
+    """
+    available_dates = set(PENDING_DAYS.get(project_id, {})) | set(_get_index(project_id))
+    for simulation_date in sorted(d for d in available_dates if start_date <= d <= end_date):
+        record = _day_record(project_id, simulation_date)
+        if record is not None:
+            yield record
+
+def get_latest_network_version(project_id: str) -> Optional[str]:
+    """Network version of the most recent simulated day"""
+    pending = PENDING_DAYS.get(project_id, {})
+    index = _get_index(project_id)
+    available_dates = set(pending) | set(index)
+    if not available_dates:
         return None
     
-    # If hour is not specified, return the first hour
-    if hour is None:
-        if not SIMULATION_RESULTS[project_id][simulation_date]:
+    latest = max(available_dates)
+    if latest in pending:
+        return pending[latest][1].network_version
+    return index[latest]["network_version"]
+
+def _segment_table(project_id: str, version: str) -> Optional[result_store.SegmentTable]:
+    """Segment table of a stored network version, cached"""
+    table_key = (project_id, version)
+    if table_key not in _SEGMENT_TABLES:
+        table = result_store.load_segment_table(project_id, version)
+        if table is None:
             return None
-        first_hour = min(SIMULATION_RESULTS[project_id][simulation_date].keys())
-        return SIMULATION_RESULTS[project_id][simulation_date][first_hour]
+        _SEGMENT_TABLES[table_key] = table
+    return _SEGMENT_TABLES[table_key]
+
+def get_simulation_network(project_id: str, version: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the static segment payload (IDs, nodes, length, speed limit, geometry) of a network.
+    
+    A network version is a content hash, so its payload never changes.
     
-    # If hour is specified but doesn't exist
-    if hour not in SIMULATION_RESULTS[project_id][simulation_date]:
+    Returns:
+        Dictionary matching SimulationNetwork, None if the version is unknown
+    """
+    # Versions are hex digests; anything else must not reach the file system
+    if not version.isalnum():
         return None
     
-    return SIMULATION_RESULTS[project_id][simulation_date][hour]
+    try:
+        table = _segment_table(project_id, version)
+        return result_store.network_payload(table) if table is not None else None
+    except Exception as e:
+        print(f"Error loading simulation network: {str(e)}")
+        return None
+
+def get_traffic_rollups(
+    project_id: str,
+    level: str,
+    start_date: date,
+    end_date: date
+) -> List[Dict[str, Any]]:
+    """
+    Aggregated traffic of a project per hour, day, ISO week or month.
+    
+    Answered from the rollups written with the results; only the summary stats of
+    the stored time steps go into them, so no segment data is loaded.
+    
+    Args:
+        project_id: ID of the project
+        level: "hour", "day", "week" or "month"
+        start_date: First date of the range
+        end_date: Last date of the range
+        
+    Returns:
+        Buckets overlapping the range with total_traffic, peak_hour, peak_traffic,
+        average_congestion, deliveries and the number of simulated hours
+        
+    Raises:
+        ValueError: If the level is unknown
+    """
+    if project_id not in RESULT_ROLLUPS:
+        try:
+            _get_index(project_id)  # migrates legacy results first
+            RESULT_ROLLUPS[project_id] = result_store.load_rollups(project_id)
+        except Exception as e:
+            print(f"Error loading traffic rollups: {str(e)}")
+            RESULT_ROLLUPS[project_id] = {}
+    rollups = RESULT_ROLLUPS[project_id]
+    
+    # Days not written yet are rolled up on the fly, on a copy
+    pending = dict(PENDING_DAYS.get(project_id, {}))
+    if pending:
+        rollups = {level_name: dict(buckets) for level_name, buckets in rollups.items()}
+        update_rollups(
+            rollups,
+            {current_date: result_store.step_stats(record) for current_date, (_, record) in pending.items()},
+            {current_date: record.delivery_counts for current_date, (_, record) in pending.items()}
+        )
+    
+    return query_rollups(rollups, level, start_date, end_date)
 
 def _parse_time_interval(interval: str) -> float:
     """Parse a time interval string (e.g., "1h", "30m") to hours."""
@@ -149,221 +461,438 @@ def _parse_time_interval(interval: str) -> float:
         except ValueError:
             return 1.0  # Default to 1 hour
 
+def _clock_minutes(value: Optional[str], default: str) -> int:
+    """Minutes after midnight of an "HH:MM" time"""
+    hours, minutes = (value or default).split(":")[:2]
+    return int(hours) * 60 + int(minutes)
+
+def _time_grid(project: Project, interval_hours: float) -> Tuple[List[time], int]:
+    """
+    Start times of the simulated steps of a day and the step length in minutes.
+    
+    The grid runs from the project's simulation_start_time to its
+    simulation_end_time (both included when on the grid) in steps of interval_hours.
+    
+    Raises:
+        ValueError: If the interval is shorter than MIN_INTERVAL_MINUTES or the end is before the start
+    """
+    interval_minutes = int(round(interval_hours * 60))
+    if interval_minutes < MIN_INTERVAL_MINUTES:
+        raise ValueError(f"Time interval must be at least {MIN_INTERVAL_MINUTES} minutes")
+    
+    start = _clock_minutes(project.simulation_start_time, "06:00")
+    end = _clock_minutes(project.simulation_end_time, "18:00")
+    if end < start:
+        raise ValueError("Simulation end time must be after start time")
+    
+    minutes = np.arange(start, min(end, 24 * 60 - 1) + 1, interval_minutes)
+    return [time(hour=int(m) // 60, minute=int(m) % 60) for m in minutes], interval_minutes
+
 def _simulate_traffic(
-    project_id: str,
-    polygon: Dict[str, Any],
-    waiting_areas: List[Dict[str, Any]],
-    access_routes: List[Dict[str, Any]],
-    map_bounds: Dict[str, Any],
+    project: Project,
     deliveries: pd.DataFrame,
     vehicles: pd.DataFrame,
     schedule: pd.DataFrame,
     start_date: date,
     end_date: date,
-    interval_hours: float
-) -> List[SimulationResult]:
+    interval_hours: float,
+    n_samples: int = 1,
+    on_day_complete: Optional[DayCallback] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> List[date]:
     """
     Simulate traffic based on project data and deliveries.
     
     This is a simplified simulation for demonstration purposes.
     In a production environment, you would use SUMO or a more sophisticated traffic simulator.
     
+    With n_samples > 1 each day is simulated as a Monte Carlo ensemble; segments then
+    report the mean and carry percentile bands and the congestion exceedance probability.
+    
+    on_day_complete and cancel_event are checked day by day, see run_simulation.
+    
+    Finished days are kept in PENDING_DAYS as typed arrays (see _build_day_record).
+    
+    Days are simulated on the grid of _time_grid; the deliveries of all steps of a
+    day are counted in one array operation and the engine draws all steps at once.
+    
     Returns:
-        List of SimulationResult objects
+        Dates simulated by this run (unchanged stored days are not simulated again)
+    
+    Raises:
+        ValueError: If the time interval or the project's simulation times are invalid
     """
-    results = []
+    simulated_dates = []
+    project_id = project.id
+    waiting_areas = project.waiting_areas
+    map_bounds = project.map_bounds
+    current_date = start_date
+    times, interval_minutes = _time_grid(project, interval_hours)
+    first_minute = times[0].hour * 60 + times[0].minute
     
-    # Convert polygon to shapely geometry
-    site_polygon = _geojson_to_polygon(polygon)
+    # Dates, time windows and vehicle types of all deliveries, parsed once for the run
+    delivery_table = build_delivery_table(deliveries, vehicles)
     
-    # Get the map data using OSMnx
+    # Get the road network from the offline network store
     try:
-        # Get network around the construction site
-        center_point = site_polygon.centroid
+        network = get_network(map_bounds, project_id=project_id)
+        if network is None:
+            raise ValueError("No road network available for the project bounds")
         
-        # Extract the bounding box coordinates
-        north = map_bounds["coordinates"][0][0][1]
-        south = map_bounds["coordinates"][0][2][1]
-        east = map_bounds["coordinates"][0][1][0]
-        west = map_bounds["coordinates"][0][0][0]
+        # Convert to GeoDataFrame for easier processing
+        edges = network.to_edges_gdf()
         
-        # Get the road network
-        G = ox.graph_from_bbox(north, south, east, west, network_type="drive")
+        # Metric lengths, site distances and capacities, rebuilt only when the
+        # project geometry or the network change
+        features = get_feature_table(project, edges, network.version)
         
-        # Convert to GeoDataFrame for easier processing
-        nodes, edges = ox.graph_to_gdfs(G)
+        # Extract static edge attributes once for the whole run
+        edge_arrays = edge_arrays_from_gdf(edges, features)
         
-        # Calculate current date
-        current_date = start_date
-        while current_date <= end_date:
-            # Filter deliveries for the current date
-            date_deliveries = deliveries[deliveries['Date'] == pd.Timestamp(current_date)]
-            
+        # Delivery trips per edge along the truck routes (cached per network and
+        # project geometry); without routes the engine uses the distance to the site
+        edge_arrays.delivery_share = get_delivery_share(network, project.polygon, waiting_areas)
+        
+        # Static segment payload shared by all days of the run, written ahead so the
+        # network of pending days can be served right away
+        segment_table = result_store.make_segment_table(
+            segment_ids=edge_arrays.segment_ids,
+            start_nodes=edge_arrays.start_nodes,
+            end_nodes=edge_arrays.end_nodes,
+            length=edge_arrays.length,
+            speed_limit=edge_arrays.speed_limit,
+            coordinates=edge_arrays.coordinates
+        )
+        result_store.save_segment_table(project_id, segment_table)
+        
+        geometry_key = project_geometry_key(project)
+        access_segments = _access_route_segments(project, segment_table)
+        
+        # Deliveries active in each step of each delivery date, per vehicle type,
+        # and distinct deliveries per date and clock hour for the rollups
+        counts = step_counts(delivery_table, first_minute, interval_minutes, len(times))
+        distinct_counts = bucket_counts(delivery_table, first_minute, first_minute + len(times) * interval_minutes)
+        capacities = waiting_area_capacities(waiting_areas)
+        
+        # Prepare the inputs of all days: construction phase and deliveries per step.
+        # Days without an active phase are not simulated (phase None).
+        days = []
+        day = start_date
+        while day <= end_date:
             # Get the active construction phase
-            active_phase = schedule[(schedule['StartDate'] <= pd.Timestamp(current_date)) & 
-                                  (schedule['EndDate'] >= pd.Timestamp(current_date))]
+            active_phase = schedule[(schedule['StartDate'] <= pd.Timestamp(day)) & 
+                                  (schedule['EndDate'] >= pd.Timestamp(day))]
             
             if active_phase.empty:
-                current_date += timedelta(days=1)
-                continue
+                days.append((day, None, (None, None), None))
+            else:
+                # Deliveries of the date whose time window overlaps each step
+                deliveries_by_type = _day_counts(delivery_table, counts, day, len(times))
+                day_trucks = delivery_table.day_trucks(day)
+                phase = active_phase.iloc[0]['Phase']
+                fingerprint = _day_fingerprint(
+                    day, delivery_table.day_key(day), phase, network.version, geometry_key, capacities,
+                    access_segments, times, n_samples
+                )
+                days.append((day, phase, (deliveries_by_type, day_trucks), fingerprint))
             
-            # For each hour of the day (6:00 to 18:00)
-            for hour in range(6, 19):
-                # Create a datetime for this simulation step
-                sim_datetime = datetime.combine(current_date, time(hour=hour))
-                
-                # Filter deliveries for this time window
-                # Assuming TimeWindow is stored as strings like "08:00-10:00"
-                hour_deliveries = date_deliveries[date_deliveries['TimeWindow'].apply(
-                    lambda x: hour >= int(x.split('-')[0].split(':')[0]) and 
-                              hour <= int(x.split('-')[1].split(':')[0])
-                )]
-                
-                # Count deliveries by vehicle type
-                vehicle_counts = hour_deliveries['VehicleType'].value_counts().to_dict()
-                
-                # Simulate traffic on each road segment
-                traffic_segments = []
+            day += timedelta(days=1)
+        
+        # Stored days are reused when their input fingerprint is unchanged
+        unchanged = {
+            current_date
+            for current_date, phase, _, fingerprint in days
+            if phase is not None
+            and fingerprint is not None
+            and _stored_fingerprint(project_id, current_date) == fingerprint
+        }
+        
+        # Simulate the changed days (in parallel over the process pool for longer ranges)
+        day_arrays = iter_days(
+            edge_arrays,
+            times,
+            project_id,
+            [
+                (current_date, deliveries_by_type.sum(axis=1), day_trucks)
+                for current_date, phase, (deliveries_by_type, day_trucks), fingerprint in days
+                if phase is not None and current_date not in unchanged
+            ],
+            capacities,
+            interval_minutes,
+            n_samples=n_samples
+        )
+        try:
+            for current_date, phase, (deliveries_by_type, _), fingerprint in days:
+                # On failure, the fallback resumes at current_date
+                _check_cancelled(cancel_event)
                 
-                for idx, edge in edges.iterrows():
-                    # Basic traffic formula:
-                    # - Base traffic (higher during peak hours)
-                    # - Additional traffic from construction deliveries
-                    # - Congestion factor based on proximity to construction site
-                    
-                    # Calculate base traffic (simplified model)
-                    if 7 <= hour <= 9 or 16 <= hour <= 18:  # Peak hours
-                        base_traffic = np.random.randint(50, 200)  # Higher during peak
-                    else:
-                        base_traffic = np.random.randint(20, 100)
-                    
-                    # Calculate distance factor (traffic drops with distance from site)
-                    edge_line = edge['geometry']
-                    distance_to_site = edge_line.distance(site_polygon)
-                    distance_factor = max(0.1, min(1.0, 1.0 / (0.1 + distance_factor)))
-                    
-                    # Calculate additional traffic from deliveries
-                    delivery_traffic = sum(vehicle_counts.values()) * distance_factor * 2  # Each delivery is entry + exit
-                    
-                    # Total traffic
-                    total_traffic = int(base_traffic + delivery_traffic)
-                    
-                    # Calculate congestion level (0.0 to 1.0)
-                    # Simplified: assume capacity is proportional to road length
-                    capacity = edge_line.length * 5  # Simplified capacity model
-                    congestion_level = min(1.0, total_traffic / capacity) if capacity > 0 else 0.0
-                    
-                    # Create a TrafficSegment
-                    segment = TrafficSegment(
-                        segment_id=f"{idx[0]}_{idx[1]}",
-                        start_node=str(idx[0]),
-                        end_node=str(idx[1]),
-                        length=edge_line.length,
-                        speed_limit=edge.get('speed_kph', 50),
-                        traffic_volume=total_traffic,
-                        congestion_level=congestion_level,
-                        coordinates=[[p[0], p[1]] for p in edge_line.coords]
+                # Unchanged days keep their stored results, nothing to load
+                if phase is not None and current_date not in unchanged:
+                    volumes, congestion, occupied, ensemble, queue_stats = next(day_arrays)
+                    record = _build_day_record(
+                        project_id=project_id,
+                        simulation_date=current_date,
+                        times=times,
+                        interval_minutes=interval_minutes,
+                        network_version=segment_table.version,
+                        volumes=volumes,
+                        congestion=congestion,
+                        occupied=occupied,
+                        capacities=capacities,
+                        queue_stats=queue_stats,
+                        deliveries_by_type=deliveries_by_type,
+                        vehicle_types=delivery_table.vehicle_types,
+                        delivery_counts=_delivery_bucket_counts(delivery_table, distinct_counts, current_date),
+                        construction_phase=phase,
+                        fingerprint=fingerprint,
+                        access_segments=access_segments,
+                        ensemble=ensemble,
+                        n_samples=n_samples
                     )
-                    
-                    traffic_segments.append(segment)
-                
-                # Calculate waiting area status
-                waiting_areas_status = {}
-                for i, area in enumerate(waiting_areas):
-                    # Simulate random occupancy
-                    capacity = 5  # Assumed capacity
-                    occupied = min(capacity, np.random.poisson(len(hour_deliveries) * 0.3))
-                    
-                    waiting_areas_status[f"area_{i}"] = {
-                        "capacity": capacity,
-                        "occupied": occupied,
-                        "available": capacity - occupied
-                    }
+                    _record_day(project_id, segment_table, record)
+                    simulated_dates.append(current_date)
                 
-                # Create a time step
-                time_step = SimulationTimeStep(
-                    time=sim_datetime,
-                    traffic_segments=traffic_segments,
-                    waiting_areas_status=waiting_areas_status
-                )
-                
-                # Create traffic volumes summary
-                traffic_volumes = {}
-                congestion_points = []
-                
-                for segment in traffic_segments:
-                    traffic_volumes[segment.segment_id] = segment.traffic_volume
-                    
-                    if segment.congestion_level > 0.8:  # High congestion
-                        congestion_points.append({
-                            "segment_id": segment.segment_id,
-                            "congestion_level": segment.congestion_level,
-                            "coordinates": segment.coordinates
-                        })
-                
-                # Calculate summary statistics
-                stats = {
-                    "total_traffic": sum(traffic_volumes.values()),
-                    "average_congestion": sum(s.congestion_level for s in traffic_segments) / len(traffic_segments) if traffic_segments else 0,
-                    "deliveries_count": len(hour_deliveries),
-                    "construction_phase": active_phase.iloc[0]['Phase'] if not active_phase.empty else None
-                }
-                
-                # Create a simulation result
-                result = SimulationResult(
-                    id=f"{project_id}_{current_date.isoformat()}_{hour}",
-                    project_id=project_id,
-                    execution_time=datetime.now(),
-                    time_steps=[time_step],
-                    traffic_volumes=traffic_volumes,
-                    congestion_points=congestion_points,
-                    stats=stats
-                )
-                
-                results.append(result)
+                if on_day_complete is not None:
+                    on_day_complete(current_date, len(_day_times(project_id, current_date)) if phase is not None else 0)
             
-            # Move to the next day
-            current_date += timedelta(days=1)
+            current_date = end_date + timedelta(days=1)
+        finally:
+            # Cancels the days still pending in the pool
+            day_arrays.close()
     
+    except SimulationCancelled:
+        raise
     except Exception as e:
         # In a production system, you would log this error
         print(f"Error in traffic simulation: {str(e)}")
-        # Fallback to a very simple simulation if OSMnx fails
-        results = _simple_fallback_simulation(
-            project_id, start_date, end_date, deliveries
+        # Fallback to a very simple simulation if no network is available,
+        # continuing after the days that were already simulated
+        simulated_dates += _simple_fallback_simulation(
+            project_id, current_date, end_date, delivery_table, times,
+            on_day_complete=on_day_complete,
+            cancel_event=cancel_event
         )
     
-    return results
+    return simulated_dates
+
+def _build_day_record(
+    project_id: str,
+    simulation_date: date,
+    times: List[time],
+    interval_minutes: int,
+    network_version: str,
+    volumes: np.ndarray,
+    congestion: np.ndarray,
+    occupied: np.ndarray,
+    capacities: np.ndarray,
+    queue_stats: Dict[str, np.ndarray],
+    deliveries_by_type: np.ndarray,
+    vehicle_types: List[str],
+    construction_phase: Optional[str],
+    fingerprint: Optional[str],
+    delivery_counts: Optional[Dict[str, Any]] = None,
+    access_segments: Optional[np.ndarray] = None,
+    ensemble: Optional[Dict[str, np.ndarray]] = None,
+    n_samples: int = 1
+) -> result_store.DayRecord:
+    """
+    Pack one simulated day into a DayRecord: the engine's (T, E) value matrices plus
+    per-step metadata (summary stats, waiting area status, congested segment indices).
+    
+    Segments are referenced by their index in the network's SegmentTable; no
+    per-segment objects are created. Summary stats are reduced over all steps at once.
+    
+    Args:
+        times: Start time of each step
+        interval_minutes: Length of a step
+        volumes: Traffic volume per step and edge (int32, ensemble mean for ensembles)
+        congestion: Congestion level per step and edge (float32)
+        occupied: Peak waiting area occupancy per realization, step and area
+        capacities: Truck places per waiting area
+        queue_stats: Street queue statistics per step (see waiting_queue.simulate_queue)
+        deliveries_by_type: Number of deliveries per simulated step and vehicle type (T, V)
+        vehicle_types: Vehicle type of each column of deliveries_by_type
+        delivery_counts: Distinct deliveries of the day and per clock hour, for the
+            rollups (see _delivery_bucket_counts)
+        access_segments: Positions of the segments on the project's access routes
+        ensemble: Ensemble runs: stat -> (T, E) per-edge summaries
+    """
+    volumes = np.asarray(volumes, dtype=np.int32)
+    congestion = np.asarray(congestion, dtype=np.float32)
+    execution_time = datetime.now().isoformat()
+    has_edges = congestion.shape[1] > 0
+    
+    deliveries_per_step = deliveries_by_type.sum(axis=1)
+    total_traffic = volumes.sum(axis=1, dtype=np.int64)
+    average_congestion = congestion.mean(axis=1, dtype=np.float64) if has_edges else np.zeros(len(times))
+    access_traffic = None
+    if access_segments is not None:
+        access_traffic = volumes[:, access_segments].sum(axis=1, dtype=np.int64)
+    if ensemble is not None:
+        exceedance = np.asarray(ensemble["exceedance_probability"], dtype=np.float64)
+        congestion_p90 = np.asarray(ensemble["congestion_p90"], dtype=np.float64)
+    
+    steps = []
+    for t_idx, step_time in enumerate(times):
+        sim_datetime = datetime.combine(simulation_date, step_time)
+        
+        # Calculate summary statistics
+        stats = {
+            "total_traffic": int(total_traffic[t_idx]),
+            "average_congestion": float(average_congestion[t_idx]) if has_edges else 0,
+            "deliveries_count": int(deliveries_per_step[t_idx]),
+            "deliveries_by_vehicle_type": {
+                vehicle_types[v_idx]: int(deliveries_by_type[t_idx, v_idx])
+                for v_idx in np.flatnonzero(deliveries_by_type[t_idx])
+            },
+            "construction_phase": construction_phase,
+            "queue_length_max": float(queue_stats["queue_length_max"][t_idx]),
+            "waiting_time_mean": float(queue_stats["waiting_time_mean"][t_idx])
+        }
+        if access_traffic is not None:
+            stats["access_traffic"] = int(access_traffic[t_idx])
+        if ensemble is not None:
+            stats.update({
+                "n_samples": n_samples,
+                "average_congestion_p90": float(congestion_p90[t_idx].mean()) if has_edges else 0,
+                "expected_congested_segments": float(exceedance[t_idx].sum()),
+                "max_exceedance_probability": float(exceedance[t_idx].max()) if has_edges else 0
+            })
+        
+        steps.append({
+            "id": f"{project_id}_{simulation_date.isoformat()}_{_step_suffix(step_time)}",
+            "time": sim_datetime.isoformat(),
+            "execution_time": execution_time,
+            "stats": stats,
+            # Waiting area status from the simulated occupancy, plus the trucks
+            # queueing on the street when all areas are full
+            "waiting_areas_status": {
+                **{
+                    f"area_{i}": _waiting_area_status(occupied[:, t_idx, i], int(capacities[i]))
+                    for i in range(occupied.shape[2])
+                },
+                "street_queue": {name: float(queue_stats[name][t_idx]) for name in QUEUE_STATS}
+            },
+            # High congestion
+            "congested": np.flatnonzero(congestion[t_idx] > CONGESTION_THRESHOLD).tolist()
+        })
+    
+    return result_store.DayRecord(
+        day=simulation_date,
+        network_version=network_version,
+        volumes=volumes,
+        congestion=congestion,
+        steps=steps,
+        fingerprint=fingerprint,
+        ensemble=None if ensemble is None else {
+            name: np.asarray(values, dtype=np.float32) for name, values in ensemble.items()
+        },
+        interval_minutes=interval_minutes,
+        delivery_counts=delivery_counts
+    )
+
+def _day_counts(delivery_table: DeliveryTable, counts: np.ndarray, day: date, n_steps: int) -> np.ndarray:
+    """Deliveries per step and vehicle type of one date from the step_counts of the run (T, V)"""
+    position = delivery_table.day_index(day)
+    if position is None:
+        return np.zeros((n_steps, len(delivery_table.vehicle_types)), dtype=np.int64)
+    return counts[position]
+
+def _delivery_bucket_counts(delivery_table: DeliveryTable, distinct_counts: tuple, day: date) -> Dict[str, Any]:
+    """Distinct deliveries of one date and per clock hour ("HH", non-zero only) from the bucket_counts of the run"""
+    day_totals, first_hour, hour_counts = distinct_counts
+    position = delivery_table.day_index(day)
+    if position is None:
+        return {"day": 0, "hours": {}}
+    return {
+        "day": int(day_totals[position]),
+        "hours": {
+            f"{first_hour + h_idx:02d}": int(hour_counts[position, h_idx])
+            for h_idx in np.flatnonzero(hour_counts[position])
+        }
+    }
+
+def _step_suffix(step_time: time) -> str:
+    """Step part of a result ID: the hour for steps on the full hour, else hour_minute"""
+    return str(step_time.hour) if step_time.minute == 0 else f"{step_time.hour}_{step_time.minute:02d}"
+
+def _access_route_segments(project: Project, segment_table: result_store.SegmentTable) -> np.ndarray:
+    """Positions of the segments within ACCESS_ROUTE_TOLERANCE of the project's access routes"""
+    routes = route_geometries(project.access_routes)
+    if not routes:
+        return np.array([], dtype=np.int64)
+    index = get_segment_index(segment_table.version, segment_table.coords, segment_table.offsets)
+    return segments_within(index, routes, ACCESS_ROUTE_TOLERANCE)
+
+def _waiting_area_status(occupied: np.ndarray, capacity: int) -> Dict[str, Any]:
+    """
+    Status of one waiting area in one step from its peak occupancy realizations.
+    
+    A single realization is reported as is; for ensembles the median occupancy is
+    reported together with its P90 and the probability that the area is full.
+    """
+    if len(occupied) == 1:
+        value = int(occupied[0])
+        return {
+            "capacity": capacity,
+            "occupied": value,
+            "available": capacity - value
+        }
+    
+    median = int(np.rint(np.median(occupied)))
+    return {
+        "capacity": capacity,
+        "occupied": median,
+        "available": capacity - median,
+        "occupied_p90": float(np.percentile(occupied, 90)),
+        "full_probability": float(np.mean(occupied >= capacity))
+    }
+
+def _check_cancelled(cancel_event: Optional[threading.Event]) -> None:
+    """Raise SimulationCancelled if the given event has been set."""
+    if cancel_event is not None and cancel_event.is_set():
+        raise SimulationCancelled()
 
 def _simple_fallback_simulation(
     project_id: str,
     start_date: date,
     end_date: date,
-    deliveries: pd.DataFrame
-) -> List[SimulationResult]:
+    delivery_table: DeliveryTable,
+    times: List[time],
+    on_day_complete: Optional[DayCallback] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> List[date]:
     """
-    A very simple fallback simulation if the OSMnx-based simulation fails.
-    This creates synthetic data without using real road networks.
+    A very simple fallback simulation if the network-based simulation fails.
+    This creates synthetic data without using real road networks, on the same
+    time grid as the network-based simulation.
+    
+    Returns:
+        Simulated dates
     """
-    results = []
+    simulated_dates = []
+    first_minute = times[0].hour * 60 + times[0].minute
+    interval_minutes = result_store.interval_minutes(times)
+    counts = step_counts(delivery_table, first_minute, interval_minutes, len(times))
+    distinct_counts = bucket_counts(delivery_table, first_minute, first_minute + len(times) * interval_minutes)
     
     # Calculate current date
     current_date = start_date
     while current_date <= end_date:
-        # Filter deliveries for the current date
-        date_deliveries = deliveries[deliveries['Date'] == pd.Timestamp(current_date)]
+        _check_cancelled(cancel_event)
         
-        # For each hour of the day (6:00 to 18:00)
-        for hour in range(6, 19):
+        # Deliveries of the current date overlapping each step
+        deliveries_per_step = _day_counts(delivery_table, counts, current_date, len(times)).sum(axis=1)
+        day_results = []
+        
+        # For each step of the day
+        for t_idx, step_time in enumerate(times):
             # Create a datetime for this simulation step
-            sim_datetime = datetime.combine(current_date, time(hour=hour))
+            sim_datetime = datetime.combine(current_date, step_time)
+            n_deliveries = int(deliveries_per_step[t_idx])
             
-            # Filter deliveries for this time window
-            # Assuming TimeWindow is stored as strings like "08:00-10:00"
-            hour_deliveries = date_deliveries[date_deliveries['TimeWindow'].apply(
-                lambda x: hour >= int(x.split('-')[0].split(':')[0]) and 
-                        hour <= int(x.split('-')[1].split(':')[0])
-            )]
+            # Reproducible draws for this project, date and step
+            rng = step_rng(project_id, current_date, step_time, "fallback")
             
             # Create synthetic traffic segments
             traffic_segments = []
@@ -374,8 +903,8 @@ def _simple_fallback_simulation(
                     end_node=f"node_b_{i}",
                     length=100 + i * 50,  # Synthetic length
                     speed_limit=50,
-                    traffic_volume=50 + len(hour_deliveries) * 2 + np.random.randint(0, 50),
-                    congestion_level=min(1.0, (0.3 + len(hour_deliveries) * 0.05 + np.random.random() * 0.2)),
+                    traffic_volume=50 + n_deliveries * 2 + int(rng.integers(0, 50)),
+                    congestion_level=min(1.0, (0.3 + n_deliveries * 0.05 + rng.random() * 0.2)),
                     coordinates=[[0, 0], [100 + i * 50, 0]]  # Synthetic coordinates
                 )
                 traffic_segments.append(segment)
@@ -384,8 +913,8 @@ def _simple_fallback_simulation(
             waiting_areas_status = {
                 "area_0": {
                     "capacity": 5,
-                    "occupied": min(5, len(hour_deliveries)),
-                    "available": max(0, 5 - len(hour_deliveries))
+                    "occupied": min(5, n_deliveries),
+                    "available": max(0, 5 - n_deliveries)
                 }
             }
             
@@ -413,13 +942,13 @@ def _simple_fallback_simulation(
             stats = {
                 "total_traffic": sum(traffic_volumes.values()),
                 "average_congestion": sum(s.congestion_level for s in traffic_segments) / len(traffic_segments),
-                "deliveries_count": len(hour_deliveries),
+                "deliveries_count": n_deliveries,
                 "construction_phase": "Unknown Phase"  # Since we don't have the schedule in this fallback
             }
             
             # Create a simulation result
             result = SimulationResult(
-                id=f"{project_id}_{current_date.isoformat()}_{hour}",
+                id=f"{project_id}_{current_date.isoformat()}_{_step_suffix(step_time)}",
                 project_id=project_id,
                 execution_time=datetime.now(),
                 time_steps=[time_step],
@@ -428,81 +957,73 @@ def _simple_fallback_simulation(
                 stats=stats
             )
             
-            results.append(result)
+            day_results.append(result)
+        
+        table, record = result_store.results_to_day_records(day_results)[0]
+        record.delivery_counts = _delivery_bucket_counts(delivery_table, distinct_counts, current_date)
+        _record_day(project_id, table, record)
+        simulated_dates.append(current_date)
+        if on_day_complete is not None:
+            on_day_complete(current_date, len(day_results))
         
         # Move to the next day
         current_date += timedelta(days=1)
     
-    return results
-
-def _geojson_to_polygon(geojson: Dict[str, Any]) -> Polygon:
-    """Convert a GeoJSON polygon to a shapely Polygon."""
-    if geojson["type"] == "Polygon":
-        return Polygon(geojson["coordinates"][0])
-    elif geojson["type"] == "Feature" and geojson["geometry"]["type"] == "Polygon":
-        return Polygon(geojson["geometry"]["coordinates"][0])
-    else:
-        raise ValueError(f"Unsupported GeoJSON type: {geojson['type']}")
+    return simulated_dates
 
 def _save_simulation_results_to_disk(project_id: str) -> None:
-    """Save simulation results to disk"""
+    """Write the pending days of a project to the columnar result store"""
     try:
-        if project_id not in SIMULATION_RESULTS:
-            return
-        
-        # Create directory structure
-        sim_dir = f"data/simulations/{project_id}"
-        os.makedirs(sim_dir, exist_ok=True)
-        
-        # Save each date's results
-        for date_str, hours in SIMULATION_RESULTS[project_id].items():
-            date_dir = f"{sim_dir}/{date_str}"
-            os.makedirs(date_dir, exist_ok=True)
+        with _SAVE_LOCK:
+            pending = dict(PENDING_DAYS.get(project_id, {}))
+            if not pending:
+                return
+            
+            entries = result_store.save_day_records(project_id, list(pending.values()))
             
-            for hour, result in hours.items():
-                file_path = f"{date_dir}/{hour}.json"
-                with open(file_path, "w") as f:
-                    # Convert to dict and serialize
-                    json.dump(result.dict(), f, default=str, indent=2)
+            # Stored from now on: update the index, drop stale cached hours, then
+            # release the pending copies (readers check pending days first)
+            _get_index(project_id).update(entries)
+            RESULT_ROLLUPS.pop(project_id, None)
+            result_cache.invalidate(lambda key: key[0] == project_id and key[1] in entries)
+            for current_date in entries:
+                if PENDING_DAYS[project_id].get(current_date) is pending[current_date]:
+                    del PENDING_DAYS[project_id][current_date]
         
     except Exception as e:
         print(f"Error saving simulation results: {str(e)}")
 
-def _load_simulation_results_from_disk(project_id: str) -> None:
-    """Load simulation results from disk"""
-    try:
-        # Check if the directory exists
-        sim_dir = f"data/simulations/{project_id}"
-        if not os.path.exists(sim_dir):
+def _schedule_save(project_id: str) -> None:
+    """Queue the pending days of a project for the background writer"""
+    global _SAVE_WORKER
+    with _SAVE_WORKER_LOCK:
+        if _SAVE_WORKER is None:
+            _SAVE_WORKER = threading.Thread(target=_save_worker_loop, name="simulation-result-writer", daemon=True)
+            _SAVE_WORKER.start()
+        if project_id in _SAVES_SCHEDULED:
             return
-        
-        # Initialize the project
-        SIMULATION_RESULTS[project_id] = {}
-        
-        # Iterate through date directories
-        for date_dir in os.listdir(sim_dir):
-            date_path = os.path.join(sim_dir, date_dir)
-            
-            if os.path.isdir(date_path):
-                try:
-                    # Parse the date
-                    current_date = datetime.strptime(date_dir, "%Y-%m-%d").date()
-                    SIMULATION_RESULTS[project_id][current_date] = {}
-                    
-                    # Iterate through hour files
-                    for hour_file in os.listdir(date_path):
-                        if hour_file.endswith(".json"):
-                            hour = int(hour_file.split(".")[0])
-                            file_path = os.path.join(date_path, hour_file)
-                            
-                            with open(file_path, "r") as f:
-                                result_dict = json.load(f)
-                                result = SimulationResult(**result_dict)
-                                SIMULATION_RESULTS[project_id][current_date][hour] = result
-                                
-                except ValueError:
-                    # Skip if directory name is not a valid date
-                    continue
-        
-    except Exception as e:
-        print(f"Error loading simulation results: {str(e)}") 
\ No newline at end of file
+        _SAVES_SCHEDULED.add(project_id)
+    _SAVE_QUEUE.put(project_id)
+
+def _save_worker_loop() -> None:
+    """Write queued projects to the result store, forever"""
+    while True:
+        project_id = _SAVE_QUEUE.get()
+        try:
+            with _SAVE_WORKER_LOCK:
+                # Days recorded from now on need another save
+                _SAVES_SCHEDULED.discard(project_id)
+            _save_simulation_results_to_disk(project_id)
+        finally:
+            _SAVE_QUEUE.task_done()
+
+def flush_simulation_results() -> None:
+    """Block until all pending days are written to the result store"""
+    if _SAVE_WORKER is not None:
+        _SAVE_QUEUE.join()
+    # Days of runs that never scheduled a save (or failed to write) are written here
+    for project_id in list(PENDING_DAYS):
+        _save_simulation_results_to_disk(project_id)
+
+# Do not lose days still queued when the process exits
+atexit.register(flush_simulation_results)
@@ -0,0 +1,108 @@
+import threading
+import numpy as np
+import shapely
+from collections import OrderedDict
+from dataclasses import dataclass
+from shapely.geometry import shape
+from typing import Any, Dict, List, Optional, Sequence
+
+# Distance (degrees, about 35-55 m) within which a segment counts as lying on an access route
+ACCESS_ROUTE_TOLERANCE = 0.0005
+
+# Number of network versions whose index is kept in memory
+MAX_INDEXES = 8
+
+# Least recently used first
+# Dictionary: network version -> SegmentIndex
+_INDEXES = OrderedDict()
+_LOCK = threading.Lock()
+
+@dataclass
+class SegmentIndex:
+    """STRtree over the segment geometries of one network version."""
+    version: Optional[str]
+    tree: shapely.STRtree
+    positions: np.ndarray  # int64, segment position of each tree geometry
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+def build_segment_index(coords: np.ndarray, offsets: np.ndarray, version: Optional[str] = None) -> SegmentIndex:
+    """
+    Build the index from flat segment vertices.
+
+    Args:
+        coords: (M, 2) lon/lat of all segment vertices
+        offsets: (E + 1) segment i spans coords[offsets[i]:offsets[i + 1]]
+        version: Network version the index belongs to
+
+    Segments with fewer than two vertices have no line geometry and are left out.
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    counts = np.diff(np.asarray(offsets, dtype=np.int64))
+    positions = np.flatnonzero(counts >= 2)
+
+    keep = np.repeat(counts >= 2, counts)
+    indices = np.repeat(np.arange(len(positions)), counts[positions])
+    lines = shapely.linestrings(coords[keep], indices=indices) if len(positions) else np.array([], dtype=object)
+
+    return SegmentIndex(version=version, tree=shapely.STRtree(lines), positions=positions)
+
+def get_segment_index(version: str, coords: np.ndarray, offsets: np.ndarray) -> SegmentIndex:
+    """Index of a network version, built on first use and kept for the MAX_INDEXES most recent versions."""
+    with _LOCK:
+        index = _INDEXES.get(version)
+        if index is not None:
+            _INDEXES.move_to_end(version)
+            return index
+
+    index = build_segment_index(coords, offsets, version)
+    with _LOCK:
+        _INDEXES[version] = index
+        while len(_INDEXES) > MAX_INDEXES:
+            _INDEXES.popitem(last=False)
+    return index
+
+def segments_index(segments: List[Dict[str, Any]]) -> SegmentIndex:
+    """Unversioned index over segment dictionaries with [[lon, lat], ...] coordinates."""
+    counts = [len(seg.get("coordinates", [])) for seg in segments]
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    coords = [pt for seg in segments for pt in seg.get("coordinates", [])]
+    return build_segment_index(np.array(coords, dtype=np.float64).reshape(-1, 2), offsets)
+
+def route_geometries(routes: Sequence[Dict[str, Any]]) -> List[Any]:
+    """
+    Shapely lines of GeoJSON access routes.
+
+    Polygons stand for their exterior ring; invalid or empty routes are skipped.
+    """
+    geometries = []
+    for route in routes or []:
+        if not route or "coordinates" not in route:
+            continue
+        try:
+            if route.get("type") == "LineString":
+                geometries.append(shapely.LineString(route["coordinates"]))
+            elif route.get("type") == "Polygon":
+                geometries.append(shapely.LineString(route["coordinates"][0]))
+            else:
+                geometries.append(shape(route))
+        except Exception:
+            continue
+    return geometries
+
+def segments_within(index: SegmentIndex, geometries: Sequence[Any], tolerance: float) -> np.ndarray:
+    """
+    Positions of the segments within `tolerance` of any of the geometries.
+
+    Candidates come from the tree's bounding boxes, so only segments near a
+    geometry are measured exactly.
+
+    Returns:
+        Sorted int64 segment positions
+    """
+    if not len(index) or not geometries:
+        return np.array([], dtype=np.int64)
+
+    pairs = index.tree.query(np.asarray(geometries, dtype=object), predicate="dwithin", distance=tolerance)
+    return np.unique(index.positions[pairs[1]])
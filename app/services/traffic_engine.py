@@ -0,0 +1,221 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# Hours that get the higher base traffic range (morning and evening peak)
+PEAK_HOURS = {7, 8, 9, 16, 17, 18}
+
+# Base traffic ranges (vehicles per edge and hour), upper bound exclusive
+PEAK_BASE_TRAFFIC = (50, 200)
+OFFPEAK_BASE_TRAFFIC = (20, 100)
+
+# Segments above this congestion level are reported as congestion points
+CONGESTION_THRESHOLD = 0.8
+
+# Distance (metres) over which delivery traffic decays with proximity to the site
+DISTANCE_DECAY_M = 100.0
+
+# Truck places of a waiting area whose capacity cannot be measured (see waiting_queue)
+WAITING_AREA_CAPACITY = 5
+
+# Percentiles and summaries kept per edge and hour in ensemble runs
+ENSEMBLE_PERCENTILES = [50, 90, 95]
+ENSEMBLE_STATS = (
+    ["volume_mean"] + [f"volume_p{q}" for q in ENSEMBLE_PERCENTILES]
+    + ["congestion_mean"] + [f"congestion_p{q}" for q in ENSEMBLE_PERCENTILES]
+    + ["exceedance_probability"]  # share of realizations above CONGESTION_THRESHOLD
+)
+
+# Bump when the model changes in a way the parameters below do not capture;
+# stored days with another version are simulated again
+MODEL_VERSION = 5
+
+def model_parameters() -> dict:
+    """All model settings a simulated day depends on (part of the day fingerprint)."""
+    return {
+        "model_version": MODEL_VERSION,
+        "peak_hours": sorted(PEAK_HOURS),
+        "peak_base_traffic": list(PEAK_BASE_TRAFFIC),
+        "offpeak_base_traffic": list(OFFPEAK_BASE_TRAFFIC),
+        "congestion_threshold": CONGESTION_THRESHOLD,
+        "distance_decay_m": DISTANCE_DECAY_M,
+        "waiting_area_capacity": WAITING_AREA_CAPACITY
+    }
+
+@dataclass
+class EdgeArrays:
+    """Static edge attributes of a road network held as aligned NumPy arrays."""
+    segment_ids: List[str]
+    start_nodes: List[str]
+    end_nodes: List[str]
+    coordinates: List[List[List[float]]]  # [[lon, lat], ...] per edge
+    length: np.ndarray         # float64, metres
+    speed_limit: np.ndarray    # float64, km/h
+    capacity: np.ndarray       # float64, vehicles per hour
+    site_distance: np.ndarray  # float64, metres to the construction site
+    delivery_share: Optional[np.ndarray] = None  # float64, trips per delivery (see delivery_routes)
+
+    def __len__(self) -> int:
+        return len(self.capacity)
+
+def edge_arrays_from_gdf(edges: pd.DataFrame, features: pd.DataFrame) -> EdgeArrays:
+    """
+    Combine an OSMnx edge GeoDataFrame with its precomputed feature table.
+
+    Lengths, distances and capacities come from the metric feature table; only the
+    WGS84 coordinate lists for the output are taken from the edge geometries.
+
+    Args:
+        edges: Edge GeoDataFrame as returned by ox.graph_to_gdfs, in EPSG:4326
+        features: Feature table aligned with the edges (see network_features)
+
+    Returns:
+        EdgeArrays for all edges, in the order of the GeoDataFrame
+    """
+    return EdgeArrays(
+        segment_ids=features["segment_id"].tolist(),
+        start_nodes=features["start_node"].tolist(),
+        end_nodes=features["end_node"].tolist(),
+        coordinates=[[[p[0], p[1]] for p in geom.coords] for geom in edges.geometry],
+        length=features["length_m"].to_numpy(dtype=np.float64),
+        speed_limit=features["speed_kph"].to_numpy(dtype=np.float64),
+        capacity=features["capacity"].to_numpy(dtype=np.float64),
+        site_distance=features["site_distance_m"].to_numpy(dtype=np.float64)
+    )
+
+def _base_traffic_range(hours: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Lower (inclusive) and upper (exclusive) base traffic bound per step, from its hour of day."""
+    peak = np.isin(hours, list(PEAK_HOURS))
+    low = np.where(peak, PEAK_BASE_TRAFFIC[0], OFFPEAK_BASE_TRAFFIC[0])
+    high = np.where(peak, PEAK_BASE_TRAFFIC[1], OFFPEAK_BASE_TRAFFIC[1])
+    return low, high
+
+def _distance_factor(edge_arrays: EdgeArrays) -> np.ndarray:
+    """Share of the delivery traffic reaching each edge; drops with distance from the site."""
+    return np.clip(1.0 / (0.1 + edge_arrays.site_distance / DISTANCE_DECAY_M), 0.1, 1.0)
+
+def delivery_share(edge_arrays: EdgeArrays) -> np.ndarray:
+    """
+    Delivery trips per edge and delivery.
+
+    The routed share (entry and exit trips along the shortest paths) if the network
+    could be routed, else the distance factor applied to entry + exit.
+    """
+    if edge_arrays.delivery_share is not None:
+        return edge_arrays.delivery_share
+    return _distance_factor(edge_arrays) * 2
+
+def _traffic(
+    edge_arrays: EdgeArrays,
+    base_traffic: np.ndarray,
+    deliveries,
+    share: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Volumes and congestion from drawn base traffic, for any leading shape ending in E."""
+    # Delivery trips on the edge (entry + exit)
+    volumes = (base_traffic + deliveries * share).astype(np.int64)
+
+    capacity = edge_arrays.capacity
+    with np.errstate(divide="ignore", invalid="ignore"):
+        congestion = np.where(capacity > 0, np.minimum(1.0, volumes / capacity), 0.0)
+
+    return volumes, congestion
+
+def _hour_traffic(
+    edge_arrays: EdgeArrays,
+    low: int,
+    high: int,
+    deliveries: float,
+    share: np.ndarray,
+    rng: np.random.Generator,
+    size: tuple
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Volumes and congestion of one time step, for any leading sample shape ending in E."""
+    return _traffic(edge_arrays, rng.integers(low, high, size=size), deliveries, share)
+
+def simulate_day(
+    edge_arrays: EdgeArrays,
+    hours: List[int],
+    deliveries_per_hour: np.ndarray,
+    rngs: List[np.random.Generator]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Simulate traffic on all edges for all time steps of one day, vectorized over
+    edges and steps.
+
+    The model is the same as the former per-edge loop:
+    - Base traffic drawn uniformly per edge and step (higher range in peak hours)
+    - Delivery traffic (entry + exit) along the routed truck paths, or scaled by the
+      proximity to the site if the network could not be routed
+    - Congestion as traffic over capacity, capped at 1.0
+
+    Volumes are hourly rates at every step, so congestion does not depend on the
+    step length.
+
+    Args:
+        edge_arrays: Static edge attributes
+        hours: Hour of day of each simulated step (length T)
+        deliveries_per_hour: Number of deliveries active in each step (length T)
+        rngs: One random generator per step (see random_streams.step_rng)
+
+    Returns:
+        Tuple (volumes, congestion) of arrays shaped (T, E)
+    """
+    n_edges = len(edge_arrays)
+    low, high = _base_traffic_range(hours)
+    deliveries = np.asarray(deliveries_per_hour, dtype=np.float64)
+
+    # One row per step from that step's own stream, so a step's draws do not
+    # depend on which other steps are simulated; the model itself runs once on (T, E)
+    base_traffic = np.empty((len(hours), n_edges), dtype=np.int64)
+    for t_idx, rng in enumerate(rngs):
+        base_traffic[t_idx] = rng.integers(low[t_idx], high[t_idx], size=n_edges)
+
+    return _traffic(edge_arrays, base_traffic, deliveries[:, None], delivery_share(edge_arrays))
+
+def simulate_day_ensemble(
+    edge_arrays: EdgeArrays,
+    hours: List[int],
+    deliveries_per_hour: np.ndarray,
+    rngs: List[np.random.Generator],
+    n_samples: int
+) -> Dict[str, np.ndarray]:
+    """
+    Simulate n_samples realizations of a day and summarize them per edge and step.
+
+    All realizations of a step are drawn in one (n_samples, E) array instead of
+    rerunning the model; only the summaries are kept, so memory stays at one step
+    of samples. With n_samples=1 the draws equal those of simulate_day.
+
+    Args:
+        edge_arrays: Static edge attributes
+        hours: Hour of day of each simulated step (length T)
+        deliveries_per_hour: Number of deliveries active in each step (length T)
+        rngs: One random generator per step (see random_streams.step_rng)
+        n_samples: Number of realizations (S)
+
+    Returns:
+        Dict of ENSEMBLE_STATS -> float32 arrays shaped (T, E)
+    """
+    n_edges = len(edge_arrays)
+    low, high = _base_traffic_range(hours)
+    share = delivery_share(edge_arrays)
+    deliveries = np.asarray(deliveries_per_hour, dtype=np.float64)
+
+    summary = {name: np.empty((len(hours), n_edges), dtype=np.float32) for name in ENSEMBLE_STATS}
+    for h_idx, rng in enumerate(rngs):
+        volumes, congestion = _hour_traffic(
+            edge_arrays, low[h_idx], high[h_idx], deliveries[h_idx], share, rng, (n_samples, n_edges)
+        )
+        volume_q = np.percentile(volumes, ENSEMBLE_PERCENTILES, axis=0)
+        congestion_q = np.percentile(congestion, ENSEMBLE_PERCENTILES, axis=0)
+
+        summary["volume_mean"][h_idx] = volumes.mean(axis=0)
+        summary["congestion_mean"][h_idx] = congestion.mean(axis=0)
+        for q_idx, q in enumerate(ENSEMBLE_PERCENTILES):
+            summary[f"volume_p{q}"][h_idx] = volume_q[q_idx]
+            summary[f"congestion_p{q}"][h_idx] = congestion_q[q_idx]
+        summary["exceedance_probability"][h_idx] = (congestion > CONGESTION_THRESHOLD).mean(axis=0)
+
+    return summary
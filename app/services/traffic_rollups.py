@@ -0,0 +1,173 @@
+from datetime import date, datetime, time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Aggregation levels, finest first: hour -> day -> ISO week -> month
+LEVELS = ["hour", "day", "week", "month"]
+
+# Rollups of a project
+# Structure: level -> bucket key -> bucket (see step_bucket)
+Rollups = Dict[str, Dict[str, Dict[str, Any]]]
+
+def bucket_key(level: str, moment: date) -> str:
+    """
+    Key of the bucket containing a date or datetime.
+
+    Keys sort chronologically within a level, e.g. "2024-09-05T08", "2024-09-05",
+    "2024-W36" (ISO week) and "2024-09".
+    """
+    if level == "hour":
+        return moment.strftime("%Y-%m-%dT%H")
+    if level == "day":
+        return moment.strftime("%Y-%m-%d")
+    if level == "week":
+        year, week, _ = moment.isocalendar()
+        return f"{year}-W{week:02d}"
+    if level == "month":
+        return moment.strftime("%Y-%m")
+    raise ValueError(f"Unknown rollup level: {level}. Use one of {', '.join(LEVELS)}")
+
+def bucket_start(level: str, key: str) -> date:
+    """First date (hour for the hour level) covered by a bucket"""
+    if level == "hour":
+        return datetime.strptime(key, "%Y-%m-%dT%H")
+    if level == "day":
+        return datetime.strptime(key, "%Y-%m-%d").date()
+    if level == "week":
+        year, week = key.split("-W")
+        return date.fromisocalendar(int(year), int(week), 1)
+    if level == "month":
+        return datetime.strptime(key, "%Y-%m").date()
+    raise ValueError(f"Unknown rollup level: {level}. Use one of {', '.join(LEVELS)}")
+
+def _weighted(value: float, step_hours: float):
+    """Value of a step weighted by its length in hours (kept an int for whole-hour steps)"""
+    weighted = value * step_hours
+    return int(weighted) if float(weighted).is_integer() else weighted
+
+def step_bucket(moment: datetime, stats: Dict[str, Any], step_hours: float = 1.0) -> Dict[str, Any]:
+    """
+    Bucket of one simulated time step, from its summary stats.
+
+    Step values are hourly rates; totals and congestion are weighted by the step
+    length, so the buckets of sub-hourly steps add up to hours. The peak is the
+    highest hourly rate of any step.
+
+    deliveries is the step's delivery count weighted the same way. A delivery is
+    active in every step its window overlaps, so summed over steps this counts
+    delivery-hours; update_rollups replaces it by distinct deliveries where the day
+    record carries them.
+    """
+    traffic = int(stats.get("total_traffic", 0))
+    return {
+        "total_traffic": int(round(traffic * step_hours)),
+        "peak_hour": moment.isoformat(),
+        "peak_traffic": traffic,
+        "congestion_sum": float(stats.get("average_congestion", 0)) * step_hours,
+        "hours": _weighted(1, step_hours),
+        "deliveries": _weighted(int(stats.get("deliveries_count", 0)), step_hours)
+    }
+
+def merge_buckets(buckets: Iterable[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Combine buckets into the bucket of the next coarser level (None if there are none)"""
+    merged = None
+    for bucket in buckets:
+        if merged is None:
+            merged = dict(bucket)
+            continue
+        merged["total_traffic"] += bucket["total_traffic"]
+        merged["congestion_sum"] += bucket["congestion_sum"]
+        merged["hours"] += bucket["hours"]
+        merged["deliveries"] += bucket["deliveries"]
+        if bucket["peak_traffic"] > merged["peak_traffic"]:
+            merged["peak_traffic"] = bucket["peak_traffic"]
+            merged["peak_hour"] = bucket["peak_hour"]
+    return merged
+
+def update_rollups(
+    rollups: Rollups,
+    days: Dict[date, List[Tuple[datetime, Dict[str, Any], float]]],
+    delivery_counts: Optional[Dict[date, Optional[Dict[str, Any]]]] = None
+) -> None:
+    """
+    Replace the buckets of the given days in place.
+
+    The hour and day buckets of each day are rebuilt from its time steps (several
+    per hour bucket for sub-hourly steps); the weeks and months containing the days
+    are recombined from their day buckets.
+
+    Deliveries are counted once per bucket from delivery_counts, so a delivery whose
+    window spans several hours counts once for its day, week and month. Days without
+    counts (stored before they were recorded) keep the step-based value.
+
+    Args:
+        rollups: Rollups to update
+        days: date -> (time, stats, step length in hours) of every time step of that day
+        delivery_counts: date -> {"day": distinct deliveries, "hours": {"HH": distinct
+            deliveries overlapping the hour}} (see delivery_table.bucket_counts)
+    """
+    for level in LEVELS:
+        rollups.setdefault(level, {})
+
+    for day, steps in days.items():
+        day_key = bucket_key("day", day)
+        for key in [key for key in rollups["hour"] if key.startswith(day_key + "T")]:
+            del rollups["hour"][key]
+
+        step_buckets = {}
+        for moment, stats, step_hours in sorted(steps, key=lambda step: step[0]):
+            step_buckets.setdefault(bucket_key("hour", moment), []).append(step_bucket(moment, stats, step_hours))
+        hour_buckets = {key: merge_buckets(buckets) for key, buckets in step_buckets.items()}
+        counts = (delivery_counts or {}).get(day)
+        if counts is not None:
+            for key, bucket in hour_buckets.items():
+                bucket["deliveries"] = int(counts["hours"].get(key[-2:], 0))
+        rollups["hour"].update(hour_buckets)
+
+        day_bucket = merge_buckets(hour_buckets[key] for key in sorted(hour_buckets))
+        if day_bucket is None:
+            rollups["day"].pop(day_key, None)
+        else:
+            if counts is not None:
+                day_bucket["deliveries"] = int(counts["day"])
+            rollups["day"][day_key] = day_bucket
+
+    for level in ["week", "month"]:
+        affected = {bucket_key(level, day) for day in days}
+        groups = {key: [] for key in affected}
+        for day_key in sorted(rollups["day"]):
+            key = bucket_key(level, bucket_start("day", day_key))
+            if key in groups:
+                groups[key].append(rollups["day"][day_key])
+
+        for key, buckets in groups.items():
+            merged = merge_buckets(buckets)
+            if merged is None:
+                rollups[level].pop(key, None)
+            else:
+                rollups[level][key] = merged
+
+def query_rollups(rollups: Rollups, level: str, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+    """
+    Buckets of one level overlapping a date range, in chronological order.
+
+    Week and month buckets are returned whole, also when the range covers them only
+    partly. Only the stored buckets are read, no per-segment data.
+    """
+    first = bucket_key(level, datetime.combine(start_date, time.min))
+    last = bucket_key(level, datetime.combine(end_date, time.max))
+    buckets = rollups.get(level, {})
+
+    return [
+        {
+            "bucket": key,
+            "start": bucket_start(level, key).isoformat(),
+            "total_traffic": buckets[key]["total_traffic"],
+            "peak_hour": buckets[key]["peak_hour"],
+            "peak_traffic": buckets[key]["peak_traffic"],
+            "average_congestion": buckets[key]["congestion_sum"] / buckets[key]["hours"],
+            "deliveries": buckets[key]["deliveries"],
+            "hours": buckets[key]["hours"]
+        }
+        for key in sorted(buckets)
+        if first <= key <= last
+    ]
@@ -0,0 +1,272 @@
+import heapq
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from collections import deque
+from dataclasses import dataclass
+from datetime import time
+from shapely.geometry import shape
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.traffic_engine import WAITING_AREA_CAPACITY
+
+# Mean unloading time (minutes) per vehicle type, matched case-insensitively;
+# the Vehicles sheet can override them with an UnloadingMinutes column
+UNLOADING_MINUTES = {
+    "van": 15, "transporter": 15,
+    "truck": 30, "lkw": 30,
+    "fahrmischer": 20, "mixer": 20,
+    "sattelzug": 45, "semi": 45
+}
+DEFAULT_UNLOADING_MINUTES = 30
+
+# Spread of the unloading time (coefficient of variation of a gamma distribution)
+UNLOADING_CV = 0.3
+
+# Ground area (m²) one waiting truck takes up, manoeuvring space included.
+# Areas without a measurable surface (points, lines) get WAITING_AREA_CAPACITY places.
+PLACE_AREA_M2 = 60.0
+
+# Per-step queue statistics, in this order (waiting times in minutes)
+QUEUE_STATS = (
+    "queue_length_mean", "queue_length_max",
+    "overflow_trucks",  # trucks arriving in the step that found no free place
+    "waiting_time_mean", "waiting_time_p50", "waiting_time_p90", "waiting_time_max"
+)
+
+# Event kinds; departures sort first, so a place freed at the arrival time is used
+_DEPARTURE = 0
+_ARRIVAL = 1
+
+@dataclass
+class DayTrucks:
+    """Deliveries of one day as aligned arrays (minutes after midnight)."""
+    window_start: np.ndarray  # float64, start of the delivery time window
+    window_end: np.ndarray    # float64, end of the delivery time window
+    unloading: np.ndarray     # float64, mean unloading time
+
+    def __len__(self) -> int:
+        return len(self.window_start)
+
+def queue_parameters() -> Dict[str, Any]:
+    """Queue model settings a simulated day depends on (part of the day fingerprint)."""
+    return {
+        "unloading_minutes": UNLOADING_MINUTES,
+        "default_unloading_minutes": DEFAULT_UNLOADING_MINUTES,
+        "unloading_cv": UNLOADING_CV,
+        "place_area_m2": PLACE_AREA_M2
+    }
+
+def waiting_area_capacities(waiting_areas: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Truck places of each waiting area from its ground area.
+
+    Args:
+        waiting_areas: GeoJSON geometries or Features in EPSG:4326
+
+    Returns:
+        int64 array with one capacity per area (at least 1)
+    """
+    capacities = np.full(len(waiting_areas or []), WAITING_AREA_CAPACITY, dtype=np.int64)
+    if not len(capacities):
+        return capacities
+
+    try:
+        geometries = gpd.GeoSeries(
+            [shape(a["geometry"] if a.get("type") == "Feature" else a) for a in waiting_areas],
+            crs="EPSG:4326"
+        )
+        areas = geometries.to_crs(geometries.estimate_utm_crs()).area.to_numpy(dtype=np.float64)
+        measured = areas > 0
+        capacities[measured] = np.maximum(1, np.floor(areas[measured] / PLACE_AREA_M2)).astype(np.int64)
+    except Exception as e:
+        print(f"Error measuring waiting areas: {str(e)}")
+    return capacities
+
+def unloading_minutes(deliveries: pd.DataFrame, vehicles: Optional[pd.DataFrame] = None) -> np.ndarray:
+    """
+    Mean unloading time of each delivery from its VehicleType.
+
+    The Vehicles sheet may set UnloadingMinutes per VehicleType; other types use
+    UNLOADING_MINUTES, unknown types and deliveries without a type the default.
+    """
+    table = dict(UNLOADING_MINUTES)
+    if vehicles is not None and {"VehicleType", "UnloadingMinutes"} <= set(vehicles.columns):
+        minutes = pd.to_numeric(vehicles["UnloadingMinutes"], errors="coerce")
+        for vehicle_type, value in zip(vehicles["VehicleType"].astype(str).str.strip().str.lower(), minutes):
+            if value > 0:
+                table[vehicle_type] = float(value)
+
+    if "VehicleType" not in deliveries.columns:
+        return np.full(len(deliveries), float(DEFAULT_UNLOADING_MINUTES))
+    types = deliveries["VehicleType"].astype(str).str.strip().str.lower()
+    return types.map(table).fillna(DEFAULT_UNLOADING_MINUTES).to_numpy(dtype=np.float64)
+
+def _step_profile(change_times: np.ndarray, levels: np.ndarray, bounds: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Maximum and time-weighted mean of a step function over each step.
+
+    Args:
+        change_times: Sorted times at which the function changes
+        levels: Value from each change time on (0 before the first)
+        bounds: (T + 1) step boundaries
+
+    Returns:
+        Tuple (maximum, mean), each of length T
+    """
+    n_steps = len(bounds) - 1
+    breaks = np.union1d(change_times, bounds)
+    last = np.searchsorted(change_times, breaks[:-1], side="right") - 1
+    values = np.where(last >= 0, levels[np.maximum(last, 0)], 0).astype(np.float64)
+    widths = np.diff(breaks)
+
+    step = np.searchsorted(bounds, breaks[:-1], side="right") - 1
+    inside = (step >= 0) & (step < n_steps)
+    maximum = np.zeros(n_steps)
+    np.maximum.at(maximum, step[inside], values[inside])
+    total = np.bincount(step[inside], weights=values[inside] * widths[inside], minlength=n_steps)
+    return maximum, total / np.diff(bounds)
+
+def _run_queue(
+    arrivals: np.ndarray,
+    dwell: np.ndarray,
+    capacities: np.ndarray
+) -> Tuple[np.ndarray, List[tuple], List[tuple]]:
+    """
+    Event-driven simulation of one realization of a day.
+
+    Trucks take a place in the waiting area with the most free places and hold it
+    while unloading; when all areas are full they queue on the street (first come,
+    first served) until a place is freed. Without any waiting area every truck
+    stands on the street for its whole unloading time, which counts as its wait.
+
+    Returns:
+        Tuple (waiting minutes per truck, area changes (time, area, occupied),
+        queue changes (time, queue length))
+    """
+    if not len(capacities):
+        events = sorted(
+            [(t, _ARRIVAL) for t in arrivals] + [(t + d, _DEPARTURE) for t, d in zip(arrivals, dwell)]
+        )
+        levels = np.cumsum([1 if kind == _ARRIVAL else -1 for _, kind in events])
+        return dwell.copy(), [], [(t, int(level)) for (t, _), level in zip(events, levels)]
+
+    calendar = [(t, _ARRIVAL, i) for i, t in enumerate(arrivals)]
+    heapq.heapify(calendar)
+
+    free = capacities.copy()
+    area_of = np.full(len(arrivals), -1, dtype=np.int64)
+    waits = np.zeros(len(arrivals))
+    street = deque()
+    area_changes = []
+    queue_changes = []
+
+    def occupy(now: float, truck: int) -> None:
+        area = int(np.argmax(free))
+        free[area] -= 1
+        area_of[truck] = area
+        area_changes.append((now, area, capacities[area] - free[area]))
+        heapq.heappush(calendar, (now + dwell[truck], _DEPARTURE, truck))
+
+    while calendar:
+        now, kind, truck = heapq.heappop(calendar)
+        if kind == _ARRIVAL:
+            if free.max() > 0:
+                occupy(now, truck)
+            else:
+                street.append(truck)
+                queue_changes.append((now, len(street)))
+        else:
+            area = area_of[truck]
+            free[area] += 1
+            area_changes.append((now, area, capacities[area] - free[area]))
+            if street:
+                waiting = street.popleft()
+                queue_changes.append((now, len(street)))
+                waits[waiting] = now - arrivals[waiting]
+                occupy(now, waiting)
+
+    return waits, area_changes, queue_changes
+
+def simulate_queue(
+    trucks: DayTrucks,
+    capacities: np.ndarray,
+    times: List[time],
+    interval_minutes: int,
+    rng: np.random.Generator,
+    n_samples: int = 1
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Simulate the waiting areas of one day as a queue of individual trucks.
+
+    Each realization draws the arrival of every truck uniformly within its time
+    window and its unloading time from a gamma distribution around the mean of its
+    vehicle type, then runs the event calendar (see _run_queue). Without waiting
+    areas all trucks overflow to the street.
+
+    Args:
+        trucks: Deliveries of the day
+        capacities: Places per waiting area (A)
+        times: Start time of each simulated step (T)
+        interval_minutes: Length of a step
+        rng: Random generator of the day (see random_streams.day_rng)
+        n_samples: Number of realizations (S)
+
+    Returns:
+        Tuple (occupied, stats): the peak occupancy of each area per realization
+        and step as int64 (S, T, A), and QUEUE_STATS -> float64 (T,). Queue lengths
+        and overflow are averaged over the realizations; waiting times are taken
+        over the trucks arriving in the step in all realizations.
+    """
+    capacities = np.asarray(capacities, dtype=np.int64)
+    starts = np.array([t.hour * 60 + t.minute for t in times], dtype=np.float64)
+    bounds = np.append(starts, starts[-1] + interval_minutes) if len(starts) else starts
+    n_steps, n_areas = len(starts), len(capacities)
+
+    occupied = np.zeros((n_samples, n_steps, n_areas), dtype=np.int64)
+    stats = {name: np.zeros(n_steps) for name in QUEUE_STATS}
+    if not len(trucks) or not n_steps:
+        return occupied, stats
+
+    window = np.maximum(trucks.window_end - trucks.window_start, 0)
+    shape_k = 1.0 / UNLOADING_CV ** 2
+    all_steps, all_waits = [], []
+
+    for sample in range(n_samples):
+        arrivals = trucks.window_start + rng.random(len(trucks)) * window
+        dwell = rng.gamma(shape_k, trucks.unloading / shape_k)
+        waits, area_changes, queue_changes = _run_queue(arrivals, dwell, capacities)
+
+        if area_changes:
+            change_times, areas, levels = (np.array(column) for column in zip(*area_changes))
+            for area in range(n_areas):
+                mine = areas == area
+                occupied[sample, :, area] = _step_profile(change_times[mine], levels[mine], bounds)[0]
+        if queue_changes:
+            change_times, levels = (np.array(column, dtype=np.float64) for column in zip(*queue_changes))
+            maximum, mean = _step_profile(change_times, levels, bounds)
+            stats["queue_length_max"] += maximum / n_samples
+            stats["queue_length_mean"] += mean / n_samples
+
+        step = np.searchsorted(bounds, arrivals, side="right") - 1
+        inside = (step >= 0) & (step < n_steps)
+        overflow = inside & (waits > 0) if n_areas else inside
+        stats["overflow_trucks"] += np.bincount(step[overflow], minlength=n_steps) / n_samples
+        all_steps.append(step[inside])
+        all_waits.append(waits[inside])
+
+    # Waiting time distribution per step over all realizations
+    steps, waits = np.concatenate(all_steps), np.concatenate(all_waits)
+    order = np.argsort(steps, kind="stable")
+    steps, waits = steps[order], waits[order]
+    cuts = np.searchsorted(steps, np.arange(n_steps + 1))
+    for t_idx in range(n_steps):
+        step_waits = waits[cuts[t_idx]:cuts[t_idx + 1]]
+        if len(step_waits):
+            p50, p90 = np.percentile(step_waits, [50, 90])
+            stats["waiting_time_mean"][t_idx] = step_waits.mean()
+            stats["waiting_time_p50"][t_idx] = p50
+            stats["waiting_time_p90"][t_idx] = p90
+            stats["waiting_time_max"][t_idx] = step_waits.max()
+
+    return occupied, stats
@@ -3,6 +3,7 @@ import pandas as pd
 import json
 import requests
 import os
+import time
 from datetime import datetime, date
 # import folium # Remove Folium
 # from streamlit_folium import folium_static # Remove streamlit_folium_static
@@ -351,19 +352,33 @@ def show_admin_panel(project):
         if st.button("Simulation starten"):
             try:
                 simulation_request = {"project_id": project["id"], "start_date": start_date_sim.isoformat(), "end_date": end_date_sim.isoformat(), "time_interval": interval}
-                with st.spinner("Simulation läuft... Dies kann einige Minuten dauern."):
-                    response = requests.post(f"{API_URL}/api/simulation/run", json=simulation_request)
-                    if response.status_code == 200:
-                        simulation_result = response.json()
+                response = requests.post(f"{API_URL}/api/simulation/jobs", json=simulation_request)
+                if response.status_code == 202:
+                    job = response.json()
+                    progress_bar = st.progress(0.0, text="Simulation in Warteschlange...")
+                    # Poll the job until it is finished; the API stays responsive meanwhile
+                    while job["status"] in ("queued", "running"):
+                        time.sleep(1)
+                        job = requests.get(f"{API_URL}/api/simulation/jobs/{job['id']}").json()
+                        progress = job["days_completed"] / max(1, job["days_total"])
+                        progress_bar.progress(progress, text=f"Simulation läuft... {job['days_completed']}/{job['days_total']} Tage")
+                    
+                    if job["status"] == "completed":
                         st.success("Simulation erfolgreich abgeschlossen!")
-                        st.subheader("Simulationszusammenfassung")
-                        st.json(simulation_result.get("stats", "Keine Statistiken verfügbar."))
+                        result_response = requests.get(f"{API_URL}/api/simulation/jobs/{job['id']}/results")
+                        if result_response.status_code == 200 and result_response.json():
+                            st.subheader("Simulationszusammenfassung")
+                            st.json(result_response.json().get("stats", "Keine Statistiken verfügbar."))
                         st.info("Detaillierte Ergebnisse im Dashboard anzeigen.")
                         if st.button("Zum Dashboard"):
                             st.session_state.page = "dashboard"
                             st.rerun()
+                    elif job["status"] == "cancelled":
+                        st.warning(f"Simulation abgebrochen nach {job['days_completed']} Tagen.")
                     else:
-                        st.error(f"Simulation konnte nicht ausgeführt werden: {response.status_code} - {response.text}")
+                        st.error(f"Simulation fehlgeschlagen: {job.get('error')}")
+                else:
+                    st.error(f"Simulation konnte nicht gestartet werden: {response.status_code} - {response.text}")
             except Exception as e:
                 st.error(f"Fehler beim Ausführen der Simulation: {str(e)}")
 
@@ -11,10 +11,9 @@ import plotly.graph_objects as go
 from io import BytesIO
 import numpy as np
 import calendar # For week/weekday calculations
-import osmnx as ox
-import geopandas as gpd
-from shapely.geometry import Polygon as ShapelyPolygon, LineString
 import hashlib
+from dataclasses import dataclass
+from typing import List
 from utils.custom_styles import apply_chart_styling, apply_kpi_styles
 from utils.map_utils import (
     update_map_view_to_project_bounds,
@@ -30,9 +29,16 @@ from utils.dashoboard_utils import (
     get_days_in_week,
     build_hourly_layer_cache,
 )
-from filelock import FileLock
 import re
 from config import API_URL  # Import centralized config
+from app.services.network_features import DEFAULT_CAPACITY
+from app.services.network_store import get_network
+from app.services.random_streams import day_rng
+from app.services.delivery_routes import get_delivery_share
+from app.services.schedule_store import get_schedule_tables
+from app.services.spatial_index import (
+    ACCESS_ROUTE_TOLERANCE, get_segment_index, segments_index, segments_within, route_geometries
+)
 
 
 # API_URL is now imported from config.py
@@ -41,22 +47,6 @@ from config import API_URL  # Import centralized config
 DEBUG_COORDS = False 
 DEBUG_OSM = False    
 
-# Define cache directory for OSM data
-CACHE_DIR = "data/prepared/osm_cache"
-if not os.path.exists(CACHE_DIR):
-    os.makedirs(CACHE_DIR)
-
-# Capacity mapping for OSM highway types
-CAPACITY_MAP = {
-    'motorway': 2000, 'trunk': 1800, 'primary': 1500,
-    'secondary': 1000, 'tertiary': 700,
-    'motorway_link': 1000, 'trunk_link': 900, 'primary_link': 750,
-    'secondary_link': 500, 'tertiary_link': 350,
-    'residential': 400, 'unclassified': 300, 'road': 300,
-    'living_street': 100, 'service': 150, 'track': 50, 'path': 30,
-    'cycleway': 50, 'footway': 20, 'pedestrian': 20, 'steps': 10
-}
-DEFAULT_CAPACITY = 200
 
 # --- GLOBAL FEATURE FLAGS ---
 # Disable/enable the dashboard hour animation. When set to False the play/pause
@@ -141,6 +131,9 @@ def _render_traffic_tab(project):
     if not base_osm_segments and DEBUG_OSM: # Only show warning if in debug, otherwise it might be alarming
         st.warning("OSM: Keine OSM-Basissegmente konnten generiert werden. Karte zeigt möglicherweise keine Verkehrswege.")
 
+    # Memo key part of the day summaries, looked up once per render
+    model_version = traffic_model_version(project)
+
     # Initialize animation state
     # Ensure animation is turned off when the feature flag is disabled
     if not ENABLE_ANIMATION:
@@ -266,47 +259,24 @@ def _render_traffic_tab(project):
 
     st.markdown("<hr>", unsafe_allow_html=True)
 
+    # ---------------- Day Metrics -------------------------------------------------
+    # All hours of the day in one pass, memoized for the charts and the resident page
+    day_summary = get_day_summary(selected_date_str_for_map, project, base_osm_segments, start_hour, end_hour, model_version)
+
     # Key Metrics - moved to after time selection to ensure proper spacing
-    # Pass base_osm_segments to get_traffic_data
-    current_traffic_data = get_traffic_data(selected_date_str_for_map, selected_hour_for_map, project, base_osm_segments)
+    current_hour_stats = day_summary.hour_stats(selected_hour_for_map)
     avg_cong_display = "N/A"
-    if current_traffic_data and current_traffic_data["stats"]["average_congestion"] is not None:
-        avg_cong = current_traffic_data['stats']['average_congestion']
+    if current_hour_stats and current_hour_stats["average_congestion"] is not None:
+        avg_cong = current_hour_stats['average_congestion']
         avg_cong_display = 'Low' if avg_cong < 0.3 else 'Medium' if avg_cong < 0.7 else 'High'
-    
-    # ---------------- Day Metrics -------------------------------------------------
-    # Calculate daily aggregates once to avoid repeated API calls later
-    total_deliveries_day = sum(
-        get_traffic_data(selected_date_str_for_map, hr, project, base_osm_segments)["stats"]["deliveries_count"]
-        for hr in range(start_hour, end_hour + 1)
-    )
-    total_traffic_day = sum(
-        get_traffic_data(selected_date_str_for_map, hr, project, base_osm_segments)["stats"]["total_traffic"]
-        for hr in range(start_hour, end_hour + 1)
-    )
-    avg_congestion_day = (
-        sum(
-            get_traffic_data(selected_date_str_for_map, hr, project, base_osm_segments)["stats"]["average_congestion"]
-            for hr in range(start_hour, end_hour + 1)
-        )
-        / (end_hour - start_hour + 1)
-    ) if end_hour >= start_hour else 0
 
-    delivery_share_pct = (total_deliveries_day / total_traffic_day * 100 * 2) if total_traffic_day else 0
+    total_deliveries_day = day_summary.total_deliveries_day
+    avg_congestion_day = day_summary.average_congestion_day
+    delivery_share_pct = day_summary.delivery_share_pct
 
-    # --- Access OSM segments (segments that overlap with the access route) ---
-    access_osm_segments = _get_access_osm_segments(project, base_osm_segments)
-
-    # Use access_osm_segments instead of base_osm_segments for access route calculations
-    access_traffic_day = (
-        sum(get_traffic_data(selected_date_str_for_map, hr, project, access_osm_segments)["stats"]["access_traffic"]
-            for hr in range(start_hour, end_hour + 1)) / (end_hour - start_hour + 1)
-    ) if access_osm_segments else 0
-
-    construction_traffic_day = sum(
-        get_traffic_data(selected_date_str_for_map, hr, project, base_osm_segments)["stats"]["construction_traffic"]
-        for hr in range(start_hour, end_hour + 1)
-    ) if base_osm_segments else 0
+    # Access traffic is summed over the access-route segments of the full network
+    access_traffic_day = day_summary.access_traffic_day
+    construction_traffic_day = day_summary.construction_traffic_day if base_osm_segments else 0
 
     construction_share_pct_day = (construction_traffic_day / access_traffic_day * 100) if access_traffic_day else 0
 
@@ -410,10 +380,8 @@ def _render_traffic_tab(project):
     daily_totals_ts = []
     if base_osm_segments: # Only calculate if we have segments
         daily_totals_ts = [
-            sum(
-                get_traffic_data(dt.strftime("%Y-%m-%d"), hr, project, base_osm_segments)["stats"]["total_traffic"]
-                for hr in range(start_hour, end_hour + 1)
-            ) for dt in dates_ts
+            get_day_summary(dt.strftime("%Y-%m-%d"), project, base_osm_segments, start_hour, end_hour, model_version).total_traffic_day
+            for dt in dates_ts
         ]
     else: # Provide zeros or placeholder if no segments
         daily_totals_ts = [0] * len(dates_ts)
@@ -448,11 +416,9 @@ def _render_traffic_tab(project):
     hourly_deliveries_hr = []
 
     if base_osm_segments: # Only calculate if we have segments
-        for h_loop in range(start_hour, end_hour + 1):
-            hourly_data = get_traffic_data(selected_date_str_for_map, h_loop, project, base_osm_segments)
-            hourly_traffic_hr.append(hourly_data["stats"]["total_traffic"])
-            hourly_congestion_hr.append(hourly_data["stats"]["average_congestion"])
-            hourly_deliveries_hr.append(hourly_data["stats"]["deliveries_count"])
+        hourly_traffic_hr = list(day_summary.total_traffic)
+        hourly_congestion_hr = list(day_summary.average_congestion)
+        hourly_deliveries_hr = list(day_summary.deliveries)
     else: # Provide zeros or placeholder if no segments
         hourly_traffic_hr = [0] * len(hours_list_hr)
         hourly_congestion_hr = [0] * len(hours_list_hr)
@@ -738,7 +704,8 @@ def load_profiles_for_counters(project):
                 'display_name': selected_counter_data.get('display_name', ''),
                 'is_primary': is_primary,
                 'coordinates': current_counter_coords, # This is [lat,lon]
-                'data': profile_data_df
+                'data': profile_data_df,
+                'traffic_tensor': _profile_tensor(profile_data_df)
             }
             if DEBUG_COORDS or debug_mode:
                 st.sidebar.write(f"DEBUG: Loaded {profile_id_key} - stored coords: {st.session_state.counter_profiles[profile_id_key].get('coordinates')}")
@@ -776,102 +743,25 @@ def get_base_osm_segments(project):
 
 def generate_osm_traffic_segments(project_map_bounds, project_id):
     """
-    Fetches road network data from OpenStreetMap within the given map_bounds,
-    processes it into traffic segments with estimated capacities, and caches the result.
+    Loads the road network within the given map_bounds from the shared network store
+    (compiled once from local OSM data; never downloaded here, the backend or
+    src/build_network_store.py fetches missing networks) and returns it as traffic
+    segments with estimated capacities.
     Coordinates are returned as [[lon, lat], [lon, lat], ...].
     """
     if not project_map_bounds or 'coordinates' not in project_map_bounds or not project_map_bounds['coordinates']:
         if DEBUG_OSM: st.sidebar.warning("OSM: Project map bounds are missing or invalid.")
         return []
 
-    bounds_coords_str = json.dumps(project_map_bounds['coordinates'][0], sort_keys=True)
-    cache_key_input = f"{project_id}_{bounds_coords_str}"
-    cache_filename_base = hashlib.md5(cache_key_input.encode()).hexdigest()
-    cache_file = os.path.join(CACHE_DIR, f"osm_segments_{cache_filename_base}.gpkg")
-    lock = FileLock(cache_file + ".lock")
-
-    with lock:
-        if os.path.exists(cache_file):
-            if DEBUG_OSM: st.sidebar.info(f"OSM: Loading cached road segments from {cache_file}")
-            try:
-                segments_gdf = gpd.read_file(cache_file)
-                if segments_gdf.empty:
-                    if DEBUG_OSM: st.sidebar.warning(f"OSM: Cache file {cache_file} is empty. Refetching.")
-                    os.remove(cache_file) 
-                else:
-                    processed_segments = []
-                    for idx, row in segments_gdf.iterrows(): 
-                        coords_lon_lat = list(row.geometry.coords) if row.geometry and row.geometry.geom_type == 'LineString' else (list(row.geometry.geoms[0].coords) if row.geometry and row.geometry.geom_type == 'MultiLineString' and len(row.geometry.geoms) > 0 else [])
-                        highway_type = row.get('highway', 'unknown')
-                        highway_type = highway_type[0] if isinstance(highway_type, list) and highway_type else highway_type
-                        processed_segments.append({
-                            'segment_id': str(row.get('osmid', f"cached_seg_{idx}")),
-                            'coordinates': coords_lon_lat,
-                            'name': str(row.get('name', '')),
-                            'highway_type': highway_type,
-                            'length': float(row.get('length', 0.0)),
-                            'capacity': int(row.get('capacity', DEFAULT_CAPACITY))
-                        })
-                    if DEBUG_OSM: st.sidebar.info(f"OSM: Loaded {len(processed_segments)} segments from cache.")
-                    return processed_segments
-            except Exception as e:
-                if DEBUG_OSM: st.sidebar.error(f"OSM: Error loading GDF cache: {e}. Refetching.")
-                if os.path.exists(cache_file):
-                    try: os.remove(cache_file); 
-                    except: pass
-    if DEBUG_OSM: st.sidebar.info("OSM: No valid cache. Fetching network...")
     try:
-        shapely_poly_coords = project_map_bounds['coordinates'][0]
-        if not shapely_poly_coords or len(shapely_poly_coords) < 3: return []
-        map_boundary_polygon_shapely = ShapelyPolygon(shapely_poly_coords)
-        try:
-            poly_gdf = gpd.GeoDataFrame([{'id':1, 'geometry': map_boundary_polygon_shapely}], crs="EPSG:4326")
-            G = ox.graph_from_polygon(poly_gdf.iloc[0]['geometry'], network_type='drive_service', truncate_by_edge=True, retain_all=False, simplify=True)
-            if G.number_of_edges() == 0: raise ValueError("No roads from graph_from_polygon")
-            G_proj = ox.project_graph(G)
-            segments_gdf_proj = ox.graph_to_gdfs(G_proj, nodes=False, edges=True, fill_edge_geometry=True)
-            segments_gdf = segments_gdf_proj.to_crs("EPSG:4326")
-        except Exception as e_poly:
-            if DEBUG_OSM: st.sidebar.warning(f"OSM (poly fail): {e_poly}. Fallback to bbox.")
-            min_lon, min_lat, max_lon, max_lat = map_boundary_polygon_shapely.bounds
-            buffer = 0.008
-            G_bbox = ox.graph_from_bbox(max_lat+buffer, min_lat-buffer, max_lon+buffer, min_lon-buffer, network_type='drive_service',truncate_by_edge=True,retain_all=False,simplify=True)
-            if G_bbox.number_of_edges() == 0: return []
-            G_proj = ox.project_graph(G_bbox)
-            segments_gdf_proj = ox.graph_to_gdfs(G_proj, nodes=False, edges=True, fill_edge_geometry=True)
-            map_boundary_gdf_proj = gpd.GeoDataFrame([{'geometry': map_boundary_polygon_shapely}], crs="EPSG:4326").to_crs(segments_gdf_proj.crs)
-            clipped_segments_proj = gpd.clip(segments_gdf_proj, map_boundary_gdf_proj.iloc[0].geometry)
-            if clipped_segments_proj.empty: return []
-            segments_gdf = clipped_segments_proj.to_crs("EPSG:4326")
-        if segments_gdf.empty: return []
-        existing_cols = [col for col in ['osmid', 'name', 'highway', 'length', 'geometry'] if col in segments_gdf.columns]
-        segments_gdf = segments_gdf[existing_cols].copy()
-        def get_cap(ht): return CAPACITY_MAP[ht[0]] if isinstance(ht, list) and ht and ht[0] in CAPACITY_MAP else (CAPACITY_MAP[ht] if ht in CAPACITY_MAP else DEFAULT_CAPACITY)
-        segments_gdf['capacity'] = segments_gdf['highway'].apply(get_cap)
-        if 'osmid' not in segments_gdf.columns or segments_gdf['osmid'].isnull().all(): segments_gdf['osmid'] = [f"seg_idx_{i}" for i in range(len(segments_gdf))]
-        else: segments_gdf['osmid'] = segments_gdf['osmid'].apply(lambda x: x[0] if isinstance(x, list) and x else x).fillna(pd.Series([f"gen_seg_fill_{i}" for i in range(len(segments_gdf))]))
-        if 'length' in segments_gdf: segments_gdf['length'] = segments_gdf['length'].astype(float)
-        if 'highway' in segments_gdf: segments_gdf['highway'] = segments_gdf['highway'].apply(lambda x: x[0] if isinstance(x,list) and x else str(x) if pd.notnull(x) else 'unknown')
-        if not segments_gdf.empty:
-            # write cache atomically within lock
-            with lock:
-                segments_gdf.to_file(cache_file, driver="GPKG")
-        else: return []
-        processed_segments = []
-        for _, row in segments_gdf.iterrows():
-            coords_lon_lat_list = [list(coord) for coord in row.geometry.coords] if row.geometry and row.geometry.geom_type == 'LineString' else ([list(coord) for coord in row.geometry.geoms[0].coords] if row.geometry and row.geometry.geom_type == 'MultiLineString' and len(row.geometry.geoms) > 0 else [])
-            processed_segments.append({
-                'segment_id': str(row.get('osmid')),
-                'coordinates': coords_lon_lat_list,
-                'name': str(row.get('name', '')),
-                'highway_type': str(row.get('highway', 'unknown')),
-                'length': float(row.get('length', 0.0)),
-                'capacity': int(row.get('capacity', DEFAULT_CAPACITY))
-            })
-        if DEBUG_OSM: st.sidebar.info(f"OSM: Processed {len(processed_segments)} new segments.")
-        return processed_segments
+        network = get_network(project_map_bounds, project_id=project_id, allow_fetch=False)
+        if network is None:
+            if DEBUG_OSM: st.sidebar.warning("OSM: No road network available for the project bounds.")
+            return []
+        if DEBUG_OSM: st.sidebar.info(f"OSM: Loaded {len(network)} segments from network store ({network.key}).")
+        return network.to_segments()
     except Exception as e:
-        if DEBUG_OSM: st.sidebar.error(f"OSM: General fail in fetch/process: {str(e)}"); import traceback; st.sidebar.text(traceback.format_exc())
+        if DEBUG_OSM: st.sidebar.error(f"OSM: General fail in load/process: {str(e)}"); import traceback; st.sidebar.text(traceback.format_exc())
         return []
 
 def preload_traffic_data_for_week(selected_week_dict, project, base_osm_segments=None):
@@ -890,16 +780,11 @@ def preload_traffic_data_for_week(selected_week_dict, project, base_osm_segments
         if DEBUG_OSM: st.sidebar.info(f"OSM: Using cached week data for {week_cache_key}")
         if progress_bar: progress_bar.progress(1.0, text="Daten bereits geladen!"); time.sleep(0.5); progress_bar.empty()
         return st.session_state[week_cache_key]
-    week_data = {}
-    calculation_count = 0
-    for day_obj in days_in_week:
-        day_str_format = day_obj.strftime("%Y-%m-%d")
-        week_data[day_str_format] = {}
-        for hour_val in range(start_hour, end_hour + 1):
-            traffic_data_point = get_traffic_data(day_str_format, hour_val, project, base_osm_segments, skip_cached=True)
-            week_data[day_str_format][hour_val] = traffic_data_point
-            calculation_count += 1
-            if progress_bar: progress_bar.progress(calculation_count/total_calculations, text=f"Lade Daten: {day_obj.strftime('%a')} {hour_val}:00 ({calculation_count}/{total_calculations})")
+    # All days and hours of the week in one pass over the segment arrays
+    date_hours = [(day_obj.strftime("%Y-%m-%d"), hour_val) for day_obj in days_in_week for hour_val in range(start_hour, end_hour + 1)]
+    week_data = {day_obj.strftime("%Y-%m-%d"): {} for day_obj in days_in_week}
+    for (day_str_format, hour_val), traffic_data_point in zip(date_hours, _compute_traffic_data(date_hours, project, base_osm_segments)):
+        week_data[day_str_format][hour_val] = traffic_data_point
     st.session_state[week_cache_key] = week_data
     if progress_bar: progress_bar.progress(1.0, text="Verkehrsdaten für die Woche geladen!"); time.sleep(0.5); progress_bar.empty()
     if DEBUG_OSM: st.sidebar.info(f"OSM: Week data preloaded and cached: {week_cache_key}")
@@ -923,24 +808,20 @@ def _load_construction_schedule(project):
     if cache_key in st.session_state:
         return st.session_state[cache_key]
 
-    schedule_df = None
     # Prefer explicit file_path if provided
     file_path = project.get("file_path")
-    if file_path and os.path.exists(file_path):
-        schedule_df = pd.read_csv(file_path)
-    else:
+    if not (file_path and os.path.exists(file_path)):
         # Fallback: assemble from name + file_name (legacy fields)
         proj_name = project.get("name", "")
         file_name = project.get("file_name", "Material_Lieferungen.csv")
-        potential_path = os.path.join("data", "projects", proj_name, file_name)
-        if os.path.exists(potential_path):
-            schedule_df = pd.read_csv(potential_path)
+        file_path = os.path.join("data", "projects", proj_name, file_name)
 
-    if schedule_df is None:
-        schedule_df = pd.DataFrame()  # empty placeholder
+    # Parsed once per upload into the schedule store, shared with the simulation
+    tables = get_schedule_tables(project.get("schedule_hash"), file_path)
+    activities = tables.get("activities")
 
-    # Tidy column names
-    schedule_df.columns = schedule_df.columns.str.strip()
+    # Copy: the helper columns added below must not leak into the shared table
+    schedule_df = activities.copy() if activities is not None else pd.DataFrame()  # empty placeholder
     st.session_state[cache_key] = schedule_df
     return schedule_df
 
@@ -1002,9 +883,8 @@ def _allocate_deliveries_random(total_int: int, project, date_str: str):
     # Prepare probability vector in fixed hour order 7-17
     hours_order = sorted(_HOURLY_WEIGHTS.keys())
     probs = np.array([_HOURLY_WEIGHTS[h] for h in hours_order])
-    # Seed RNG with stable seed based on date + project id so result reproducible in a session
-    seed_val = abs(hash(f"{project.get('id','p')}::{date_str}")) % (2**32)
-    rng = np.random.default_rng(seed_val)
+    # Stream keyed on project id + date: identical in every session and process
+    rng = day_rng(project.get('id', 'p'), datetime.strptime(date_str, "%Y-%m-%d").date(), "delivery_allocation")
     allocation = rng.multinomial(total_int, probs)
     return {h: int(allocation[i]) for i, h in enumerate(hours_order)}
 
@@ -1055,6 +935,161 @@ def get_traffic_data(date_str, hour, project, base_osm_segments=None, skip_cache
             if DEBUG_OSM: st.sidebar.warning(f"OSM: Error checking weekly cache: {e_cache}. Recalculating.")
             # Continue with direct calculation if any error in cache lookup
     
+    return _compute_traffic_data([(date_str, hour)], project, base_osm_segments)[0]
+
+# Utilization bounds (min, max) of a segment per highway type
+_UTIL_FACTORS = {'motorway':(0.30,0.85),'trunk':(0.30,0.85),'primary':(0.30,0.85),'secondary':(0.20,0.70),'tertiary':(0.20,0.70),'residential':(0.03,0.25),'living_street':(0.01,0.15),'service':(0.02,0.20),'unclassified':(0.1,0.4),'road':(0.1,0.4)}
+_DEFAULT_UTIL = (0.05,0.20)
+
+# Flow ceilings of minor roads (scaled by the segment and hour factors)
+_MAX_FLOW_RESIDENTIAL = 30
+_MAX_FLOW_SERVICE = 15
+_SERVICE_TYPES = ('service', 'living_street', 'track', 'path')
+
+# Segment models kept in session_state (base segments, access-route subset, ...)
+_SEGMENT_MODEL_CACHE_SIZE = 4
+
+def _get_segment_model(segments):
+    """Return the per-segment arrays of the hourly traffic model for a segment list.
+
+    Everything of a segment that does not depend on the hour (capacity, utilization
+    bounds and flow ceiling of its highway type, the pseudo-random factors derived from
+    the md5 of its id) is computed once per segment list and cached in session_state,
+    so an hour or a whole week is a few array operations over all segments.
+    """
+    if "segment_models" not in st.session_state:
+        st.session_state.segment_models = {}
+    models = st.session_state.segment_models
+    model = models.get(id(segments))
+    if model is not None and model["segments"] is segments:
+        return model
+
+    digests = [int(hashlib.md5(str(seg["segment_id"]).encode()).hexdigest(), 16) for seg in segments]
+    highway_types = [seg.get("highway_type", "N/A") for seg in segments]
+    raw_capacity = np.array([seg.get("capacity", DEFAULT_CAPACITY) for seg in segments], dtype=np.float64)
+    bounds = np.array([_UTIL_FACTORS.get(hw, _DEFAULT_UTIL) for hw in highway_types], dtype=np.float64).reshape(-1, 2)
+    rand_factor = np.array([(d % 71 + 30) / 100.0 for d in digests], dtype=np.float64)
+    flow_limit = np.array([
+        _MAX_FLOW_RESIDENTIAL if hw == 'residential' else _MAX_FLOW_SERVICE if hw in _SERVICE_TYPES else np.inf
+        for hw in highway_types
+    ], dtype=np.float64)
+
+    model = {
+        "segments": segments,
+        "segment_ids": [seg["segment_id"] for seg in segments],
+        "coordinates": [seg.get("coordinates", []) for seg in segments],
+        "names": [seg.get("name", "N/A") for seg in segments],
+        "highway_types": highway_types,
+        "raw_capacity": raw_capacity,
+        "capacity": np.where(raw_capacity == 0, DEFAULT_CAPACITY, raw_capacity),
+        "min_util": bounds[:, 0],
+        "max_util": bounds[:, 1],
+        "rand_factor": rand_factor,
+        "flow_ceiling": flow_limit * rand_factor,
+        "default_factor": np.array([(d % 50 + 10) / 100.0 for d in digests], dtype=np.float64),
+    }
+    models[id(segments)] = model
+    while len(models) > _SEGMENT_MODEL_CACHE_SIZE:
+        models.pop(next(iter(models)))
+    return model
+
+def _segment_construction_inputs(project, model):
+    """Delivery shares and access-route mask of a segment model (added on first use)."""
+    if "routed" not in model:
+        segments = model["segments"]
+        access_route_ids = _get_access_route_segment_ids(project, segments)
+        model["access_mask"] = np.array([seg_id in access_route_ids for seg_id in model["segment_ids"]], dtype=bool)
+        model["access_count"] = len(access_route_ids)
+        model["routed"] = _apply_delivery_routes(project, segments)
+        if model["routed"]:
+            model["delivery_share"] = np.array([seg['delivery_share'] for seg in segments], dtype=np.float64)
+    return model
+
+def _counter_summaries(date_hours):
+    """Total traffic and weighted average congestion of the loaded counter stations.
+
+    Station traffic of all stations and (date_str, hour) pairs comes from one lookup
+    in the stacked profile tensors (see _profile_tensor).
+
+    Returns:
+        Tuple (total traffic, average congestion), lists aligned with date_hours
+    """
+    profiles = list(st.session_state.counter_profiles.values())
+    if not profiles or not date_hours:
+        return [0] * len(date_hours), [0.0] * len(date_hours)
+    dates = [datetime.strptime(date_str, "%Y-%m-%d").date() for date_str, _ in date_hours]
+    vehicles = _station_traffic_matrix(profiles, dates, [hour for _, hour in date_hours])
+
+    weighted_cong_sum_counters, num_primary_c, num_secondary_c = 0, 0, 0
+    for profile_meta_calc, vehicles_calc in zip(profiles, vehicles):
+        station_cap = 500 if profile_meta_calc.get('is_primary') else 400
+        cong_station = np.minimum(1.0, vehicles_calc / station_cap)
+        if profile_meta_calc.get('is_primary'): weighted_cong_sum_counters = weighted_cong_sum_counters + cong_station * 1.5; num_primary_c +=1
+        else: weighted_cong_sum_counters = weighted_cong_sum_counters + cong_station; num_secondary_c += 1
+    weight_sum = (num_primary_c*1.5)+num_secondary_c
+    avg_cong_counters = weighted_cong_sum_counters / weight_sum
+    return vehicles.sum(axis=0).tolist(), avg_cong_counters.tolist()
+
+def _hour_time_factor(hour, avg_cong_counters):
+    """Share of the utilization range reached in an hour, from the counter congestion."""
+    time_factor_base = 0.15
+    if 7<=hour<=9: time_factor_curr=time_factor_base+0.65+(avg_cong_counters*0.4)
+    elif 16<=hour<=18: time_factor_curr=time_factor_base+0.60+(avg_cong_counters*0.4)
+    elif 10<=hour<=15: time_factor_curr=time_factor_base+0.25+(avg_cong_counters*0.25)
+    else: time_factor_curr=time_factor_base+0.1+(avg_cong_counters*0.15)
+    return max(0.05, min(time_factor_curr, 1.0))
+
+def _segment_traffic(model, time_factors, deliveries):
+    """Volume, congestion and construction traffic of every segment for several hours at once.
+
+    Args:
+        model: Segment model (see _get_segment_model) with construction inputs
+        time_factors: Time factor of each hour (N)
+        deliveries: Deliveries of each hour (N)
+
+    Returns:
+        Tuple (volume, congestion, construction traffic), float64 arrays shaped (N, E)
+    """
+    time_factors = np.asarray(time_factors, dtype=np.float64)[:, None]
+    deliveries = np.asarray(deliveries, dtype=np.float64)[:, None]
+    capacity = model["capacity"]
+
+    hourly_driven_u = model["min_util"] + (model["max_util"] - model["min_util"]) * time_factors
+    final_u_rate = np.maximum(0.005, np.minimum(hourly_driven_u * model["rand_factor"], 1.0))
+    volume = np.minimum(capacity * final_u_rate, model["flow_ceiling"] * time_factors)
+    volume = np.maximum(0, np.minimum(volume, capacity * 1.5))
+
+    # Construction-site traffic along the truck routes (else spread over the access route)
+    if model["routed"]:
+        extra_construct = deliveries * model["delivery_share"]
+    elif model["access_count"]:
+        extra_construct = np.where(model["access_mask"], (deliveries * 2) / max(1, model["access_count"]), 0.0)
+    else:
+        extra_construct = np.zeros_like(volume)
+    volume = volume + extra_construct
+
+    return volume, np.minimum(1.0, volume / capacity), extra_construct
+
+def _default_segment_traffic(model, hour):
+    """Rough volumes and congestion of every segment when no counter profiles are loaded."""
+    time_factor_default = 0.3 
+    if 7 <= hour <= 9 or 16 <= hour <= 18: time_factor_default = 0.6
+    elif 10 <= hour <= 15: time_factor_default = 0.4
+    raw_capacity = model["raw_capacity"]
+    volume = np.minimum(raw_capacity * model["default_factor"] * time_factor_default, raw_capacity * 1.2)
+    congestion = np.minimum(1.0, np.divide(volume, raw_capacity, out=np.zeros_like(volume), where=raw_capacity > 0))
+    return volume, congestion
+
+def _compute_traffic_data(date_hours, project, base_osm_segments=None, include_segments=True):
+    """Compute the traffic data of get_traffic_data for several (date_str, hour) pairs.
+
+    Segment volumes of all pairs come from one broadcast over the segment model.
+    With include_segments=False only the stats are filled in ("traffic_segments"
+    stays empty), for callers that need no map data.
+
+    Returns:
+        List of traffic data dictionaries, in the order of date_hours
+    """
     # Ensure counter profiles are loaded if they are supposed to be the basis for stats
     # This check is important if `base_osm_segments` might be present but counters are not yet loaded.
     # However, load_profiles_for_counters is called early in show_dashboard.
@@ -1065,100 +1100,223 @@ def get_traffic_data(date_str, hour, project, base_osm_segments=None, skip_cache
             st.session_state.suppress_dashboard_progress = True
             load_profiles_for_counters(project)
             del st.session_state.suppress_dashboard_progress
-    simulated_osm_segments_for_pydeck = []
+    model = _get_segment_model(base_osm_segments) if base_osm_segments else None
+
     if "counter_profiles" not in st.session_state or not st.session_state.counter_profiles:
         if DEBUG_OSM: st.sidebar.warning("OSM (GTD): No counter profiles. Defaulting OSM data.")
-        if base_osm_segments:
-            time_factor_default = 0.3 
-            if 7 <= hour <= 9 or 16 <= hour <= 18: time_factor_default = 0.6
-            elif 10 <= hour <= 15: time_factor_default = 0.4
-            for osm_segment_item in base_osm_segments:
-                try: seg_hash_rand = (int(hashlib.md5(str(osm_segment_item["segment_id"]).encode()).hexdigest(),16)%50+10)/100.0
-                except: seg_hash_rand = np.random.uniform(0.1,0.6)
-                sim_vol = osm_segment_item["capacity"] * seg_hash_rand * time_factor_default
-                sim_vol = min(sim_vol, osm_segment_item["capacity"] * 1.2)
-                cong_default = (min(1.0, sim_vol / osm_segment_item["capacity"]) if osm_segment_item["capacity"] > 0 else 0)
-                coords_for_pydeck_default = osm_segment_item.get("coordinates", [])
-                simulated_osm_segments_for_pydeck.append({
-                    "segment_id": osm_segment_item["segment_id"], "coordinates": coords_for_pydeck_default,
-                    "traffic_volume": int(sim_vol), "congestion_level": cong_default,
-                    "name": osm_segment_item.get("name", "N/A"), "highway_type": osm_segment_item.get("highway_type", "N/A"),
-                })
-        return {"date": date_str, "hour": hour, "traffic_segments": simulated_osm_segments_for_pydeck, "congestion_points": [], "stats": {"total_traffic": 0, "average_congestion": 0, "deliveries_count": 0, "access_traffic": 0, "construction_traffic": 0, "construction_share_pct": 0}}
-    current_date_obj_calc = datetime.strptime(date_str, "%Y-%m-%d").date()
-    total_traffic_counters, weighted_cong_sum_counters, num_primary_c, num_secondary_c = 0,0,0,0
-    for profile_id_calc, profile_meta_calc in st.session_state.counter_profiles.items():
-        vehicles_calc = get_station_traffic(profile_meta_calc, current_date_obj_calc, hour)
-        total_traffic_counters += vehicles_calc
-        station_cap = 500 if profile_meta_calc.get('is_primary') else 400
-        cong_station = min(1.0, vehicles_calc / station_cap) if station_cap > 0 else 0
-        if profile_meta_calc.get('is_primary'): weighted_cong_sum_counters += cong_station * 1.5; num_primary_c +=1
-        else: weighted_cong_sum_counters += cong_station; num_secondary_c += 1
-    avg_cong_counters = (weighted_cong_sum_counters / ((num_primary_c*1.5)+num_secondary_c)) if ((num_primary_c*1.5)+num_secondary_c) > 0 else 0.0
+        results = []
+        for date_str, hour in date_hours:
+            simulated_osm_segments_for_pydeck = []
+            if model is not None and include_segments:
+                volume, congestion = _default_segment_traffic(model, hour)
+                simulated_osm_segments_for_pydeck = [
+                    {"segment_id": seg_id, "coordinates": coords, "traffic_volume": vol, "congestion_level": cong, "name": name, "highway_type": hw}
+                    for seg_id, coords, vol, cong, name, hw in zip(
+                        model["segment_ids"], model["coordinates"], volume.astype(np.int64).tolist(),
+                        congestion.tolist(), model["names"], model["highway_types"])
+                ]
+            results.append({"date": date_str, "hour": hour, "traffic_segments": simulated_osm_segments_for_pydeck, "congestion_points": [], "stats": {"total_traffic": 0, "average_congestion": 0, "deliveries_count": 0, "access_traffic": 0, "construction_traffic": 0, "construction_share_pct": 0}})
+        return results
+
+    summaries = list(zip(*_counter_summaries(date_hours)))
     # --- Real deliveries from schedule (no simulation) ---
-    deliveries_calc = int(get_hourly_construction_deliveries(date_str, hour, project))
-    if base_osm_segments:
-        time_factor_base = 0.15
-        if 7<=hour<=9: time_factor_curr=time_factor_base+0.65+(avg_cong_counters*0.4)
-        elif 16<=hour<=18: time_factor_curr=time_factor_base+0.60+(avg_cong_counters*0.4)
-        elif 10<=hour<=15: time_factor_curr=time_factor_base+0.25+(avg_cong_counters*0.25)
-        else: time_factor_curr=time_factor_base+0.1+(avg_cong_counters*0.15)
-        time_factor_curr = max(0.05, min(time_factor_curr, 1.0))
-        util_factors = {'motorway':(0.30,0.85),'trunk':(0.30,0.85),'primary':(0.30,0.85),'secondary':(0.20,0.70),'tertiary':(0.20,0.70),'residential':(0.03,0.25),'living_street':(0.01,0.15),'service':(0.02,0.20),'unclassified':(0.1,0.4),'road':(0.1,0.4)}
-        default_util = (0.05,0.20); max_flow_res=30; max_flow_serv_liv=15
-
-        # --- NEW: determine which segments belong to the project's access route(s) ---
-        access_route_ids = _get_access_route_segment_ids(project, base_osm_segments)
+    deliveries = [get_hourly_construction_deliveries(date_str, hour, project) for date_str, hour in date_hours]
+
+    if model is not None:
+        _segment_construction_inputs(project, model)
+        time_factors = [_hour_time_factor(hour, avg_cong) for (_, hour), (_, avg_cong) in zip(date_hours, summaries)]
+        volumes, congestions, extras = _segment_traffic(model, time_factors, [int(d) for d in deliveries])
+        volumes_int = volumes.astype(np.int64)
+        capacities = model["capacity"].astype(np.int64).tolist()
+        access_traffic = volumes_int[:, model["access_mask"]].sum(axis=1).tolist()
+
+    results = []
+    for i, ((date_str, hour), (total_traffic_counters, avg_cong_counters)) in enumerate(zip(date_hours, summaries)):
+        deliveries_calc = int(deliveries[i])
+        simulated_osm_segments_for_pydeck = []
         access_traffic_hour = 0  # aggregated traffic for access route this hour
+        if model is not None:
+            access_traffic_hour = access_traffic[i]
+        if model is not None and include_segments:
+            simulated_osm_segments_for_pydeck = [
+                {"segment_id": seg_id, "coordinates": coords, "traffic_volume": vol, "congestion_level": cong, "name": name,
+                 "highway_type": hw, "capacity": cap, "construction_traffic": extra}
+                for seg_id, coords, vol, cong, name, hw, cap, extra in zip(
+                    model["segment_ids"], model["coordinates"], volumes_int[i].tolist(), congestions[i].tolist(),
+                    model["names"], model["highway_types"], capacities, extras[i].astype(np.int64).tolist())
+            ]
+
+        # Calculate total construction traffic for the hour from schedule (real data, not simulated)
+        total_construction_traffic = int(round(deliveries[i]))
+
+        results.append({"date": date_str, "hour": hour, "traffic_segments": simulated_osm_segments_for_pydeck, "congestion_points": [], "stats": {"total_traffic": int(total_traffic_counters), "average_congestion": avg_cong_counters, "deliveries_count": deliveries_calc, "access_traffic": access_traffic_hour, "construction_traffic": total_construction_traffic, "construction_share_pct": (deliveries_calc * 2 / access_traffic_hour * 100) if access_traffic_hour else 0}})
+    return results
+
+# Version of the dashboard traffic model; bump when its formulas change so that
+# memoized day summaries are recomputed
+TRAFFIC_MODEL_VERSION = 1
+
+@dataclass
+class DaySummary:
+    """Hourly traffic stats of one day, aligned with hours (see get_day_summary)."""
+    date: str
+    hours: List[int]
+    deliveries: List[int]
+    total_traffic: List[int]
+    average_congestion: List[float]
+    access_traffic: List[int]
+    construction_traffic: List[int]
+
+    def hour_stats(self, hour):
+        """Stats of one hour in the keys of get_traffic_data (None outside the day's hours)."""
+        if hour not in self.hours:
+            return None
+        i = self.hours.index(hour)
+        return {
+            "total_traffic": self.total_traffic[i],
+            "average_congestion": self.average_congestion[i],
+            "deliveries_count": self.deliveries[i],
+            "access_traffic": self.access_traffic[i],
+            "construction_traffic": self.construction_traffic[i],
+        }
+
+    @property
+    def total_deliveries_day(self):
+        return sum(self.deliveries)
+
+    @property
+    def total_traffic_day(self):
+        return sum(self.total_traffic)
+
+    @property
+    def average_congestion_day(self):
+        return sum(self.average_congestion) / len(self.hours) if self.hours else 0
+
+    @property
+    def access_traffic_day(self):
+        """Mean hourly traffic on the access route"""
+        return sum(self.access_traffic) / len(self.hours) if self.hours else 0
 
-        for osm_seg_item in base_osm_segments:
-            seg_cap = osm_seg_item.get('capacity',DEFAULT_CAPACITY); seg_cap = DEFAULT_CAPACITY if seg_cap==0 else seg_cap
-            min_u,max_u=util_factors.get(osm_seg_item['highway_type'],default_util)
-            hourly_driven_u=min_u+(max_u-min_u)*time_factor_curr
-            try: seg_hash_rand_f=(int(hashlib.md5(str(osm_seg_item['segment_id']).encode()).hexdigest(),16)%71+30)/100.0
-            except: seg_hash_rand_f=np.random.uniform(0.6,0.9)
-            final_u_rate=hourly_driven_u*seg_hash_rand_f; final_u_rate=max(0.005,min(final_u_rate,1.0))
-            sim_volume_calc=seg_cap*final_u_rate
-            current_hw_type=osm_seg_item['highway_type']
-            if current_hw_type=='residential': sim_volume_calc=min(sim_volume_calc,max_flow_res*seg_hash_rand_f*time_factor_curr)
-            elif current_hw_type in ['service','living_street','track','path']: sim_volume_calc=min(sim_volume_calc,max_flow_serv_liv*seg_hash_rand_f*time_factor_curr)
-            sim_volume_calc=max(0,min(sim_volume_calc,seg_cap*1.5))
-
-            # ---- NEW: add construction-site traffic on the access route ----
-            extra_construct = 0
-            if access_route_ids and osm_seg_item['segment_id'] in access_route_ids:
-                extra_construct = (deliveries_calc * 2) / max(1, len(access_route_ids))
-                sim_volume_calc += extra_construct
-
-            congestion_calc=min(1.0,sim_volume_calc/seg_cap) if seg_cap > 0 else 0.0
-            coords_for_pydeck=osm_seg_item.get('coordinates',[])
-            simulated_osm_segments_for_pydeck.append({
-                "segment_id": osm_seg_item['segment_id'],
-                "coordinates": coords_for_pydeck,
-                "traffic_volume": int(sim_volume_calc),
-                "congestion_level": congestion_calc,
-                "name": osm_seg_item.get('name','N/A'),
-                "highway_type": current_hw_type,
-                "capacity": int(seg_cap),
-                "construction_traffic": int(extra_construct)
-            })
-
-            if osm_seg_item['segment_id'] in access_route_ids:
-                access_traffic_hour += int(sim_volume_calc)
-
-    # Calculate total construction traffic for the day from schedule (real data, not simulated)
-    total_construction_traffic = int(round(get_hourly_construction_deliveries(date_str, hour, project)))
-
-    return {"date": date_str, "hour": hour, "traffic_segments": simulated_osm_segments_for_pydeck, "congestion_points": [], "stats": {"total_traffic": int(total_traffic_counters), "average_congestion": avg_cong_counters, "deliveries_count": deliveries_calc, "access_traffic": access_traffic_hour, "construction_traffic": total_construction_traffic, "construction_share_pct": (deliveries_calc * 2 / access_traffic_hour * 100) if access_traffic_hour else 0}}
+    @property
+    def construction_traffic_day(self):
+        return sum(self.construction_traffic)
+
+    @property
+    def delivery_share_pct(self):
+        """Delivery trips (two per delivery) in percent of the counted traffic"""
+        total_traffic_day = self.total_traffic_day
+        return (self.total_deliveries_day / total_traffic_day * 100 * 2) if total_traffic_day else 0
+
+def traffic_model_version(project):
+    """Everything besides project and date a day summary depends on.
+
+    Looks up the project's road network, so callers compute it once per render and
+    pass it to every get_day_summary call.
+    """
+    network = get_network(project.get("map_bounds"), project_id=project.get("id"), allow_fetch=False)
+    profiles = st.session_state.get("counter_profiles") or {}
+    return (
+        TRAFFIC_MODEL_VERSION,
+        project.get("schedule_hash"),
+        network.version if network is not None else None,
+        tuple(sorted((profile_id, bool(meta.get("is_primary"))) for profile_id, meta in profiles.items())),
+    )
+
+def get_day_summary(date_str, project, base_osm_segments, start_hour, end_hour, model_version):
+    """Return the traffic stats of every hour of a day, computed in one pass.
+
+    Hours already in the preloaded week are taken from there; the others are computed
+    together (stats only). The summary is memoized in session_state per project, date,
+    hour range and model version (see traffic_model_version), so KPI cards, hourly
+    charts and the resident page share it.
+
+    Returns:
+        DaySummary for the hours start_hour..end_hour
+    """
+    if "day_summaries" not in st.session_state:
+        st.session_state.day_summaries = {}
+    memo_key = (project.get("id", "default"), date_str, start_hour, end_hour, model_version)
+    summary = st.session_state.day_summaries.get(memo_key)
+    if summary is not None:
+        return summary
+
+    hours = list(range(start_hour, end_hour + 1))
+    week_day = {}
+    try:
+        year, week_num, _ = datetime.strptime(date_str, "%Y-%m-%d").date().isocalendar()
+        week_day = st.session_state.get(f"traffic_data_week_{year}_{week_num}_{project.get('id', 'default')}", {}).get(date_str, {})
+    except Exception as e_cache:
+        if DEBUG_OSM: st.sidebar.warning(f"OSM: Error checking weekly cache: {e_cache}. Recalculating.")
+    missing = [hour for hour in hours if hour not in week_day]
+    computed = dict(zip(missing, _compute_traffic_data([(date_str, hour) for hour in missing], project, base_osm_segments, include_segments=False))) if missing else {}
+    stats = [(week_day[hour] if hour in week_day else computed[hour])["stats"] for hour in hours]
+
+    summary = DaySummary(
+        date=date_str,
+        hours=hours,
+        deliveries=[s["deliveries_count"] for s in stats],
+        total_traffic=[s["total_traffic"] for s in stats],
+        average_congestion=[s["average_congestion"] for s in stats],
+        access_traffic=[s["access_traffic"] for s in stats],
+        construction_traffic=[s["construction_traffic"] for s in stats],
+    )
+    st.session_state.day_summaries[memo_key] = summary
+    return summary
+
+# Weekday names of the profile files, in date.weekday() order
+_WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+def _profile_tensor(data_df):
+    """Vehicles per weekday x month x hour of a counter profile, as an int64 (7, 12, 24) array.
+
+    Combinations without a row in the profile are pre-filled with the mean over all
+    weekdays of the same month and hour (0 if the month and hour have no data), so a
+    lookup never has to filter the profile again.
+    """
+    tensor = np.zeros((7, 12, 24), dtype=np.int64)
+    if data_df is None or data_df.empty:
+        return tensor
+    month = pd.to_numeric(data_df['month'], errors='coerce')
+    hour = pd.to_numeric(data_df['hour'], errors='coerce')
+    vehicles = pd.to_numeric(data_df['vehicles'], errors='coerce')
+    in_range = month.between(1, 12) & hour.between(0, 23) & (month % 1 == 0) & (hour % 1 == 0)
+
+    # Fallback: mean over all rows of a month and hour
+    fallback = vehicles[in_range].groupby([month[in_range].astype(int), hour[in_range].astype(int)]).mean().dropna()
+    if not fallback.empty:
+        month_idx = fallback.index.get_level_values(0).to_numpy() - 1
+        hour_idx = fallback.index.get_level_values(1).to_numpy()
+        tensor[:, month_idx, hour_idx] = np.rint(fallback.to_numpy())
+
+    # First row of each weekday, month and hour
+    weekday = data_df['weekday'].map({name: i for i, name in enumerate(_WEEKDAYS)})
+    rows = pd.DataFrame({'weekday': weekday, 'month': month, 'hour': hour, 'vehicles': vehicles})[in_range & weekday.notna()]
+    rows = rows.drop_duplicates(['weekday', 'month', 'hour']).dropna(subset=['vehicles'])
+    tensor[rows['weekday'].astype(int).to_numpy(), rows['month'].astype(int).to_numpy() - 1, rows['hour'].astype(int).to_numpy()] = np.rint(rows['vehicles'].to_numpy())
+    return tensor
+
+def _get_profile_tensor(profile_meta):
+    """Lookup tensor of a loaded profile (built on first use for profiles loaded without one)."""
+    if 'traffic_tensor' not in profile_meta:
+        profile_meta['traffic_tensor'] = _profile_tensor(profile_meta.get('data'))
+    return profile_meta['traffic_tensor']
+
+def _station_traffic_matrix(profiles, dates, hours):
+    """Traffic counts of several stations for aligned lists of dates and hours.
+
+    Returns:
+        int64 array shaped (stations, len(dates))
+    """
+    tensors = np.stack([_get_profile_tensor(profile_meta) for profile_meta in profiles])
+    weekday_idx = np.array([d.weekday() for d in dates], dtype=np.int64)
+    month_idx = np.array([d.month - 1 for d in dates], dtype=np.int64)
+    return tensors[:, weekday_idx, month_idx, np.asarray(hours, dtype=np.int64)]
 
 def get_station_traffic(profile_meta, date_obj, hour):
     """Get traffic count for a specific station, date and hour from its profile data."""
-    if 'data' not in profile_meta:
+    if 'data' not in profile_meta and 'traffic_tensor' not in profile_meta:
         return 0 
-    data_df = profile_meta['data']; weekday_str = date_obj.strftime("%A"); month_val = date_obj.month
-    filtered_df = data_df[(data_df['weekday'] == weekday_str) & (data_df['month'] == month_val) & (data_df['hour'] == hour)]
-    if not filtered_df.empty: return int(round(filtered_df.iloc[0]['vehicles']))
-    else: fallback_df = data_df[(data_df['month'] == month_val) & (data_df['hour'] == hour)]; return int(round(fallback_df['vehicles'].mean())) if not fallback_df.empty else 0
+    return int(_get_profile_tensor(profile_meta)[date_obj.weekday(), date_obj.month - 1, hour])
 
 
 def generate_congestion_points(segments):
@@ -1184,9 +1342,12 @@ def generate_congestion_points(segments):
 
 # Helper: cache and retrieve OSM segment ids that belong to the project's access route(s)
 
-def _get_access_route_segment_ids(project, base_osm_segments, tol=0.0005):
+def _get_access_route_segment_ids(project, base_osm_segments, tol=ACCESS_ROUTE_TOLERANCE):
     """Return a set of OSM segment_ids that spatially match the access routes of the project.
 
+    Candidate segments come from the spatial index of the project's network (built
+    once per network version), so only segments near a route are measured.
+
     Parameters
     ----------
     project : dict
@@ -1200,39 +1361,50 @@ def _get_access_route_segment_ids(project, base_osm_segments, tol=0.0005):
     if cache_key in st.session_state:
         return st.session_state[cache_key]
 
-    # Build shapely objects for the routes first
-    route_geoms = []
-    for route in project.get("access_routes", []):
-        if not route or "coordinates" not in route:
-            continue
-        try:
-            if route.get("type") == "LineString":
-                route_geoms.append(LineString(route["coordinates"]))
-            elif route.get("type") == "Polygon":  # take exterior ring as line
-                route_geoms.append(LineString(route["coordinates"][0]))
-        except Exception:
-            # Skip invalid geometries silently
-            continue
+    route_geoms = route_geometries(project.get("access_routes", []))
 
     seg_ids = set()
     if route_geoms and base_osm_segments:
-        for seg in base_osm_segments:
-            coords = seg.get("coordinates", [])
-            if len(coords) < 2:
-                continue
-            try:
-                seg_line = LineString(coords)
-            except Exception:
-                continue
-            for rline in route_geoms:
-                if seg_line.distance(rline) <= tol:
-                    seg_ids.add(seg["segment_id"])
-                    break
+        # Segments of generate_osm_traffic_segments are in network order
+        network = get_network(project.get("map_bounds"), project_id=project.get("id"), allow_fetch=False)
+        if network is not None and len(network) == len(base_osm_segments):
+            index = get_segment_index(network.version, network.coords, network.offsets)
+        else:
+            index = segments_index(base_osm_segments)
+        for position in segments_within(index, route_geoms, tol):
+            seg_ids.add(base_osm_segments[position]["segment_id"])
 
     st.session_state[cache_key] = seg_ids
     return seg_ids
 
-def _get_access_osm_segments(project, base_osm_segments, tol=0.0005):
+def _apply_delivery_routes(project, base_osm_segments):
+    """Store the delivery trips per delivery of each segment under 'delivery_share'.
+
+    The shares come from the truck routes between the entry points and the site
+    (computed once per network and project geometry, see app.services.delivery_routes).
+    Subsets of annotated segments (e.g. the access-route segments) keep their values.
+
+    Returns True if the segments carry routed shares, False if the network could
+    not be routed (the caller then spreads deliveries over the access route).
+    """
+    if not base_osm_segments:
+        return False
+    if 'delivery_share' in base_osm_segments[0]:
+        return True
+
+    # Segments of generate_osm_traffic_segments are in network order
+    network = get_network(project.get("map_bounds"), project_id=project.get("id"), allow_fetch=False)
+    if network is None or len(network) != len(base_osm_segments):
+        return False
+    share = get_delivery_share(network, project.get("polygon"), project.get("waiting_areas"))
+    if share is None:
+        return False
+
+    for seg, value in zip(base_osm_segments, share.tolist()):
+        seg['delivery_share'] = value
+    return True
+
+def _get_access_osm_segments(project, base_osm_segments, tol=ACCESS_ROUTE_TOLERANCE):
     """Return a list of OSM segment dictionaries that overlap with the project's access route.
 
     This function re-uses `_get_access_route_segment_ids` to identify relevant
@@ -20,6 +20,7 @@ from utils.custom_styles import apply_chart_styling
 import streamlit.components.v1 as components
 import modules.dashboard as _dash
 from config import API_URL  # Import centralized config
+from app.services.random_streams import hour_rng
 
 # API_URL is now imported from config.py
 
@@ -122,13 +123,14 @@ def show_resident_info(project):
     current_hour = datetime.now().hour
     closest_hour = min(available_hours, key=lambda x: abs(x - current_hour))
 
-    hour_data = _dash.get_traffic_data(selected_date_str, closest_hour, project, base_osm_segments)
-    if not hour_data:
-        hour_data = {"traffic_segments": [], "stats": {"total_traffic": 0, "average_congestion": 0, "deliveries_count": 0}}
+    # Day stats shared with the dashboard (computed once per day)
+    day_summary = _dash.get_day_summary(
+        selected_date_str, project, base_osm_segments, start_hour_int, end_hour_int, _dash.traffic_model_version(project)
+    )
+    hour_stats = day_summary.hour_stats(closest_hour) or {"total_traffic": 0, "average_congestion": 0, "deliveries_count": 0}
     
     # Display traffic status
-    hour_data["stats"]["average_congestion"] = hour_data["stats"].get("average_congestion", 0)
-    congestion_level = hour_data["stats"]["average_congestion"]
+    congestion_level = hour_stats.get("average_congestion", 0)
     
     if congestion_level < 0.3:
         status = "Wenig Verkehr"
@@ -299,6 +301,9 @@ def get_simulation_data(project_id):
             
             # Generate hourly data for each day (6am to 6pm)
             for hour in range(6, 19):
+                # Reproducible random values per project, date and hour
+                rng = hour_rng(project_id, current_date, hour, "resident_info")
+                
                 # Create hourly data with random values
                 hourly_data = {
                     "id": f"{project_id}_{date_str}_{hour}",
@@ -311,8 +316,8 @@ def get_simulation_data(project_id):
                             "end_node": f"node_b_{j}",
                             "length": 100 + j * 50,
                             "speed_limit": 50,
-                            "traffic_volume": int(50 + np.random.randint(0, 100) * (1 + 0.5 * (j % 3))),
-                            "congestion_level": min(1.0, 0.2 + np.random.random() * 0.6 * (1 + 0.2 * (j % 3))),
+                            "traffic_volume": int(50 + rng.integers(0, 100) * (1 + 0.5 * (j % 3))),
+                            "congestion_level": min(1.0, 0.2 + rng.random() * 0.6 * (1 + 0.2 * (j % 3))),
                             "coordinates": [
                                 # Generate some coordinates that spread out from a center point
                                 [8.54 + (j % 3) * 0.005, 47.375 + (j // 3) * 0.005],
@@ -324,14 +329,14 @@ def get_simulation_data(project_id):
                     "waiting_areas_status": {
                         "area_0": {
                             "capacity": 10,
-                            "occupied": min(10, int(np.random.randint(0, 8))),
-                            "available": max(0, 10 - int(np.random.randint(0, 8)))
+                            "occupied": min(10, int(rng.integers(0, 8))),
+                            "available": max(0, 10 - int(rng.integers(0, 8)))
                         }
                     },
                     "stats": {
-                        "total_traffic": int(500 + np.random.randint(-100, 200) * (1 + 0.2 * (hour - 6) - 0.2 * abs(hour - 12))),
-                        "average_congestion": min(0.9, max(0.1, 0.3 + np.random.random() * 0.4 * (1 + 0.2 * (hour - 6) - 0.2 * abs(hour - 12)))),
-                        "deliveries_count": int(3 + np.random.randint(0, 8) * (1 + 0.2 * (hour - 6) - 0.2 * abs(hour - 12))),
+                        "total_traffic": int(500 + rng.integers(-100, 200) * (1 + 0.2 * (hour - 6) - 0.2 * abs(hour - 12))),
+                        "average_congestion": min(0.9, max(0.1, 0.3 + rng.random() * 0.4 * (1 + 0.2 * (hour - 6) - 0.2 * abs(hour - 12)))),
+                        "deliveries_count": int(3 + rng.integers(0, 8) * (1 + 0.2 * (hour - 6) - 0.2 * abs(hour - 12))),
                         "construction_phase": "Phase 1"
                     }
                 }
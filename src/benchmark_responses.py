@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Misst Serialisierungszeit und übertragene Bytes der grossen API-Antworten
+(Ergebnisse, Werte, Netz, Tagesverkehr, Projekt): Standardpfad von FastAPI
+(Validierung gegen das response_model + json) gegenüber dem schnellen Pfad
+aus app/api/responses.py (orjson ohne erneute Validierung), jeweils
+unkomprimiert, mit gzip und mit brotli.
+
+Aufruf: python src/benchmark_responses.py <projekt_id> [YYYY-MM-DD] [wiederholungen]
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+# Füge das Hauptverzeichnis zum Python-Pfad hinzu, um Module zu importieren
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+os.chdir(project_root)
+
+from pydantic import TypeAdapter
+
+from app.api import responses
+from app.models.project import Project
+from app.models.simulation import SimulationResult, SimulationNetwork, SimulationValues
+from app.services.project_service import get_project
+from app.services.simulation_service import (
+    get_simulation_results, get_simulation_values, get_simulation_network, get_latest_network_version,
+    get_traffic_rollups
+)
+
+def standard_json(adapter: TypeAdapter, content: Any) -> bytes:
+    """Nachbildung des FastAPI-Standardpfads: validieren, in JSON-Typen umwandeln, json.dumps"""
+    value = adapter.validate_python(content, from_attributes=True)
+    data = adapter.dump_python(value, mode="json")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def measure(function, content: Any, repetitions: int) -> float:
+    """Mittlere Laufzeit in Millisekunden"""
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        function(content)
+    return (time.perf_counter() - start) / repetitions * 1000
+
+def wire_sizes(body: bytes) -> Dict[str, Optional[int]]:
+    """Grösse des Körpers unkomprimiert, mit gzip und mit brotli (falls installiert)"""
+    return {
+        "roh": len(body),
+        "gzip": len(gzip.compress(body, compresslevel=responses.GZIP_LEVEL)),
+        "br": len(responses.brotli.compress(body, quality=responses.BROTLI_QUALITY)) if responses.brotli else None
+    }
+
+def main():
+    if len(sys.argv) < 2:
+        print("Aufruf: python src/benchmark_responses.py <projekt_id> [YYYY-MM-DD] [wiederholungen]")
+        return
+
+    project_id = sys.argv[1]
+    day = datetime.strptime(sys.argv[2], "%Y-%m-%d").date() if len(sys.argv) > 2 else None
+    repetitions = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    if responses.orjson is None:
+        print("Hinweis: orjson ist nicht installiert, der schnelle Pfad nutzt json.")
+
+    result = get_simulation_results(project_id, day, None)
+    if result is None:
+        print(f"Keine Simulationsergebnisse für {project_id} gefunden.")
+        return
+    step_time = result.time_steps[0].time
+    day = step_time.date()
+    hour = step_time.hour
+
+    version = get_latest_network_version(project_id)
+    hourly = {
+        datetime.fromisoformat(bucket["start"]).hour: bucket
+        for bucket in get_traffic_rollups(project_id, "hour", day, day)
+    }
+
+    payloads = [
+        ("results", TypeAdapter(SimulationResult), result),
+        ("values", TypeAdapter(Optional[SimulationValues]), get_simulation_values(project_id, day, hour)),
+        ("network", TypeAdapter(SimulationNetwork), get_simulation_network(project_id, version) if version else None),
+        ("daily-traffic", TypeAdapter(Dict[str, Any]), {"project_id": project_id, "date": day.isoformat(), "hourly_buckets": hourly}),
+        ("project", TypeAdapter(Project), get_project(project_id))
+    ]
+
+    print(f"Projekt {project_id}, {day} {hour:02d}:00, {len(result.traffic_volumes)} Segmente, {repetitions} Wiederholungen")
+    print("-" * 96)
+    print(f"{'Antwort':<15}{'Standard ms':>12}{'Schnell ms':>12}{'Faktor':>8}{'Bytes roh':>12}{'Schnell roh':>13}{'gzip':>12}{'br':>12}")
+
+    for name, adapter, content in payloads:
+        if content is None:
+            print(f"{name:<15} keine Daten")
+            continue
+
+        standard_ms = measure(lambda c: standard_json(adapter, c), content, repetitions)
+        fast_ms = measure(responses.dump_json, content, repetitions)
+        standard_size = len(standard_json(adapter, content))
+        sizes = wire_sizes(responses.dump_json(content))
+
+        print(
+            f"{name:<15}{standard_ms:>12.2f}{fast_ms:>12.2f}{standard_ms / fast_ms:>7.1f}x"
+            f"{standard_size:>12}{sizes['roh']:>13}{sizes['gzip']:>12}{sizes['br'] if sizes['br'] is not None else '-':>12}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Kompiliert die Strassennetze aller Projekte in den gemeinsamen Netzwerk-Store.
+
+Quellen (in dieser Reihenfolge): bestehende Dashboard-GeoPackages in
+data/prepared/osm_cache, zwischengespeicherte Overpass-Antworten in cache/
+und - nur mit --fetch - ein Download von OpenStreetMap.
+"""
+
+import json
+import os
+import sys
+import time
+
+# Füge das Hauptverzeichnis zum Python-Pfad hinzu, um Module zu importieren
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+os.chdir(project_root)
+
+from app.services.network_store import get_network
+
+def main():
+    allow_fetch = "--fetch" in sys.argv[1:]
+    projects_file = "data/projects/projects.json"
+
+    if not os.path.exists(projects_file):
+        print(f"Keine Projekte gefunden ({projects_file}).")
+        return
+
+    with open(projects_file, "r", encoding="utf-8") as f:
+        projects = json.load(f)
+
+    for project in projects:
+        start = time.time()
+        network = get_network(project.get("map_bounds"), project_id=project.get("id"), allow_fetch=allow_fetch)
+        if network is None:
+            print(f"{project.get('name')}: kein lokales Strassennetz verfügbar (mit --fetch herunterladen).")
+        else:
+            print(f"{project.get('name')}: {len(network)} Segmente -> {network.key} ({time.time() - start:.2f}s)")
+
+if __name__ == "__main__":
+    main()
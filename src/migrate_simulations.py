@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Migriert gespeicherte Simulationsergebnisse vom alten Format
+(data/simulations/<projekt>/<datum>/<stunde>.json) in den spaltenbasierten
+Ergebnis-Store (ein Satz .npy-Matrizen pro Tag).
+"""
+
+import os
+import sys
+import time
+
+# Füge das Hauptverzeichnis zum Python-Pfad hinzu, um Module zu importieren
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+os.chdir(project_root)
+
+from app.services.result_store import SIMULATIONS_DIR, has_legacy_results, migrate_legacy_results
+
+def main():
+    keep_legacy = "--keep" in sys.argv[1:]
+
+    if not os.path.isdir(SIMULATIONS_DIR):
+        print(f"Keine Simulationsergebnisse gefunden ({SIMULATIONS_DIR}).")
+        return
+
+    for project_id in sorted(os.listdir(SIMULATIONS_DIR)):
+        if not has_legacy_results(project_id):
+            continue
+        start = time.time()
+        days = migrate_legacy_results(project_id, remove_legacy=not keep_legacy)
+        print(f"{project_id}: {days} Tage migriert ({time.time() - start:.2f}s)")
+
+if __name__ == "__main__":
+    main()
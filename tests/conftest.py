@@ -0,0 +1,21 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.traffic_engine import EdgeArrays  # noqa: E402
+
+
+@pytest.fixture
+def edge_arrays():
+    """50 synthetic edges from next to the site to 2 km away (the first without capacity)"""
+    n = 50
+    return EdgeArrays(
+        segment_ids=[str(i) for i in range(n)], start_nodes=["a"] * n, end_nodes=["b"] * n,
+        coordinates=[[[13.4, 52.5], [13.5, 52.5]]] * n,
+        length=np.full(n, 100.0), speed_limit=np.full(n, 50.0),
+        capacity=np.linspace(0, 1500, n), site_distance=np.linspace(0, 2000, n)
+    )
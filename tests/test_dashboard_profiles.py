@@ -0,0 +1,57 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("pydeck")
+pytest.importorskip("plotly")
+
+from modules import dashboard  # noqa: E402
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# One date of every weekday in every month
+DATES = [date(2025, month, 1) + timedelta(days=i) for month in range(1, 13) for i in range(7)]
+
+
+def _reference_station_traffic(data_df, date_obj, hour):
+    """Row filter per lookup: the weekday, month and hour, else the mean of the month and hour"""
+    rows = data_df[(data_df["weekday"] == date_obj.strftime("%A")) & (data_df["month"] == date_obj.month) & (data_df["hour"] == hour)]
+    if not rows.empty:
+        return int(round(rows.iloc[0]["vehicles"]))
+    fallback = data_df[(data_df["month"] == date_obj.month) & (data_df["hour"] == hour)]
+    return int(round(fallback["vehicles"].mean())) if not fallback.empty else 0
+
+
+@pytest.fixture
+def profile_data():
+    """Sparse counter profile with gaps, duplicates and non-integer means"""
+    rng = np.random.default_rng(3)
+    rows = pd.DataFrame({
+        "weekday": rng.choice(WEEKDAYS, size=3000),
+        "month": rng.integers(1, 13, size=3000),
+        "hour": rng.integers(0, 24, size=3000),
+        "vehicles": rng.integers(0, 900, size=3000).astype(float) + rng.choice([0.0, 0.5, 0.25], size=3000)
+    })
+    return rows[~((rows["month"] == 2) & (rows["hour"] == 3))]
+
+
+def test_profile_tensor_matches_the_row_filter(profile_data):
+    meta = {"data": profile_data}
+    for date_obj in DATES:
+        for hour in range(24):
+            assert dashboard.get_station_traffic(meta, date_obj, hour) == _reference_station_traffic(profile_data, date_obj, hour)
+
+
+def test_station_matrix_matches_single_lookups(profile_data):
+    profiles = [{"data": profile_data}, {"data": profile_data.iloc[::2]}, {"data": pd.DataFrame()}]
+    dates = [d for d in DATES for _ in range(24)]
+    hours = [h for _ in DATES for h in range(24)]
+
+    matrix = dashboard._station_traffic_matrix(profiles, dates, hours)
+
+    assert matrix.shape == (3, len(dates))
+    for s_idx, meta in enumerate(profiles):
+        assert matrix[s_idx].tolist() == [dashboard.get_station_traffic(meta, d, h) for d, h in zip(dates, hours)]
@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("pydeck")
+pytest.importorskip("plotly")
+
+from modules import dashboard  # noqa: E402
+
+PROJECT = {"id": "p1", "schedule_hash": "abc", "map_bounds": {"type": "Polygon", "coordinates": [[[13.4, 52.5]]]}}
+
+
+class SessionState(dict):
+    """Streamlit session state: a dict with attribute access"""
+    __getattr__ = dict.__getitem__
+    __setattr__ = dict.__setitem__
+
+
+@pytest.fixture
+def session(monkeypatch):
+    state = SessionState(counter_profiles={"s1": {"is_primary": True}, "s2": {"is_primary": False}})
+    monkeypatch.setattr(dashboard.st, "session_state", state, raising=False)
+    network = SimpleNamespace(version="net-a")
+    monkeypatch.setattr(dashboard, "get_network", lambda map_bounds, project_id=None, allow_fetch=None: network)
+    return state, network
+
+
+def test_memo_key_changes_with_the_network_version(session):
+    _, network = session
+    before = dashboard.traffic_model_version(PROJECT)
+    network.version = "net-b"
+    assert dashboard.traffic_model_version(PROJECT) != before
+
+
+def test_memo_key_changes_with_the_primary_counter(session):
+    state, _ = session
+    before = dashboard.traffic_model_version(PROJECT)
+    state["counter_profiles"]["s1"]["is_primary"] = False
+    state["counter_profiles"]["s2"]["is_primary"] = True
+    assert dashboard.traffic_model_version(PROJECT) != before
+
+
+def test_memo_key_is_stable(session):
+    assert dashboard.traffic_model_version(PROJECT) == dashboard.traffic_model_version(dict(PROJECT))
+
+
+def test_memoized_summaries_do_not_look_up_the_network(session, monkeypatch):
+    state, _ = session
+    model_version = dashboard.traffic_model_version(PROJECT)
+    summary = dashboard.DaySummary("2024-09-02", [8], [1], [100], [0.5], [50], [2])
+    state["day_summaries"] = {("p1", "2024-09-02", 8, 8, model_version): summary}
+    monkeypatch.setattr(dashboard, "get_network", pytest.fail)
+
+    assert dashboard.get_day_summary("2024-09-02", PROJECT, [], 8, 8, model_version) is summary
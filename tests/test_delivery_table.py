@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from app.services.delivery_table import build_delivery_table, bucket_counts, step_counts
+
+
+def _table(rows):
+    return build_delivery_table(pd.DataFrame(rows, columns=["Date", "TimeWindow", "VehicleType"]))
+
+
+def test_bucket_counts_counts_each_delivery_once_per_hour_and_day():
+    table = _table([
+        ["2024-09-02", "08:00-10:00", "truck"],
+        ["2024-09-02", "09:30-09:45", "van"],
+        ["2024-09-03", "06:00-07:00", "truck"],
+    ])
+    days, first_hour, hours = bucket_counts(table, 6 * 60, 19 * 60)
+
+    assert first_hour == 6
+    assert days.tolist() == [2, 1]
+    # 08:00-10:00 counts once in hours 8, 9 and 10 (inclusive end, as in step_counts)
+    assert hours[0].tolist() == [0, 0, 1, 2, 1, 0, 0, 0, 0, 0, 0, 0, 0]
+    assert hours[1].tolist() == [1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+
+
+def test_bucket_counts_do_not_depend_on_the_step_grid():
+    table = _table([["2024-09-02", "08:10-09:20", "truck"], ["2024-09-02", "17:50-20:00", "van"]])
+    days, first_hour, hours = bucket_counts(table, 8 * 60 + 15, 18 * 60)
+
+    # The span starts within hour 8 and ends with hour 17; later windows are clipped
+    assert first_hour == 8
+    assert days.tolist() == [2]
+    assert hours[0].tolist() == [1, 1, 0, 0, 0, 0, 0, 0, 0, 1]
+
+
+def test_bucket_counts_skip_deliveries_outside_the_span():
+    table = _table([["2024-09-02", "05:00-05:30", "truck"], ["2024-09-02", "20:00-21:00", "truck"]])
+    days, _, hours = bucket_counts(table, 6 * 60, 19 * 60)
+
+    assert days.tolist() == [0]
+    assert not np.any(hours)
+
+
+def _reference_step_counts(table, first_minute, interval_minutes, n_steps):
+    """Per-delivery loop: a delivery counts in every step from its window start to its end"""
+    counts = np.zeros((len(table.dates), n_steps, len(table.vehicle_types)), dtype=np.int64)
+    for d_idx in range(len(table.dates)):
+        for row in range(table.offsets[d_idx], table.offsets[d_idx + 1]):
+            for t_idx in range(n_steps):
+                step_start = first_minute + t_idx * interval_minutes
+                step_end = step_start + interval_minutes
+                if table.start_minute[row] < step_end and table.end_minute[row] >= step_start:
+                    counts[d_idx, t_idx, table.vehicle_type[row]] += 1
+    return counts
+
+
+def test_step_counts_match_a_per_delivery_loop():
+    rng = np.random.default_rng(7)
+    n = 300
+    starts = rng.integers(4 * 60, 20 * 60, size=n)
+    ends = starts + rng.integers(0, 4 * 60, size=n)
+    table = _table([
+        [f"2024-09-{rng.integers(2, 9):02d}", f"{s // 60:02d}:{s % 60:02d}-{e // 60:02d}:{e % 60:02d}", rng.choice(["truck", "van", "mixer"])]
+        for s, e in zip(starts, ends)
+    ] + [["2024-09-02", "09:00-08:00", "van"], ["not a date", "08:00-09:00", "van"], ["2024-09-02", "morning", "van"]])
+
+    assert len(table) == n + 1
+    for first_minute, interval_minutes, n_steps in ((6 * 60, 60, 13), (6 * 60, 15, 49), (6 * 60 + 10, 30, 20), (0, 5, 288)):
+        assert np.array_equal(
+            step_counts(table, first_minute, interval_minutes, n_steps),
+            _reference_step_counts(table, first_minute, interval_minutes, n_steps)
+        )
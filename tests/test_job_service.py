@@ -0,0 +1,76 @@
+import queue
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.models.simulation import SimulationRequest
+from app.services import job_service
+
+
+@pytest.fixture
+def job_registry(monkeypatch):
+    """Empty job registry; jobs stay queued because no worker is started"""
+    monkeypatch.setattr(job_service, "JOBS", {})
+    monkeypatch.setattr(job_service, "_ACTIVE_JOBS", {})
+    monkeypatch.setattr(job_service, "_CANCEL_EVENTS", {})
+    monkeypatch.setattr(job_service, "_QUEUE", queue.PriorityQueue())
+    monkeypatch.setattr(job_service, "_ensure_workers", lambda: None)
+    return job_service.JOBS
+
+
+def _request(**kwargs):
+    return SimulationRequest(project_id="p1", start_date=date(2024, 9, 2), end_date=date(2024, 9, 6), **kwargs)
+
+
+def test_identical_requests_are_deduplicated(job_registry):
+    first = job_service.submit_job(_request())
+    second = job_service.submit_job(_request())
+    assert first.id == second.id
+    assert len(job_registry) == 1
+
+
+def test_ensemble_and_single_run_get_separate_jobs(job_registry):
+    single = job_service.submit_job(_request(n_samples=1))
+    ensemble = job_service.submit_job(_request(n_samples=50))
+    assert single.id != ensemble.id
+    assert ensemble.request.n_samples == 50
+    assert job_service.submit_job(_request(n_samples=50)).id == ensemble.id
+
+
+def test_cancelled_request_can_be_submitted_again(job_registry):
+    first = job_service.submit_job(_request())
+    job_service.cancel_job(first.id)
+    second = job_service.submit_job(_request())
+    assert second.id != first.id
+    assert second.status == "queued"
+
+
+def test_finished_jobs_are_evicted_after_the_retention(job_registry, monkeypatch):
+    monkeypatch.setattr(job_service, "JOB_RETENTION_SECONDS", 60)
+    old = job_service.submit_job(_request())
+    recent = job_service.submit_job(_request(n_samples=2))
+    for job in (old, recent):
+        job_service.cancel_job(job.id)
+    old.finished_at = datetime.now() - timedelta(minutes=5)
+
+    assert [job.id for job in job_service.get_jobs()] == [recent.id]
+
+
+def test_finished_jobs_are_capped(job_registry, monkeypatch):
+    monkeypatch.setattr(job_service, "MAX_FINISHED_JOBS", 2)
+    jobs = [job_service.submit_job(_request(n_samples=n)) for n in range(1, 5)]
+    for job in jobs[:3]:
+        job_service.cancel_job(job.id)
+
+    # The active job stays, of the finished ones only the newest two
+    assert {job.id for job in job_service.get_jobs()} == {job.id for job in jobs[1:]}
+    assert set(job_registry) == {job.id for job in jobs[1:]}
+
+
+def test_completed_jobs_no_longer_deduplicate(job_registry, monkeypatch):
+    monkeypatch.setattr(job_service, "run_simulation", lambda request, on_day_complete, cancel_event: None)
+    first = job_service.submit_job(_request())
+    job_service._run_job(first.id)
+
+    assert first.status == "completed"
+    assert job_service.submit_job(_request()).id != first.id
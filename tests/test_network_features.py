@@ -0,0 +1,34 @@
+from datetime import datetime
+
+import pandas as pd
+
+from app.models.project import Project
+from app.services.network_features import NUMERIC_COLUMNS, TEXT_COLUMNS, features_path, load_feature_table, save_feature_table
+
+SITE = {"type": "Polygon", "coordinates": [[[13.40, 52.52], [13.41, 52.52], [13.41, 52.53], [13.40, 52.52]]]}
+
+
+def _project(tmp_path, project_id):
+    return Project(
+        id=project_id, name="Baustelle", file_name="plan.xlsx", file_path=str(tmp_path / "plan.xlsx"),
+        created_at=datetime(2024, 9, 2), polygon=SITE, map_bounds=SITE
+    )
+
+
+def _features(n):
+    features = pd.DataFrame({col: [f"{col}{i}" for i in range(n)] for col in TEXT_COLUMNS})
+    for col in NUMERIC_COLUMNS:
+        features[col] = [float(i) for i in range(n)]
+    return features
+
+
+def test_projects_in_one_directory_keep_separate_feature_tables(tmp_path):
+    first, second = _project(tmp_path, "p1"), _project(tmp_path, "p2")
+    assert features_path(first) != features_path(second)
+
+    save_feature_table(first, _features(3), "net-a")
+    save_feature_table(second, _features(5), "net-b")
+
+    assert len(load_feature_table(first, "net-a")) == 3
+    assert len(load_feature_table(second, "net-b")) == 5
+    assert load_feature_table(first, "net-b") is None
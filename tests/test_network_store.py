@@ -0,0 +1,48 @@
+import pytest
+
+from app.services import network_store
+
+BOUNDS = {"type": "Polygon", "coordinates": [[[13.40, 52.52], [13.41, 52.52], [13.41, 52.53], [13.40, 52.53], [13.40, 52.52]]]}
+
+
+@pytest.fixture
+def lookups(tmp_path, monkeypatch):
+    """Empty store whose Overpass cache and download are counted"""
+    monkeypatch.setattr(network_store, "STORE_DIR", str(tmp_path / "store"))
+    monkeypatch.setattr(network_store, "LEGACY_GPKG_DIR", str(tmp_path / "osm_cache"))
+    monkeypatch.setattr(network_store, "NETWORKS", {})
+    monkeypatch.setattr(network_store, "MISSES", {})
+    calls = {"cache": 0, "fetch": 0}
+
+    def compile_from_overpass_cache(bounds):
+        calls["cache"] += 1
+
+    def fetch_network(bounds):
+        calls["fetch"] += 1
+
+    monkeypatch.setattr(network_store, "compile_from_overpass_cache", compile_from_overpass_cache)
+    monkeypatch.setattr(network_store, "_fetch_network", fetch_network)
+    return calls
+
+
+def test_misses_are_remembered(lookups):
+    assert network_store.get_network(BOUNDS, project_id="p1", allow_fetch=True) is None
+    assert network_store.get_network(BOUNDS, project_id="p1", allow_fetch=True) is None
+    assert network_store.get_network(BOUNDS, project_id="p1", allow_fetch=False) is None
+    assert lookups == {"cache": 1, "fetch": 1}
+
+
+def test_offline_miss_does_not_block_a_download(lookups):
+    network_store.get_network(BOUNDS, allow_fetch=False)
+    network_store.get_network(BOUNDS, allow_fetch=False)
+    assert lookups == {"cache": 1, "fetch": 0}
+
+    network_store.get_network(BOUNDS, allow_fetch=True)
+    assert lookups == {"cache": 2, "fetch": 1}
+
+
+def test_misses_are_retried_after_the_timeout(lookups, monkeypatch):
+    network_store.get_network(BOUNDS, allow_fetch=False)
+    monkeypatch.setattr(network_store, "MISS_RETRY_SECONDS", 0)
+    network_store.get_network(BOUNDS, allow_fetch=False)
+    assert lookups["cache"] == 2
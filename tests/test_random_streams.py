@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+from datetime import date, time
+
+import numpy as np
+
+from app.services.random_streams import day_rng, hour_rng, step_rng, stream_key
+from app.services.traffic_engine import simulate_day
+
+DAY = date(2024, 9, 2)
+REPO = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _draws(rng):
+    return rng.integers(0, 1_000_000, size=16)
+
+
+def _step_rngs(steps):
+    return [step_rng("p1", DAY, step) for step in steps]
+
+
+def test_same_key_gives_same_draws():
+    assert np.array_equal(_draws(hour_rng("p1", DAY, 8)), _draws(hour_rng("p1", DAY, 8)))
+    assert np.array_equal(_draws(day_rng("p1", DAY, "waiting_areas")), _draws(day_rng("p1", DAY, "waiting_areas")))
+
+
+def test_streams_differ_by_every_key_part():
+    reference = _draws(hour_rng("p1", DAY, 8))
+    for other in (
+        hour_rng("p2", DAY, 8),
+        hour_rng("p1", date(2024, 9, 3), 8),
+        hour_rng("p1", DAY, 9),
+        hour_rng("p1", DAY, 8, stream="waiting_areas"),
+        hour_rng("p1", DAY, 8, model_version=0),
+        day_rng("p1", DAY),
+    ):
+        assert not np.array_equal(reference, _draws(other))
+
+
+def test_full_hour_steps_use_the_hour_stream():
+    assert np.array_equal(_draws(step_rng("p1", DAY, time(8))), _draws(hour_rng("p1", DAY, 8)))
+    assert not np.array_equal(_draws(step_rng("p1", DAY, time(8, 15))), _draws(hour_rng("p1", DAY, 8)))
+
+
+def test_stream_keys_do_not_depend_on_the_hash_seed():
+    code = "from datetime import date; from app.services.random_streams import stream_key; print(stream_key('p1', date(2024, 9, 2), 8))"
+    keys = {
+        subprocess.run(
+            [sys.executable, "-c", code], cwd=REPO, capture_output=True, text=True, check=True,
+            env={**os.environ, "PYTHONHASHSEED": seed}
+        ).stdout.strip()
+        for seed in ("1", "2")
+    }
+    assert keys == {str(stream_key("p1", DAY, 8))}
+
+
+def test_step_draws_do_not_depend_on_the_other_steps(edge_arrays):
+    steps = [time(hour) for hour in range(6, 19)]
+
+    full_volumes, _ = simulate_day(edge_arrays, [s.hour for s in steps], np.ones(len(steps)), _step_rngs(steps))
+    again, _ = simulate_day(edge_arrays, [s.hour for s in steps], np.ones(len(steps)), _step_rngs(steps))
+    part_volumes, _ = simulate_day(edge_arrays, [8, 9], np.ones(2), _step_rngs(steps[2:4]))
+
+    assert np.array_equal(full_volumes, again)
+    assert np.array_equal(full_volumes[2:4], part_volumes)
@@ -0,0 +1,127 @@
+import os
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from app.models.simulation import SimulationResult, SimulationTimeStep, TrafficSegment
+from app.services import result_store
+
+DAY = date(2024, 9, 2)
+
+
+@pytest.fixture(autouse=True)
+def simulations_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_store, "SIMULATIONS_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _result(hour, ensemble=False):
+    # Congestion levels exactly representable in float32, as stored
+    segments = [
+        TrafficSegment(
+            segment_id=f"s{i}", start_node=f"n{i}", end_node=f"n{i + 1}", length=10.5 * (i + 1), speed_limit=50.0,
+            traffic_volume=100 * i + hour, congestion_level=[0.25, 0.5, 0.875][i],
+            coordinates=[[13.4 + i / 100, 52.5], [13.41 + i / 100, 52.51]],
+            ensemble={"volume_mean": 99.5 + i, "exceedance_probability": 0.125} if ensemble else None
+        )
+        for i in range(3)
+    ]
+    return SimulationResult(
+        id=f"p1_{DAY.isoformat()}_{hour}",
+        project_id="p1",
+        execution_time=datetime(2024, 9, 1, 12, 0),
+        time_steps=[SimulationTimeStep(
+            time=datetime(2024, 9, 2, hour), traffic_segments=segments, waiting_areas_status={"area_0": {"occupied": 1}}
+        )],
+        traffic_volumes={s.segment_id: s.traffic_volume for s in segments},
+        congestion_points=[{"segment_id": "s2", "congestion_level": 0.875, "coordinates": segments[2].coordinates}],
+        stats={"total_traffic": 300 + hour, "average_congestion": 0.5, "deliveries_count": 1}
+    )
+
+
+@pytest.mark.parametrize("ensemble", [False, True])
+def test_results_round_trip_through_the_day_store(ensemble):
+    results = [_result(hour, ensemble) for hour in (8, 9, 10)]
+    entries = result_store.save_results("p1", results, {DAY: "abc"})
+
+    record = result_store.load_day("p1", DAY)
+    table = result_store.load_segment_table("p1", record.network_version)
+    assert entries[DAY]["fingerprint"] == "abc"
+    assert record.fingerprint == "abc"
+    assert [t.hour for t in record.times] == [8, 9, 10]
+    for t_idx, original in enumerate(results):
+        restored = result_store.step_to_result("p1", record, table, t_idx)
+        assert restored.model_dump() == original.model_dump()
+
+
+def test_rewriting_a_day_replaces_its_matrices():
+    result_store.save_results("p1", [_result(8)])
+    table, record = result_store.results_to_day_records([_result(8)])[0]
+    record.volumes = np.asarray(record.volumes) + 1
+    result_store.save_day_records("p1", [(table, record)])
+
+    day_dir = os.path.join(result_store.SIMULATIONS_DIR, "p1", "days", DAY.isoformat())
+    assert sorted(name.split(".")[0] for name in os.listdir(day_dir)) == ["congestion", "meta", "volumes"]
+    assert np.array_equal(result_store.load_day("p1", DAY).volumes, record.volumes)
+
+
+def test_index_and_rollups_are_rebuilt_from_the_days():
+    result_store.save_results("p1", [_result(8), _result(9)])
+    project_dir = os.path.join(result_store.SIMULATIONS_DIR, "p1")
+    os.remove(os.path.join(project_dir, result_store.INDEX_FILE))
+    os.remove(os.path.join(project_dir, result_store.ROLLUPS_FILE))
+
+    assert [t.hour for t in result_store.index_times(result_store.load_index("p1")[DAY])] == [8, 9]
+    assert result_store.load_rollups("p1")["day"][DAY.isoformat()]["total_traffic"] == 308 + 309
+
+
+def test_delivery_counts_round_trip():
+    table, record = result_store.results_to_day_records([_result(8)])[0]
+    record.delivery_counts = {"day": 2, "hours": {"08": 2}}
+    result_store.save_day_records("p1", [(table, record)])
+
+    assert result_store.load_day("p1", DAY).delivery_counts == {"day": 2, "hours": {"08": 2}}
+    assert result_store.load_rollups("p1")["day"][DAY.isoformat()]["deliveries"] == 2
+
+
+def _write_legacy_hours(project_dir, results, broken=False):
+    date_dir = os.path.join(project_dir, DAY.isoformat())
+    os.makedirs(date_dir, exist_ok=True)
+    for result in results:
+        with open(os.path.join(date_dir, f"{result.time_steps[0].time.hour}.json"), "w") as f:
+            f.write(result.model_dump_json())
+    if broken:
+        with open(os.path.join(date_dir, "11.json"), "w") as f:
+            f.write("{not json")
+    return date_dir
+
+
+def test_legacy_hours_are_migrated_and_removed():
+    project_dir = os.path.join(result_store.SIMULATIONS_DIR, "p1")
+    date_dir = _write_legacy_hours(project_dir, [_result(8), _result(9)])
+
+    assert result_store.migrate_legacy_results("p1") == 1
+    assert not os.path.exists(date_dir)
+    assert not result_store.has_legacy_results("p1")
+    assert [t.hour for t in result_store.load_day("p1", DAY).times] == [8, 9]
+
+
+def test_unreadable_legacy_days_are_moved_aside_once():
+    project_dir = os.path.join(result_store.SIMULATIONS_DIR, "p1")
+    _write_legacy_hours(project_dir, [_result(8)], broken=True)
+
+    assert result_store.migrate_legacy_results("p1") == 1
+    assert not result_store.has_legacy_results("p1")
+    assert os.path.exists(os.path.join(project_dir, result_store.LEGACY_FAILED_DIR, DAY.isoformat(), "11.json"))
+    assert [t.hour for t in result_store.load_day("p1", DAY).times] == [8]
+
+
+def test_migration_never_overwrites_stored_days():
+    result_store.save_results("p1", [_result(8), _result(9), _result(10)])
+    project_dir = os.path.join(result_store.SIMULATIONS_DIR, "p1")
+    date_dir = _write_legacy_hours(project_dir, [_result(8)])
+
+    assert result_store.migrate_legacy_results("p1") == 0
+    assert not os.path.exists(date_dir)
+    assert [t.hour for t in result_store.load_day("p1", DAY).times] == [8, 9, 10]
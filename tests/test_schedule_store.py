@@ -0,0 +1,61 @@
+import io
+
+import pandas as pd
+import pytest
+
+from app.services import schedule_store
+
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(schedule_store, "SCHEDULE_STORE_DIR", str(tmp_path / "schedules"))
+    monkeypatch.setattr(schedule_store, "_TABLES", {})
+    return tmp_path
+
+
+def _workbook(material="12"):
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        pd.DataFrame({
+            "Vorgangsname": ["Aushub", "Rohbau"], "Anfangstermin": ["2024-09-02", "2024-09-09"],
+            "Endtermin": ["2024-09-06", "2024-10-04"], "Material": [material, "30"]
+        }).to_excel(writer, sheet_name="Plan", index=False)
+        pd.DataFrame({
+            "Date": ["2024-09-02", "2024-09-03"], "TimeWindow": ["08:00-10:00", "09:30-11:00"], "VehicleType": ["LKW", None]
+        }).to_excel(writer, sheet_name="Deliveries", index=False)
+    return buffer.getvalue()
+
+
+def test_stored_tables_round_trip():
+    content = _workbook()
+    stored = schedule_store.store_upload(content)
+    assert stored == {"valid": True, "schedule_hash": schedule_store.content_hash(content)}
+
+    parsed = schedule_store.parse_upload(content)["tables"]
+    schedule_store._TABLES.clear()
+    loaded = schedule_store.load_tables(stored["schedule_hash"])
+
+    assert sorted(loaded) == ["activities", "deliveries"]
+    for name, table in parsed.items():
+        pd.testing.assert_frame_equal(loaded[name], table)
+    assert pd.api.types.is_datetime64_any_dtype(loaded["deliveries"]["Date"])
+
+
+def test_invalid_uploads_are_not_stored():
+    result = schedule_store.store_upload(_workbook(material="viel"))
+
+    assert not result["valid"]
+    assert "material" in result["errors"][0]
+    assert schedule_store.load_tables(schedule_store.content_hash(_workbook(material="viel"))) is None
+
+
+def test_legacy_project_files_are_parsed_once_and_still_validated(store_dir):
+    content = _workbook(material="viel")
+    path = store_dir / "plan.xlsx"
+    path.write_bytes(content)
+
+    tables = schedule_store.get_schedule_tables(None, str(path))
+    assert len(tables["deliveries"]) == 2
+    assert schedule_store.get_schedule_tables(None, str(path)) is tables
+    # Stored unvalidated, so uploading the same file is still rejected
+    assert not schedule_store.store_upload(content)["valid"]
@@ -0,0 +1,26 @@
+from datetime import date
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routers import simulation
+
+
+def test_daily_traffic_returns_hour_buckets(monkeypatch):
+    calls = []
+
+    def get_traffic_rollups(project_id, level, start_date, end_date):
+        calls.append((project_id, level, start_date, end_date))
+        return [{"bucket": "2024-09-02T08", "start": "2024-09-02T08:00:00", "total_traffic": 120, "deliveries": 1}]
+
+    monkeypatch.setattr(simulation, "get_traffic_rollups", get_traffic_rollups)
+    app = FastAPI()
+    app.include_router(simulation.router, prefix="/api/simulation")
+
+    response = TestClient(app).get("/api/simulation/p1/daily-traffic", params={"date": "2024-09-02"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert "hourly_traffic" not in body
+    assert body["hourly_buckets"]["8"]["total_traffic"] == 120
+    assert calls == [("p1", "hour", date(2024, 9, 2), date(2024, 9, 2))]
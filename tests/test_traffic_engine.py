@@ -0,0 +1,58 @@
+from datetime import date, time
+
+import numpy as np
+
+from app.services.random_streams import step_rng
+from app.services.traffic_engine import (
+    CONGESTION_THRESHOLD, ENSEMBLE_PERCENTILES, OFFPEAK_BASE_TRAFFIC, PEAK_BASE_TRAFFIC, PEAK_HOURS,
+    delivery_share, simulate_day, simulate_day_ensemble
+)
+
+DAY = date(2024, 9, 2)
+STEPS = [time(hour) for hour in range(6, 19)]
+HOURS = [step.hour for step in STEPS]
+DELIVERIES = np.arange(len(STEPS)) % 3
+
+
+def _rngs():
+    return [step_rng("p1", DAY, step) for step in STEPS]
+
+
+def test_single_sample_ensemble_equals_simulate_day(edge_arrays):
+    volumes, congestion = simulate_day(edge_arrays, HOURS, DELIVERIES, _rngs())
+    summary = simulate_day_ensemble(edge_arrays, HOURS, DELIVERIES, _rngs(), 1)
+
+    assert np.array_equal(summary["volume_mean"], volumes.astype(np.float32))
+    assert np.array_equal(summary["volume_p90"], volumes.astype(np.float32))
+    assert np.array_equal(summary["congestion_mean"], congestion.astype(np.float32))
+
+
+def test_ensemble_percentiles_match_a_per_edge_reference(edge_arrays):
+    n_samples = 40
+    summary = simulate_day_ensemble(edge_arrays, HOURS, DELIVERIES, _rngs(), n_samples)
+
+    # Reference: redraw each step's samples from its stream and summarize edge by edge
+    share = delivery_share(edge_arrays)
+    for t_idx, rng in enumerate(_rngs()):
+        low, high = PEAK_BASE_TRAFFIC if HOURS[t_idx] in PEAK_HOURS else OFFPEAK_BASE_TRAFFIC
+        base = rng.integers(low, high, size=(n_samples, len(edge_arrays)))
+        for e_idx in range(len(edge_arrays)):
+            volumes = (base[:, e_idx] + DELIVERIES[t_idx] * share[e_idx]).astype(np.int64)
+            capacity = edge_arrays.capacity[e_idx]
+            congestion = np.minimum(1.0, volumes / capacity) if capacity > 0 else np.zeros(n_samples)
+
+            assert np.isclose(summary["volume_mean"][t_idx, e_idx], volumes.mean(), rtol=1e-6)
+            for q in ENSEMBLE_PERCENTILES:
+                assert np.isclose(summary[f"volume_p{q}"][t_idx, e_idx], np.percentile(volumes, q), rtol=1e-6)
+                assert np.isclose(summary[f"congestion_p{q}"][t_idx, e_idx], np.percentile(congestion, q), rtol=1e-6)
+            assert np.isclose(
+                summary["exceedance_probability"][t_idx, e_idx], np.mean(congestion > CONGESTION_THRESHOLD)
+            )
+
+
+def test_ensemble_bands_are_ordered(edge_arrays):
+    summary = simulate_day_ensemble(edge_arrays, HOURS, DELIVERIES, _rngs(), 25)
+
+    assert np.all(summary["volume_p50"] <= summary["volume_p90"])
+    assert np.all(summary["volume_p90"] <= summary["volume_p95"])
+    assert np.all((summary["exceedance_probability"] >= 0) & (summary["exceedance_probability"] <= 1))
@@ -0,0 +1,68 @@
+from datetime import date, datetime
+
+from app.services.traffic_rollups import query_rollups, update_rollups
+
+
+def _steps(day, hours, deliveries=1, traffic=100):
+    return [
+        (datetime(day.year, day.month, day.day, hour), {"total_traffic": traffic, "average_congestion": 0.5, "deliveries_count": deliveries}, 1.0)
+        for hour in hours
+    ]
+
+
+def test_delivery_spanning_hours_counts_once_per_day_week_and_month():
+    monday, tuesday = date(2024, 9, 2), date(2024, 9, 3)
+    rollups = {}
+    update_rollups(
+        rollups,
+        {monday: _steps(monday, [8, 9, 10]), tuesday: _steps(tuesday, [8, 9, 10])},
+        {monday: {"day": 1, "hours": {"08": 1, "09": 1, "10": 1}}, tuesday: {"day": 1, "hours": {"08": 1, "09": 1, "10": 1}}}
+    )
+
+    assert [bucket["deliveries"] for bucket in query_rollups(rollups, "hour", monday, monday)] == [1, 1, 1]
+    assert [bucket["deliveries"] for bucket in query_rollups(rollups, "day", monday, tuesday)] == [1, 1]
+    assert query_rollups(rollups, "week", monday, tuesday)[0]["deliveries"] == 2
+    assert query_rollups(rollups, "month", monday, tuesday)[0]["deliveries"] == 2
+    # Traffic still adds up over the steps
+    assert query_rollups(rollups, "day", monday, monday)[0]["total_traffic"] == 300
+
+
+def test_sub_hourly_steps_use_distinct_counts():
+    monday = date(2024, 9, 2)
+    steps = [
+        (datetime(2024, 9, 2, 8, minute), {"total_traffic": 100, "average_congestion": 0.5, "deliveries_count": 1}, 0.25)
+        for minute in (0, 15, 30, 45)
+    ]
+    rollups = {}
+    update_rollups(rollups, {monday: steps}, {monday: {"day": 1, "hours": {"08": 1}}})
+
+    hour = query_rollups(rollups, "hour", monday, monday)[0]
+    assert hour["deliveries"] == 1
+    assert hour["total_traffic"] == 100
+
+
+def test_days_without_counts_keep_step_based_deliveries():
+    monday = date(2024, 9, 2)
+    rollups = {}
+    update_rollups(rollups, {monday: _steps(monday, [8, 9], deliveries=2)})
+
+    assert query_rollups(rollups, "day", monday, monday)[0]["deliveries"] == 4
+
+
+def test_incremental_updates_equal_a_full_build():
+    days = [date(2024, 9, day) for day in range(2, 12)]
+    steps = {day: _steps(day, range(6, 19), deliveries=day.day % 3, traffic=50 * day.day) for day in days}
+    counts = {day: {"day": day.day % 3, "hours": {f"{hour:02d}": day.day % 3 for hour in range(6, 19)}} for day in days}
+
+    full = {}
+    update_rollups(full, steps, counts)
+
+    incremental = {}
+    for day in reversed(days):
+        update_rollups(incremental, {day: _steps(day, [5, 20], traffic=1)}, {day: {"day": 9, "hours": {"05": 9, "20": 9}}})
+    for day in days:
+        # Rewriting a day replaces its buckets instead of adding to them
+        update_rollups(incremental, {day: steps[day]}, {day: counts[day]})
+
+    assert incremental == full
+    assert sum(bucket["total_traffic"] for bucket in full["month"].values()) == sum(50 * day.day * 13 for day in days)
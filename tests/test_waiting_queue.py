@@ -0,0 +1,40 @@
+from datetime import time
+
+import numpy as np
+
+from app.services.waiting_queue import DayTrucks, simulate_queue
+
+
+def _trucks(starts, ends, unloading=30.0):
+    return DayTrucks(
+        window_start=np.asarray(starts, dtype=np.float64),
+        window_end=np.asarray(ends, dtype=np.float64),
+        unloading=np.full(len(starts), unloading)
+    )
+
+
+HOURS = [time(hour) for hour in range(6, 19)]
+
+
+def test_trucks_overflow_to_the_street_without_waiting_areas():
+    trucks = _trucks([8 * 60, 8 * 60, 9 * 60], [8 * 60, 8 * 60, 9 * 60])
+    occupied, stats = simulate_queue(trucks, np.zeros(0, dtype=np.int64), HOURS, 60, np.random.default_rng(1))
+
+    assert occupied.shape == (1, len(HOURS), 0)
+    # Every arrival overflows, in the step it arrives in
+    assert stats["overflow_trucks"][2] == 2
+    assert stats["overflow_trucks"][3] == 1
+    assert stats["overflow_trucks"].sum() == 3
+    # Both 08:00 trucks stand on the street while unloading
+    assert stats["queue_length_max"][2] == 2
+    assert stats["waiting_time_mean"][2] > 0
+    assert stats["queue_length_max"][:2].sum() == 0
+
+
+def test_trucks_do_not_overflow_with_free_places():
+    trucks = _trucks([8 * 60, 9 * 60], [8 * 60, 9 * 60])
+    _, stats = simulate_queue(trucks, np.array([5]), HOURS, 60, np.random.default_rng(1))
+
+    assert stats["overflow_trucks"].sum() == 0
+    assert stats["queue_length_max"].sum() == 0
+    assert stats["waiting_time_max"].sum() == 0